@@ -17,15 +17,32 @@ Fonctionnalités principales :
 En cas d'erreur pendant l'exécution, le traceback complet est imprimé pour faciliter le débogage.
 
 Pour lancer l'application, exécutez simplement ce fichier : python main.py
+
+Mesure du démarrage (voir profil_demarrage.py) : CAHIER_PROFIL_DEMARRAGE=1 python Cahier_de_textes_v12.py
+(ou CAHIER_PROFIL_DEMARRAGE=profil.jsonl pour ajouter chaque démarrage à un fichier).
+
+Latence des gestionnaires d'événements (voir latence_tk.py) : CAHIER_LATENCE_TK=1 python Cahier_de_textes_v12.py
+
+Requêtes SQL par action de l'interface (voir sql_trace.py) : CAHIER_TRACE_SQL=1 python Cahier_de_textes_v12.py
+
+Génération par lots sans interface graphique (voir batch.py) :
+python Cahier_de_textes_v12.py batch seances.csv -o cahier.txt [-j 4]
+
+Import / export des bibliothèques de titres et de points grammaticaux (voir import_export.py) :
+python Cahier_de_textes_v12.py import bibliotheque.csv
+python Cahier_de_textes_v12.py export bibliotheque.jsonl [--type titres|points]
+
+API HTTP/JSON locale du catalogue pour tous les postes d'un établissement (voir server.py) :
+python Cahier_de_textes_v12.py serve [--hote 127.0.0.1] [--port 8765]
 """
 
 # Imports
-import tkinter as tk
-from tkinter import ttk
-from ttkbootstrap import Style
-from database import init_database
-from gui import afficher_accueil, create_styled_gui
-import traceback 
+# tkinter, ttkbootstrap et gui ne sont importés que dans main() :
+# les modes "batch", "import", "export" et "serve" fonctionnent ainsi sans interface graphique.
+import sys
+import traceback
+import profil_demarrage
+from profil_demarrage import journal, phase
 
 
 axes_du_programme = [
@@ -38,43 +55,78 @@ axes_du_programme = [
 ]
 
 def main():
-    print("Début de la fonction main")
+    journal("Début de la fonction main")
+    with phase("imports"):
+        import tkinter as tk
+        from ttkbootstrap import Style
+        from database import init_database
+        from catalog_cache import desactiver_ecriture_differee
+        from gui import afficher_accueil, create_styled_gui
+    # Latence des gestionnaires Tk de gui.py et utils.py (CAHIER_LATENCE_TK, voir latence_tk.py)
+    import latence_tk
+    latence_tk.installer_si_demande()
+    # Requêtes SQL regroupées par action de l'interface (CAHIER_TRACE_SQL, voir sql_trace.py)
+    import sql_trace
+    sql_trace.activer_si_demande()
     try:
-        root = tk.Tk()
-        print("Fenêtre Tk créée")
-        
-        style = Style(theme='cosmo')
-        print("Style appliqué")
-        
+        with phase("fenetre"):
+            root = tk.Tk()
+        journal("Fenêtre Tk créée")
+
+        with phase("style"):
+            style = Style(theme='cosmo')
+        journal("Style appliqué")
+
         root.title("Cahier de textes portable")
         root.geometry("1000x800")
-        print("Fenêtre configurée")
+        journal("Fenêtre configurée")
+
+        with phase("init_database"):
+            init_database()
+        journal("Base de données initialisée")
+
+        with phase("afficher_accueil"):
+            language_var = afficher_accueil(root)
+        journal("Fenêtre d'accueil affichée")
 
-        init_database()
-        print("Base de données initialisée")
+        # Temps passé par l'utilisateur à choisir sa langue : mesuré à part
+        with phase("attente_accueil"):
+            root.wait_window(root.children['!toplevel'])
+        journal("Attente de la fermeture de la fenêtre d'accueil terminée")
 
-        language_var = afficher_accueil(root)
-        print("Fenêtre d'accueil affichée")
-        
-        root.wait_window(root.children['!toplevel'])
-        print("Attente de la fermeture de la fenêtre d'accueil terminée")
-        
-        main_frame, widgets = create_styled_gui(root, language_var, axes_du_programme)
-        print("Interface principale créée")
+        with phase("create_styled_gui"):
+            main_frame, widgets = create_styled_gui(root, language_var, axes_du_programme)
+        journal("Interface principale créée")
 
         # Supprimez cette ligne ou commentez-la
         # ttk.Button(main_frame, text="Fermer l'application", command=root.quit).grid(row=11, column=0, columnspan=2, pady=10, sticky="ew")
 
-        print("Juste avant mainloop")
+        journal("Juste avant mainloop")
         root.mainloop()
-        print("Boucle principale terminée")
+        journal("Boucle principale terminée")
     except Exception as e:
         print(f"Une erreur s'est produite : {e}")
         print("Traceback complet:")
         traceback.print_exc()
+    finally:
+        # Écrire en base les modifications encore en file d'attente
+        desactiver_ecriture_differee()
+        profil_demarrage.ecrire()
     
 
 if __name__ == "__main__":
-    print("Script principal démarré")
+    if len(sys.argv) > 1 and sys.argv[1] == "batch":
+        # Génération par lots : python Cahier_de_textes_v12.py batch seances.csv -o cahier.txt
+        from batch import main_batch
+        sys.exit(main_batch(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] in ("import", "export"):
+        # Import / export des bibliothèques : python Cahier_de_textes_v12.py import titres.csv
+        from import_export import main_export, main_import
+        sys.exit((main_import if sys.argv[1] == "import" else main_export)(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == "serve":
+        # API HTTP/JSON du catalogue : python Cahier_de_textes_v12.py serve --port 8765
+        from server import main_serve
+        sys.exit(main_serve(sys.argv[2:]))
+    journal("Script principal démarré")
     main()
-    print("Script principal terminé")
\ No newline at end of file
+    journal("Script principal terminé")
\ No newline at end of file
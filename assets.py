@@ -0,0 +1,177 @@
+"""
+assets.py
+
+Ce module gère les images de l'application "Cahier de textes portable" (drapeaux de la fenêtre d'accueil).
+
+Les drapeaux sont affichés en 60x40. Au lieu d'ouvrir et de redimensionner les PNG avec PIL à chaque
+lancement, ils sont rendus une seule fois puis relus directement par tk.PhotoImage, sans importer PIL :
+1. données intégrées : si le module flags_data existe (généré par generer_module_base64),
+   les drapeaux sont lus depuis ses chaînes base64 ;
+2. cache disque : sinon, les PNG déjà redimensionnés sont lus dans le dossier 'cache_drapeaux'
+   placé à côté de l'exécutable (ou dans ~/.cahier_de_textes si ce dossier n'est pas accessible en écriture) ;
+   chaque entrée porte dans son nom l'empreinte (sha1) du PNG source et de la taille de rendu.
+   Une comparaison de dates ne convient pas : PyInstaller --onefile réextrait les ressources
+   dans _MEIPASS à chaque lancement, avec une date de modification toujours plus récente ;
+3. rendu : en dernier recours, PIL est importé à la demande pour créer l'entrée du cache.
+
+Fonctions principales :
+- resource_path : Chemin absolu d'une ressource, en développement comme avec PyInstaller.
+- charger_drapeau : Renvoie un tk.PhotoImage 60x40 pour un fichier de drapeau.
+- generer_cache_drapeaux : Pré-rend tous les drapeaux dans le cache disque.
+- generer_module_base64 : Écrit flags_data.py avec les drapeaux encodés en base64.
+- remove_blue_background : Rend transparents les pixels bleus (masques par canal, sans boucle Python).
+
+Avant une compilation PyInstaller : python assets.py (cache disque)
+ou python assets.py base64 (module flags_data.py à intégrer à l'exécutable).
+"""
+
+import base64
+import hashlib
+import io
+import os
+import sys
+
+TAILLE_DRAPEAU = (60, 40)
+DRAPEAUX = {
+    'Espagnol': 'spain.png',
+    'Italien': 'italy.png',
+    'Anglais': 'uk.png',
+    'Allemand': 'germany.png',
+}
+DOSSIER_CACHE = 'cache_drapeaux'
+
+
+def resource_path(relative_path):
+    """ Get absolute path to resource, works for dev and for PyInstaller """
+    try:
+        # PyInstaller creates a temp folder and stores path in _MEIPASS
+        base_path = sys._MEIPASS
+    except Exception:
+        base_path = os.path.abspath(".")
+
+    return os.path.join(base_path, relative_path)
+
+
+def _dossiers_cache():
+    if getattr(sys, 'frozen', False):
+        dossier_application = os.path.dirname(sys.executable)
+    else:
+        dossier_application = os.path.dirname(os.path.abspath(__file__))
+    return [os.path.join(dossier_application, DOSSIER_CACHE),
+            os.path.join(os.path.expanduser('~'), '.cahier_de_textes', DOSSIER_CACHE)]
+
+
+def _nom_cache(flag_file):
+    """Nom de l'entrée du cache : change si le PNG source ou TAILLE_DRAPEAU change."""
+    empreinte = hashlib.sha1(repr(TAILLE_DRAPEAU).encode('ascii'))
+    with open(resource_path(f"images/{flag_file}"), 'rb') as f:
+        empreinte.update(f.read())
+    racine, extension = os.path.splitext(flag_file)
+    return f"{racine}-{empreinte.hexdigest()[:16]}{extension}"
+
+
+def _chemin_cache(flag_file):
+    try:
+        nom = _nom_cache(flag_file)
+    except OSError:
+        return None
+    for dossier in _dossiers_cache():
+        chemin = os.path.join(dossier, nom)
+        if os.path.isfile(chemin):
+            return chemin
+    return None
+
+
+def _retirer_anciennes_entrees(dossier, flag_file, nom):
+    racine, extension = os.path.splitext(flag_file)
+    for fichier in os.listdir(dossier):
+        if fichier != nom and fichier.startswith(racine + '-') and fichier.endswith(extension):
+            try:
+                os.remove(os.path.join(dossier, fichier))
+            except OSError:
+                pass
+
+
+def _rendre_png(flag_file):
+    # Seul chemin qui utilise PIL : import différé
+    from PIL import Image
+    img = Image.open(resource_path(f"images/{flag_file}"))
+    img = img.resize(TAILLE_DRAPEAU, Image.LANCZOS)
+    tampon = io.BytesIO()
+    img.save(tampon, format='PNG')
+    return tampon.getvalue()
+
+
+def _ecrire_cache(flag_file, donnees):
+    nom = _nom_cache(flag_file)
+    for dossier in _dossiers_cache():
+        try:
+            os.makedirs(dossier, exist_ok=True)
+            chemin = os.path.join(dossier, nom)
+            with open(chemin, 'wb') as f:
+                f.write(donnees)
+            _retirer_anciennes_entrees(dossier, flag_file, nom)
+            return chemin
+        except OSError:
+            continue
+    return None
+
+
+def charger_drapeau(flag_file):
+    import tkinter as tk
+    try:
+        from flags_data import DRAPEAUX_BASE64
+    except ImportError:
+        DRAPEAUX_BASE64 = {}
+    if flag_file in DRAPEAUX_BASE64:
+        return tk.PhotoImage(data=DRAPEAUX_BASE64[flag_file], format='png')
+
+    chemin = _chemin_cache(flag_file)
+    if chemin is not None:
+        return tk.PhotoImage(file=chemin)
+
+    donnees = _rendre_png(flag_file)
+    _ecrire_cache(flag_file, donnees)
+    return tk.PhotoImage(data=base64.b64encode(donnees).decode('ascii'), format='png')
+
+
+def generer_cache_drapeaux():
+    chemins = []
+    for flag_file in DRAPEAUX.values():
+        chemins.append(_ecrire_cache(flag_file, _rendre_png(flag_file)))
+    return chemins
+
+
+def generer_module_base64(chemin='flags_data.py'):
+    lignes = ['"""', 'flags_data.py', '',
+              'Drapeaux 60x40 encodés en base64, générés par assets.generer_module_base64.',
+              'Ne pas modifier à la main.', '"""', '', 'DRAPEAUX_BASE64 = {']
+    for flag_file in DRAPEAUX.values():
+        donnees = base64.b64encode(_rendre_png(flag_file)).decode('ascii')
+        lignes.append(f"    {flag_file!r}: {donnees!r},")
+    lignes.append('}')
+    with open(chemin, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lignes) + '\n')
+    return chemin
+
+
+def remove_blue_background(image):
+    from PIL import Image, ImageChops
+    image = image.convert("RGBA")
+    r, g, b, a = image.split()
+    # Masques 0/255 par canal, combinés par multiplication (équivalent d'un ET logique)
+    masque = ImageChops.multiply(
+        ImageChops.multiply(b.point(lambda v: 255 if v > 200 else 0),
+                            r.point(lambda v: 255 if v < 100 else 0)),
+        g.point(lambda v: 255 if v < 100 else 0))
+    transparent = Image.new("RGBA", image.size, (255, 255, 255, 0))
+    image.paste(transparent, (0, 0), masque)
+    return image
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "base64":
+        print(f"Module écrit : {generer_module_base64()}")
+    else:
+        for chemin in generer_cache_drapeaux():
+            print(f"Drapeau mis en cache : {chemin}")
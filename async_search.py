@@ -0,0 +1,102 @@
+"""
+async_search.py
+
+Ce module fournit un pipeline de recherche partagé pour les gestionnaires <KeyRelease>
+de l'application "Cahier de textes portable".
+
+Fonctionnement :
+1. Regroupement des frappes : chaque frappe (re)programme la recherche avec root.after ;
+   seule la dernière saisie après DELAI_MS millisecondes de calme est lancée.
+2. Exécution hors de la boucle Tk : la requête tourne dans un thread de travail unique.
+3. Annulation « le dernier gagne » : chaque clé (un champ de recherche) a un numéro de
+   génération ; une requête ou un résultat périmé est abandonné sans être appliqué.
+4. Application sur le thread Tk : les résultats passent par une file sondée avec root.after,
+   car les widgets Tk ne doivent être modifiés que depuis le thread principal.
+
+Avec sql_trace, les requêtes d'une recherche sont attribuées à l'action Tk qui l'a soumise.
+
+Classe principale :
+- PipelineRecherche : soumettre(cle, calcul, appliquer).
+"""
+
+import queue
+import threading
+import traceback
+
+import sql_trace
+
+DELAI_MS = 150
+INTERVALLE_SONDAGE_MS = 15
+
+
+class PipelineRecherche:
+    def __init__(self, root, delai_ms=DELAI_MS):
+        self.root = root
+        self.delai_ms = delai_ms
+        self._generations = {}
+        self._attentes = {}
+        self._requetes = queue.Queue()
+        self._resultats = queue.Queue()
+        self._en_cours = 0
+        self._sondage = None
+        self._thread = threading.Thread(target=self._travailler, name="recherche", daemon=True)
+        self._thread.start()
+
+    def soumettre(self, cle, calcul, appliquer):
+        """Programme calcul() dans le thread de travail, puis appliquer(résultat) dans le thread Tk."""
+        generation = self._generations.get(cle, 0) + 1
+        self._generations[cle] = generation
+        attente = self._attentes.pop(cle, None)
+        if attente is not None:
+            self.root.after_cancel(attente)
+        action = sql_trace.action_courante()
+        self._attentes[cle] = self.root.after(
+            self.delai_ms, lambda: self._lancer(cle, generation, calcul, appliquer, action))
+
+    def _lancer(self, cle, generation, calcul, appliquer, action=None):
+        self._attentes.pop(cle, None)
+        if generation != self._generations.get(cle):
+            return
+        self._en_cours += 1
+        self._requetes.put((cle, generation, calcul, appliquer, action))
+        if self._sondage is None:
+            self._sondage = self.root.after(INTERVALLE_SONDAGE_MS, self._sonder)
+
+    def _travailler(self):
+        while True:
+            cle, generation, calcul, appliquer, action = self._requetes.get()
+            if generation != self._generations.get(cle):
+                # Une saisie plus récente est arrivée : inutile de lancer la requête
+                self._resultats.put((cle, generation, appliquer, None, None))
+                continue
+            try:
+                with sql_trace.poursuivre(action):
+                    resultat = calcul()
+                self._resultats.put((cle, generation, appliquer, resultat, None))
+            except Exception as e:
+                self._resultats.put((cle, generation, appliquer, None, e))
+
+    def _signaler(self, erreur):
+        print(f"Erreur pendant la recherche : {erreur}")
+        traceback.print_exception(type(erreur), erreur, erreur.__traceback__)
+
+    def _sonder(self):
+        self._sondage = None
+        while True:
+            try:
+                cle, generation, appliquer, resultat, erreur = self._resultats.get_nowait()
+            except queue.Empty:
+                break
+            self._en_cours -= 1
+            if generation != self._generations.get(cle):
+                continue
+            if erreur is not None:
+                self._signaler(erreur)
+                continue
+            # Widget détruit entre-temps, par exemple : les autres résultats doivent passer quand même
+            try:
+                appliquer(resultat)
+            except Exception as e:
+                self._signaler(e)
+        if self._en_cours:
+            self._sondage = self.root.after(INTERVALLE_SONDAGE_MS, self._sonder)
@@ -0,0 +1,183 @@
+"""
+batch.py
+
+Ce module génère les "textes finaux" du Cahier de textes portable par lots, sans interface graphique.
+
+En fin de trimestre, il faut régénérer des centaines d'entrées. Au lieu de remplir les widgets une
+séance à la fois, les séances sont lues depuis un fichier CSV (une ligne d'en-tête) ou JSON Lines
+(un objet par ligne), mises en forme avec formatage.formater_texte_final, puis écrites au fil de l'eau :
+le fichier d'entrée n'est jamais chargé entièrement en mémoire. tkinter n'est pas importé.
+
+Pour les très gros lots, la mise en forme peut être répartie sur un pool de processus ;
+l'ordre des entrées est conservé. Le pool reçoit l'entrée par fenêtres de processus x
+TAILLE_BLOC_PROCESSUS séances, au plus FENETRES_EN_COURS à la fois : la mémoire reste bornée
+quelle que soit la taille du fichier (Pool.imap, lui, lirait tout le fichier d'avance).
+
+La disposition vient des modèles de templates.py (par langue de la séance et format d'établissement),
+lus dans la base indiquée par --base ou, à défaut, dans la base de l'application si elle existe.
+Chaque processus compile un modèle une seule fois pour tout le lot.
+
+Fonctions principales :
+- deduire_format : Format d'un fichier ('csv' ou 'jsonl') d'après son extension.
+- lire_enregistrements : Itère sur les séances d'un fichier .csv ou .jsonl (ValueError, avec le
+  numéro de ligne, pour une ligne JSON invalide ou qui n'est pas un objet).
+- generer_lot : Met en forme toutes les séances d'un fichier et écrit le résultat. Le fichier de
+  sortie est écrit sous un nom provisoire puis renommé : en cas d'erreur, il n'est pas laissé à moitié écrit.
+- main_batch : Point d'entrée en ligne de commande (python Cahier_de_textes_v12.py batch ...).
+"""
+
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import sys
+from collections import deque
+from itertools import islice
+from multiprocessing import Pool
+
+import db_pool
+import templates
+from database import init_database
+from formatage import formater_texte_final
+
+SEPARATEUR_ENTREES = "\n\n" + "-" * 40 + "\n\n"
+TAILLE_BLOC_PROCESSUS = 256
+# Fenêtres envoyées au pool en même temps : l'une est mise en forme pendant que l'autre est écrite
+FENETRES_EN_COURS = 2
+
+
+def deduire_format(chemin, format_force=None):
+    if format_force:
+        return format_force
+    extension = os.path.splitext(chemin)[1].lower()
+    return 'csv' if extension == '.csv' else 'jsonl'
+
+
+def lire_enregistrements(chemin, format_force=None, objets_seulement=True):
+    """objets_seulement=False laisse passer les lignes JSON qui ne sont pas des objets (l'appelant les écarte)."""
+    format_fichier = deduire_format(chemin, format_force)
+    fichier = sys.stdin if chemin == '-' else open(chemin, encoding='utf-8-sig', newline='')
+    try:
+        if format_fichier == 'csv':
+            echantillon = fichier.readline()
+            delimiteur = ';' if echantillon.count(';') > echantillon.count(',') else ','
+            en_tetes = next(csv.reader([echantillon], delimiter=delimiteur), None)
+            for ligne in csv.DictReader(fichier, fieldnames=en_tetes, delimiter=delimiteur):
+                yield ligne
+        else:
+            for numero, ligne in enumerate(fichier, start=1):
+                if not ligne.strip():
+                    continue
+                try:
+                    enregistrement = json.loads(ligne)
+                except json.JSONDecodeError as e:
+                    raise ValueError(f"{chemin}, ligne {numero} : JSON invalide ({e})") from e
+                if objets_seulement and not isinstance(enregistrement, dict):
+                    raise ValueError(f"{chemin}, ligne {numero} : objet JSON attendu")
+                yield enregistrement
+    finally:
+        if fichier is not sys.stdin:
+            fichier.close()
+
+
+def _configurer_modeles(chemin_base, format_institution):
+    # Sans base, seuls les modèles par défaut sont utilisés (et aucun fichier n'est créé)
+    if format_institution:
+        templates.format_par_defaut = format_institution
+    if chemin_base is None and os.path.exists(db_pool.DB_PATH):
+        chemin_base = db_pool.DB_PATH
+    if chemin_base is None:
+        templates.utiliser_base(False)
+        return False
+    db_pool.configurer(chemin=chemin_base)
+    templates.utiliser_base(True)
+    return True
+
+
+def _initialiser_processus(chemin_base, format_institution):
+    # Chaque processus du pool compile ses modèles une fois, au premier enregistrement
+    _configurer_modeles(chemin_base, format_institution)
+
+
+def _textes(enregistrements, processus, chemin_base, format_institution):
+    if not processus or processus <= 1:
+        for enregistrement in enregistrements:
+            yield formater_texte_final(enregistrement)
+        return
+    taille_fenetre = processus * TAILLE_BLOC_PROCESSUS
+    enregistrements = iter(enregistrements)
+    en_cours = deque()
+    with Pool(processus, initializer=_initialiser_processus,
+              initargs=(chemin_base, format_institution)) as pool:
+        # Pool.imap viderait le générateur d'entrée dans son thread d'envoi, sans attendre les
+        # résultats : l'entrée n'est lue ici qu'une fenêtre à la fois, dans l'ordre
+        while True:
+            fenetre = list(islice(enregistrements, taille_fenetre))
+            if fenetre:
+                en_cours.append(pool.map_async(formater_texte_final, fenetre, chunksize=TAILLE_BLOC_PROCESSUS))
+                if len(en_cours) < FENETRES_EN_COURS:
+                    continue
+            if not en_cours:
+                return
+            yield from en_cours.popleft().get()
+
+
+def generer_lot(entree, sortie='-', processus=None, format_entree=None, format_sortie='texte',
+                chemin_base=None, format_institution=None):
+    """Écrit le texte final de chaque séance de entree dans sortie ; renvoie le nombre d'entrées."""
+    if _configurer_modeles(chemin_base, format_institution):
+        # Table 'templates' présente même dans une base créée par une ancienne version
+        init_database()
+    provisoire = None if sortie == '-' else f"{sortie}.partiel"
+    destination = sys.stdout if provisoire is None else open(provisoire, 'w', encoding='utf-8', newline='')
+    nombre = 0
+    try:
+        enregistrements = lire_enregistrements(entree, format_entree)
+        for texte in _textes(enregistrements, processus, chemin_base, format_institution):
+            if format_sortie == 'jsonl':
+                destination.write(json.dumps({'texte_final': texte}, ensure_ascii=False) + "\n")
+            else:
+                if nombre:
+                    destination.write(SEPARATEUR_ENTREES)
+                destination.write(texte)
+            nombre += 1
+        if nombre and format_sortie != 'jsonl':
+            destination.write("\n")
+    except BaseException:
+        if provisoire is not None:
+            destination.close()
+            os.remove(provisoire)
+        raise
+    if provisoire is not None:
+        destination.close()
+        os.replace(provisoire, sortie)
+    return nombre
+
+
+def main_batch(arguments=None):
+    parser = argparse.ArgumentParser(
+        prog="Cahier_de_textes_v12.py batch",
+        description="Génère les textes finaux d'un fichier de séances (CSV ou JSON Lines) sans interface graphique.")
+    parser.add_argument("entree", help="fichier .csv ou .jsonl ('-' pour l'entrée standard)")
+    parser.add_argument("-o", "--sortie", default='-', help="fichier de sortie ('-' pour la sortie standard)")
+    parser.add_argument("-f", "--format", choices=['csv', 'jsonl'], help="format d'entrée (déduit de l'extension par défaut)")
+    parser.add_argument("--format-sortie", choices=['texte', 'jsonl'], default='texte')
+    parser.add_argument("-j", "--processus", type=int, default=None,
+                        help="nombre de processus pour la mise en forme (0 ou 1 : aucun pool)")
+    parser.add_argument("--base", default=None,
+                        help=f"base contenant les modèles (par défaut {db_pool.DB_PATH} s'il existe)")
+    parser.add_argument("--format-etablissement", default=None, help="format d'établissement des modèles")
+    args = parser.parse_args(arguments)
+    try:
+        nombre = generer_lot(args.entree, args.sortie, args.processus, args.format, args.format_sortie,
+                             args.base, args.format_etablissement)
+    except (OSError, ValueError, sqlite3.Error) as e:
+        print(f"Une erreur est survenue : {e}", file=sys.stderr)
+        return 1
+    print(f"{nombre} entrée(s) générée(s).", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_batch())
@@ -0,0 +1,64 @@
+"""
+bench_connexions.py
+
+Compare la latence par appel entre l'ancien comportement (une connexion SQLite ouverte
+et fermée à chaque appel) et la connexion longue durée fournie par db_pool.
+
+Utilisation : python benchmarks/bench_connexions.py [nombre_appels]
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db_pool
+from database import init_database, load_titles, get_grammar_points
+
+
+def appel_ancien(chemin):
+    # Reproduit l'ancien load_titles : connexion ouverte puis fermée à chaque appel
+    conn = sqlite3.connect(chemin)
+    c = conn.cursor()
+    try:
+        c.execute("SELECT title FROM titles")
+        return [row[0] for row in c.fetchall()]
+    finally:
+        conn.close()
+
+
+def mesurer(fonction, nombre):
+    debut = time.perf_counter()
+    for _ in range(nombre):
+        fonction()
+    return (time.perf_counter() - debut) / nombre * 1e6
+
+
+def main():
+    nombre = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    with tempfile.TemporaryDirectory() as dossier:
+        chemin = os.path.join(dossier, 'bench.db')
+        db_pool.configurer(chemin=chemin)
+        init_database()
+        conn = db_pool.get_connection()
+        conn.executemany("INSERT OR IGNORE INTO titles (title) VALUES (?)",
+                         ((f"Document {i}",) for i in range(200)))
+        conn.commit()
+
+        ancien = mesurer(lambda: appel_ancien(chemin), nombre)
+        titres = mesurer(load_titles, nombre)
+        points = mesurer(lambda: get_grammar_points('Espagnol'), nombre)
+        db_pool.fermer_connexions()
+
+    print(f"{nombre} appels par mesure")
+    print(f"Connexion par appel (ancien load_titles) : {ancien:8.1f} µs/appel")
+    print(f"Connexion partagée (load_titles)         : {titres:8.1f} µs/appel")
+    print(f"Connexion partagée (get_grammar_points)  : {points:8.1f} µs/appel")
+    print(f"Gain load_titles : x{ancien / titres:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+bench_recherche.py
+
+Compare le parcours linéaire utilisé auparavant par les filtres (lower() sur chaque titre
+à chaque frappe) avec l'index de trigrammes de search_index, sur un corpus synthétique.
+
+Utilisation : python benchmarks/bench_recherche.py [nombre_titres]
+"""
+
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from search_index import IndexTrigrammes
+
+MOTS = [
+    "lecture", "texte", "chanson", "poème", "article", "interview", "publicité", "affiche",
+    "Madrid", "Barcelona", "Sevilla", "Frida", "Kahlo", "Picasso", "Guernica", "Cervantes",
+    "Quijote", "Lorca", "mercado", "familia", "escuela", "ciudad", "migración", "frontera",
+    "memoria", "fiesta", "tradición", "deporte", "fútbol", "planeta", "energía", "robot",
+]
+
+
+def generer_titres(nombre, graine=42):
+    aleatoire = random.Random(graine)
+    return [f"{' '.join(aleatoire.sample(MOTS, 3))} {i}" for i in range(nombre)]
+
+
+def parcours_lineaire(titres, typed):
+    typed = typed.lower()
+    return [titre for titre in titres if typed in titre.lower()]
+
+
+def mesurer(fonction, requetes):
+    durees = []
+    for requete in requetes:
+        debut = time.perf_counter()
+        fonction(requete)
+        durees.append((time.perf_counter() - debut) * 1000)
+    return statistics.median(durees), max(durees)
+
+
+def main():
+    nombre = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    titres = generer_titres(nombre)
+
+    debut = time.perf_counter()
+    index = IndexTrigrammes(titres)
+    construction = time.perf_counter() - debut
+
+    aleatoire = random.Random(1)
+    # Saisies réalistes : un mot du corpus suivi d'un numéro partiel
+    requetes = [f"{aleatoire.choice(MOTS)[:5]} {aleatoire.randint(0, nombre - 1)}"[:12] for _ in range(200)]
+    requetes += [str(aleatoire.randint(0, nombre - 1)) for _ in range(200)]
+
+    lineaire = mesurer(lambda r: parcours_lineaire(titres, r), requetes[:40])
+    trigrammes = mesurer(lambda r: index.rechercher(r, limite=50), requetes)
+
+    print(f"{nombre} titres, construction de l'index : {construction:.2f} s")
+    print(f"Parcours linéaire : médiane {lineaire[0]:8.3f} ms, max {lineaire[1]:8.3f} ms")
+    print(f"Index trigrammes  : médiane {trigrammes[0]:8.3f} ms, max {trigrammes[1]:8.3f} ms")
+
+    debut = time.perf_counter()
+    for i in range(1000):
+        index.ajouter(f"nouveau titre {i}")
+    for i in range(1000):
+        index.retirer(f"nouveau titre {i}")
+    par_element = (time.perf_counter() - debut) * 1000 / 2000
+    print(f"Ajout + suppression incrémentale : {par_element:.3f} ms par élément")
+
+
+if __name__ == "__main__":
+    main()
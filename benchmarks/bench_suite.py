@@ -0,0 +1,285 @@
+"""
+bench_suite.py
+
+Suite de benchmarks des chemins critiques de la base de données et des filtres à la frappe,
+sur des corpus synthétiques de titres et de points grammaticaux.
+
+Fonctions mesurées :
+- database : init_database (base neuve et base à jour), load_titles, get_grammar_points,
+  save_title, add_grammar_point ;
+- catalog_cache : load_titles et get_grammar_points (premier accès puis accès en cache) ;
+- utils : recherche_objectifs et update_title_suggestions, appelés avec de faux widgets
+  (aucun affichage n'est nécessaire : la suite tourne sur un serveur Linux sans écran).
+
+Chaque taille de corpus (1 000, 100 000 et 1 000 000 éléments par défaut) utilise sa propre base
+temporaire. Les résultats sont écrits en JSON pour comparer deux exécutions :
+
+    python benchmarks/bench_suite.py -o avant.json
+    python benchmarks/bench_suite.py -o apres.json --comparer avant.json
+
+Utilisation : python benchmarks/bench_suite.py [--tailles 1000,100000] [-o resultats.json]
+                                               [--comparer precedent.json] [--seuil 1.2]
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import catalog_cache
+import database
+import db_pool
+import utils
+
+TAILLES_PAR_DEFAUT = [1_000, 100_000, 1_000_000]
+LANGUE = 'Espagnol'
+
+MOTS = [
+    "lecture", "texte", "chanson", "poème", "article", "interview", "publicité", "affiche",
+    "Madrid", "Barcelona", "Sevilla", "Frida", "Kahlo", "Picasso", "Guernica", "Cervantes",
+    "Quijote", "Lorca", "mercado", "familia", "escuela", "ciudad", "migración", "frontera",
+    "memoria", "fiesta", "tradición", "deporte", "fútbol", "planeta", "energía", "robot",
+]
+NOTIONS = [
+    "subjonctif", "imparfait", "passé simple", "gérondif", "impératif", "comparatif",
+    "superlatif", "pronoms", "prépositions", "ser et estar", "apocope", "diphtongue",
+    "concordance des temps", "tournure affective", "obligation", "hypothèse",
+]
+
+
+# --- Faux widgets -------------------------------------------------------------
+
+class FausseVariable:
+    def __init__(self, valeur=""):
+        self.valeur = valeur
+
+    def get(self):
+        return self.valeur
+
+    def set(self, valeur):
+        self.valeur = valeur
+
+
+class FausseEntree(FausseVariable):
+    """Remplace ttk.Entry / ttk.Combobox : get, set, delete et l'accès par clé (['values'])."""
+
+    def __init__(self, valeur=""):
+        super().__init__(valeur)
+        self.options = {'values': ()}
+
+    def delete(self, debut, fin=None):
+        self.valeur = ""
+
+    def __setitem__(self, cle, valeur):
+        self.options[cle] = valeur
+
+    def __getitem__(self, cle):
+        return self.options[cle]
+
+
+# --- Corpus -------------------------------------------------------------------
+
+def generer_titres(nombre, graine=42):
+    aleatoire = random.Random(graine)
+    return [f"{' '.join(aleatoire.sample(MOTS, 3))} {i}" for i in range(nombre)]
+
+
+def generer_points(nombre, graine=7):
+    aleatoire = random.Random(graine)
+    return [f"{aleatoire.choice(NOTIONS)} {' '.join(aleatoire.sample(MOTS, 2))} {i}" for i in range(nombre)]
+
+
+def preparer_base(dossier, taille):
+    chemin = os.path.join(dossier, f"corpus_{taille}.db")
+    db_pool.configurer(chemin=chemin)
+    catalog_cache.invalider()
+    database.init_database()
+    with db_pool.transaction() as c:
+        c.executemany("INSERT OR IGNORE INTO titles (title) VALUES (?)",
+                      ((titre,) for titre in generer_titres(taille)))
+        c.execute("SELECT id FROM languages WHERE name=?", (LANGUE,))
+        langue_id = c.fetchone()[0]
+        c.executemany("INSERT OR IGNORE INTO grammar_points (language_id, point) VALUES (?, ?)",
+                      ((langue_id, point) for point in generer_points(taille)))
+    return chemin
+
+
+# --- Mesure -------------------------------------------------------------------
+
+def mesurer(fonction, repetitions, preparation=None):
+    durees = []
+    for i in range(repetitions):
+        argument = preparation(i) if preparation is not None else None
+        debut = time.perf_counter()
+        if preparation is not None:
+            fonction(argument)
+        else:
+            fonction()
+        durees.append((time.perf_counter() - debut) * 1000)
+    durees.sort()
+    return {
+        'repetitions': repetitions,
+        'median_ms': round(statistics.median(durees), 4),
+        'p95_ms': round(durees[min(len(durees) - 1, int(len(durees) * 0.95))], 4),
+        'min_ms': round(durees[0], 4),
+        'max_ms': round(durees[-1], 4),
+    }
+
+
+def repetitions_pour(taille, petites, grandes):
+    return petites if taille <= 100_000 else grandes
+
+
+def saisies(taille, nombre=50, graine=3):
+    aleatoire = random.Random(graine)
+    resultat = []
+    for _ in range(nombre):
+        mot = aleatoire.choice(MOTS + NOTIONS)
+        resultat.append(mot[:aleatoire.randint(2, len(mot))])
+    resultat += [str(aleatoire.randint(0, taille - 1)) for _ in range(nombre // 5)]
+    return resultat
+
+
+def benchmarks_taille(dossier, taille):
+    resultats = []
+
+    def ajouter(nom, mesure):
+        mesure.update({'nom': nom, 'taille': taille})
+        resultats.append(mesure)
+        print(f"  {nom:<50} médiane {mesure['median_ms']:10.3f} ms   p95 {mesure['p95_ms']:10.3f} ms")
+
+    debut = time.perf_counter()
+    chemin = preparer_base(dossier, taille)
+    print(f"Corpus de {taille} titres et points grammaticaux généré en {time.perf_counter() - debut:.1f} s")
+
+    # init_database sur une base neuve, puis sur la base (à jour) du corpus
+    def base_neuve(i):
+        return os.path.join(dossier, f"neuve_{taille}_{i}.db")
+
+    def init_neuve(chemin_neuf):
+        db_pool.configurer(chemin=chemin_neuf)
+        database.init_database()
+
+    ajouter("database.init_database (base neuve)", mesurer(init_neuve, 5, base_neuve))
+    db_pool.configurer(chemin=chemin)
+    ajouter("database.init_database (base à jour)", mesurer(database.init_database, 10))
+
+    lectures = repetitions_pour(taille, 20, 3)
+    ajouter("database.load_titles", mesurer(database.load_titles, lectures))
+    ajouter("database.get_grammar_points", mesurer(lambda: database.get_grammar_points(LANGUE), lectures))
+
+    def charger_sans_cache(fonction):
+        def executer():
+            catalog_cache.invalider()
+            fonction()
+        return executer
+
+    ajouter("catalog_cache.load_titles (premier accès)",
+            mesurer(charger_sans_cache(catalog_cache.load_titles), lectures))
+    ajouter("catalog_cache.load_titles (en cache)", mesurer(catalog_cache.load_titles, 200))
+    ajouter("catalog_cache.get_grammar_points (premier accès)",
+            mesurer(charger_sans_cache(lambda: catalog_cache.get_grammar_points(LANGUE)), lectures))
+    ajouter("catalog_cache.get_grammar_points (en cache)",
+            mesurer(lambda: catalog_cache.get_grammar_points(LANGUE), 200))
+
+    ajouter("database.save_title", mesurer(database.save_title, 100, lambda i: f"nouveau titre {taille} {i}"))
+    ajouter("database.add_grammar_point",
+            mesurer(lambda point: database.add_grammar_point(LANGUE, point), 100,
+                    lambda i: f"nouveau point {taille} {i}"))
+
+    # Filtres à la frappe, avec de faux widgets
+    catalog_cache.invalider()
+    langue = FausseVariable(LANGUE)
+    entree = FausseEntree()
+    liste_deroulante = FausseEntree()
+    catalog_cache.get_grammar_points(LANGUE)
+    textes = saisies(taille)
+
+    def recherche(texte):
+        entree.set(texte)
+        utils.recherche_objectifs(None, liste_deroulante, entree, langue)
+
+    ajouter("utils.recherche_objectifs (par frappe)", mesurer(recherche, len(textes), lambda i: textes[i]))
+
+    titres = catalog_cache.load_titles()
+    titre_entree = FausseEntree()
+    construction = mesurer(lambda: utils.update_title_suggestions(titre_entree, titres),
+                           repetitions_pour(taille, 5, 1))
+    ajouter("utils.update_title_suggestions (construction)", construction)
+    mise_a_jour = utils.update_title_suggestions(titre_entree, titres)
+
+    def suggestion(texte):
+        titre_entree.set(texte)
+        mise_a_jour()
+
+    ajouter("utils.update_title_suggestions (par frappe)", mesurer(suggestion, len(textes), lambda i: textes[i]))
+
+    db_pool.fermer_connexions()
+    return resultats
+
+
+def comparer(resultats, chemin_precedent, seuil):
+    with open(chemin_precedent, encoding='utf-8') as f:
+        precedents = {(r['nom'], r['taille']): r for r in json.load(f)['resultats']}
+    regressions = 0
+    print(f"\nComparaison avec {chemin_precedent} (seuil x{seuil}) :")
+    for resultat in resultats:
+        precedent = precedents.get((resultat['nom'], resultat['taille']))
+        if precedent is None or not precedent['median_ms']:
+            continue
+        rapport = resultat['median_ms'] / precedent['median_ms']
+        marque = "  RÉGRESSION" if rapport > seuil else ""
+        regressions += rapport > seuil
+        print(f"  {resultat['nom']:<50} {resultat['taille']:>9}  x{rapport:6.2f}{marque}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks de la base de données et des filtres.")
+    parser.add_argument("--tailles", default=",".join(str(t) for t in TAILLES_PAR_DEFAUT),
+                        help="tailles de corpus séparées par des virgules")
+    parser.add_argument("-o", "--sortie", default="bench_resultats.json", help="fichier JSON des résultats")
+    parser.add_argument("--comparer", default=None, help="résultats JSON d'une exécution précédente")
+    parser.add_argument("--seuil", type=float, default=1.2,
+                        help="rapport des médianes au-delà duquel une mesure est signalée")
+    args = parser.parse_args()
+    tailles = [int(taille) for taille in args.tailles.split(",") if taille.strip()]
+
+    dossier = tempfile.mkdtemp(prefix="bench_cahier_")
+    resultats = []
+    try:
+        for taille in tailles:
+            resultats.extend(benchmarks_taille(dossier, taille))
+    finally:
+        db_pool.fermer_connexions()
+        shutil.rmtree(dossier, ignore_errors=True)
+
+    rapport = {
+        'horodatage': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'plateforme': platform.platform(),
+        'fts5': database.fts_actif,
+        'tailles': tailles,
+        'resultats': resultats,
+    }
+    with open(args.sortie, 'w', encoding='utf-8') as f:
+        json.dump(rapport, f, ensure_ascii=False, indent=2)
+    print(f"\nRésultats écrits dans {args.sortie}")
+
+    if args.comparer:
+        return 1 if comparer(resultats, args.comparer, args.seuil) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
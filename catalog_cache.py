@@ -0,0 +1,389 @@
+"""
+catalog_cache.py
+
+Ce module place un cache en mémoire devant database.py pour l'application "Cahier de textes portable".
+
+Les titres et les points grammaticaux (par langue) sont chargés une seule fois depuis la base,
+puis servis depuis la mémoire. Les filtres appelés à chaque frappe clavier ne coûtent donc
+plus aucune requête SQL.
+
+Fonctions principales (mêmes noms et mêmes signatures que dans database.py) :
+- load_titles / get_grammar_points : Lecture depuis le cache (chargement au premier appel ;
+  les points de toutes les langues sont chargés ensemble par une seule requête groupée).
+- prechauffer : Remplit le cache au démarrage ; changer de langue ne coûte ensuite aucune requête.
+- save_title / delete_title : Écriture en base puis mise à jour du cache sur place (seulement si
+  l'écriture a réussi ou a été confiée au thread d'écriture) ; renvoient False en cas d'échec.
+- add_grammar_point / remove_grammar_point : Idem pour les points grammaticaux.
+- rechercher_titres / rechercher_points : Recherche de sous-chaîne via un index de trigrammes
+  (search_index), maintenu de façon incrémentale par les fonctions d'écriture.
+- rechercher_titres_classes / rechercher_points_classes : Les N premiers résultats de l'index de
+  trigrammes (recherche de sous-chaîne, écritures en attente comprises). Quand FTS5 est actif
+  (database.ACTIVER_FTS) et que les résultats dépassent N, ceux que bm25 classe en tête
+  (database.search_*) sont placés d'abord ; une recherche FTS vide ne retire rien.
+  Si la recherche exacte de points ne trouve rien, les points proches (fautes de frappe,
+  accents oubliés) sont proposés.
+- rechercher_points_approches : Recherche tolérante aux fautes (fuzzy.IndexApproche, par langue).
+- enregistrer_utilisation : Compte un choix de titre ou de point grammatical (table 'usages').
+- ordonner_par_usage : Place en tête les éléments les plus choisis récemment
+  (classement.ClassementUsage par type et par langue, mis à jour à chaque choix).
+- activer_ecriture_differee / desactiver_ecriture_differee : Confie les écritures à un
+  thread d'écriture (write_behind) ; le cache est mis à jour immédiatement, la base peu après.
+  desactiver_ecriture_differee est aussi appelée à la sortie du programme, avant que db_pool
+  ne ferme les connexions (sinon une transaction en cours serait coupée).
+- save_lesson : Enregistre une séance dans l'historique (non mis en cache : lu page par page).
+- ecritures_en_attente : Vrai tant que des écritures différées ne sont pas en base (sans attendre).
+- invalider : Vide le cache et incrémente le compteur de génération.
+- verifier_modifications : Vérifie si la base a été modifiée ailleurs, sans lire le catalogue ;
+  renvoie 'generation' (sondée par catalog_model.surveiller pour recharger les modèles affichés).
+
+Invalidation : toutes les écritures du cache (synchrones ou différées) passent par une même
+connexion dédiée (db_pool.connexion_dediee). Sur cette connexion, PRAGMA data_version ne change
+que lorsqu'une autre connexion valide une transaction : un autre processus (dossier partagé),
+ou une écriture faite hors du cache. La valeur est comparée au plus une fois toutes les
+INTERVALLE_VERIFICATION secondes ; si elle a changé, le cache est vidé et le compteur
+'generation' incrémenté. La comparaison est reportée tant que le thread d'écriture a des
+opérations en file ou en cours (recharger à ce moment ferait disparaître les ajouts et
+suppressions pas encore en base), ou tant qu'il tient la connexion : la valeur de référence
+n'est pas modifiée entre-temps, une écriture d'un autre processus reste donc détectée ensuite.
+"""
+
+import atexit
+import sqlite3
+import threading
+import time
+
+import database
+import db_pool
+from classement import ClassementUsage, score_choix
+from fuzzy import IndexApproche
+from search_index import IndexTrigrammes
+from write_behind import EcrivainDiffere
+
+# Délai minimal entre deux vérifications de PRAGMA data_version (en secondes)
+INTERVALLE_VERIFICATION = 2.0
+# Nom de la connexion par laquelle passent toutes les écritures du cache
+CONNEXION_ECRITURE = 'catalogue'
+
+generation = 0
+
+_titres = None
+_points = {}
+_index_titres = None
+_index_points = {}
+_index_approche = {}
+_classements = {}
+_version = None
+_derniere_verification = 0.0
+_ecrivain = None
+_verrou = threading.RLock()
+# Protège la connexion d'écriture, partagée entre le thread d'écriture et les écritures synchrones
+_verrou_ecriture = threading.Lock()
+
+
+def _executer_ecriture(operation):
+    with _verrou_ecriture:
+        conn = db_pool.connexion_dediee(CONNEXION_ECRITURE)
+        return db_pool.executer_transaction(operation, conn=conn)
+
+
+def _version_base():
+    """(connexion, data_version) de la connexion d'écriture ; None si elle est en cours d'utilisation."""
+    if not _verrou_ecriture.acquire(blocking=False):
+        return None
+    try:
+        conn = db_pool.connexion_dediee(CONNEXION_ECRITURE)
+        return conn, conn.execute("PRAGMA data_version").fetchone()[0]
+    finally:
+        _verrou_ecriture.release()
+
+
+def invalider():
+    global _titres, _index_titres, generation
+    with _verrou:
+        _titres = None
+        _index_titres = None
+        _points.clear()
+        _index_points.clear()
+        _index_approche.clear()
+        _classements.clear()
+        generation += 1
+
+
+def _verifier_generation():
+    global _version, _derniere_verification
+    if _ecrivain is not None and _ecrivain.occupe():
+        # Reporté : _version n'est pas touchée, une écriture étrangère sera vue au prochain appel
+        return
+    maintenant = time.monotonic()
+    if maintenant - _derniere_verification < INTERVALLE_VERIFICATION:
+        return
+    version = _version_base()
+    if version is None:
+        return
+    _derniere_verification = maintenant
+    # Une nouvelle connexion (base reconfigurée) compte aussi comme une modification
+    if _version is not None and version != _version:
+        invalider()
+    _version = version
+
+
+def verifier_modifications():
+    with _verrou:
+        _verifier_generation()
+        return generation
+
+
+def activer_ecriture_differee(root, on_erreur=None):
+    global _ecrivain
+
+    def echec(description, erreur):
+        # La vue en mémoire ne correspond plus à la base : rechargement au prochain accès
+        invalider()
+        if on_erreur is not None:
+            on_erreur(description, erreur)
+        else:
+            print(f"Échec de l'écriture différée ({description}) : {erreur}")
+
+    _ecrivain = EcrivainDiffere(root, on_erreur=echec, executer=_executer_ecriture)
+    return _ecrivain
+
+
+def desactiver_ecriture_differee():
+    """Écrit les modifications en attente puis revient aux écritures synchrones."""
+    global _ecrivain
+    if _ecrivain is not None:
+        ecrivain, _ecrivain = _ecrivain, None
+        ecrivain.arreter()
+
+
+# Enregistrée après celle de db_pool (importé plus haut) : atexit l'exécute donc avant fermer_connexions
+atexit.register(desactiver_ecriture_differee)
+
+
+def _ecrire(operation, description, *args):
+    """False si l'écriture synchrone a échoué : le cache ne doit alors pas être modifié."""
+    if _ecrivain is None:
+        try:
+            _executer_ecriture(lambda c: operation(c, *args))
+        except sqlite3.Error as e:
+            print(f"Une erreur est survenue : {e}")
+            return False
+    else:
+        # Un échec ultérieur du thread d'écriture vide le cache (voir activer_ecriture_differee)
+        _ecrivain.soumettre(lambda c: operation(c, *args), description)
+    return True
+
+
+def _titres_en_cache():
+    global _titres
+    _verifier_generation()
+    if _titres is None:
+        _titres = database.load_titles()
+    return _titres
+
+
+def _points_en_cache(language):
+    _verifier_generation()
+    if not _points:
+        # Premier accès (ou après invalidation) : toutes les langues en une requête groupée
+        _points.update(database.get_all_grammar_points())
+    if language not in _points:
+        _points[language] = database.get_grammar_points(language)
+    return _points[language]
+
+
+def prechauffer():
+    """Charge en mémoire les titres et les points de toutes les langues (au démarrage)."""
+    with _verrou:
+        _titres_en_cache()
+        _verifier_generation()
+        if not _points:
+            _points.update(database.get_all_grammar_points())
+        return sorted(_points)
+
+
+def _index_des_titres():
+    global _index_titres
+    titres = _titres_en_cache()
+    if _index_titres is None:
+        _index_titres = IndexTrigrammes(titres)
+    return _index_titres
+
+
+def _index_des_points(language):
+    points = _points_en_cache(language)
+    if language not in _index_points:
+        _index_points[language] = IndexTrigrammes(points)
+    return _index_points[language]
+
+
+def _index_approche_des_points(language):
+    points = _points_en_cache(language)
+    if language not in _index_approche:
+        _index_approche[language] = IndexApproche(points)
+    return _index_approche[language]
+
+
+def _classement(kind, language):
+    _verifier_generation()
+    cle = (kind, language)
+    if cle not in _classements:
+        _classements[cle] = ClassementUsage(database.get_usages(kind, language))
+    return _classements[cle]
+
+
+def load_titles():
+    with _verrou:
+        return list(_titres_en_cache())
+
+
+def get_grammar_points(language):
+    with _verrou:
+        return list(_points_en_cache(language))
+
+
+def rechercher_titres(texte, limite=None):
+    with _verrou:
+        return _index_des_titres().rechercher(texte, limite)
+
+
+def rechercher_points(language, texte, limite=None):
+    with _verrou:
+        return _index_des_points(language).rechercher(texte, limite)
+
+
+def _classer(index, texte, limite, recherche_fts):
+    # Sous la limite, aucune requête SQL : tous les résultats sont renvoyés
+    with _verrou:
+        trouves = index().rechercher(texte, limite + 1)
+    if len(trouves) <= limite or not (database.fts_actif and texte.strip()):
+        return trouves[:limite]
+    # bm25 ne fait que classer : seuls les éléments que l'index trouve aussi sont gardés
+    # (FTS cherche des préfixes de mots, et ne voit pas les écritures encore en file)
+    classes = recherche_fts(texte, limite)
+    cle = texte.casefold()
+    with _verrou:
+        resultats = [element for element in classes if cle in element.casefold() and element in index()]
+        retenus = set(resultats)
+        for element in index().rechercher(texte, 2 * limite):
+            if len(resultats) >= limite:
+                break
+            if element not in retenus:
+                resultats.append(element)
+    return resultats
+
+
+def rechercher_titres_classes(texte, limite=50):
+    return _classer(_index_des_titres, texte, limite, database.search_titles)
+
+
+def rechercher_points_approches(language, texte, limite=10):
+    with _verrou:
+        return _index_approche_des_points(language).rechercher(texte, limite)
+
+
+def rechercher_points_classes(language, texte, limite=50):
+    resultats = _classer(lambda: _index_des_points(language), texte, limite,
+                         lambda texte, limite: database.search_grammar_points(language, texte, limite))
+    if not resultats and texte.strip():
+        # "subjontif" : proposer "Le subjonctif présent" plutôt que rien (et un quasi-doublon)
+        resultats = rechercher_points_approches(language, texte, limite)
+    return resultats
+
+
+def enregistrer_utilisation(kind, valeur, language=''):
+    """Compte un choix de valeur ; kind vaut 'titre' (language '') ou 'point'."""
+    score = score_choix()
+    with _verrou:
+        if _ecrire(database.record_usage_op, f"usage de '{valeur}'", kind, language, valeur, score):
+            _classement(kind, language).enregistrer(valeur, score)
+
+
+def _oublier_usage(kind, valeur, language=''):
+    # La ligne de 'usages' est supprimée par la même opération que le titre ou le point
+    classement = _classements.get((kind, language))
+    if classement is not None:
+        classement.retirer(valeur)
+
+
+def ordonner_par_usage(kind, elements, language=''):
+    with _verrou:
+        return _classement(kind, language).ordonner(elements)
+
+
+def save_title(title):
+    with _verrou:
+        if not _ecrire(database.save_title_op, f"ajout du titre '{title}'", title):
+            return False
+        titres = _titres_en_cache()
+        if title not in titres:
+            titres.append(title)
+            if _index_titres is not None:
+                _index_titres.ajouter(title)
+        return True
+
+
+def delete_title(title):
+    with _verrou:
+        if not _ecrire(database.delete_title_op, f"suppression du titre '{title}'", title):
+            return False
+        titres = _titres_en_cache()
+        if title in titres:
+            titres.remove(title)
+        if _index_titres is not None:
+            _index_titres.retirer(title)
+        _oublier_usage('titre', title)
+        return True
+
+
+def add_grammar_point(language, point):
+    with _verrou:
+        if not _ecrire(database.add_grammar_point_op, f"ajout du point grammatical '{point}'", language, point):
+            return False
+        points = _points.get(language)
+        if points == database.POINTS_PAR_DEFAUT:
+            # La liste par défaut disparaît dès que la langue a ses propres points. Le cache prend
+            # tout de suite la valeur que la base aura : l'écriture peut être encore en file, une
+            # relecture de la base à ce moment renverrait la liste par défaut, sans le nouveau point.
+            points.clear()
+            _index_points.pop(language, None)
+            _index_approche.pop(language, None)
+        if points is not None and point not in points:
+            points.append(point)
+            if language in _index_points:
+                _index_points[language].ajouter(point)
+            if language in _index_approche:
+                _index_approche[language].ajouter(point)
+        return True
+
+
+def remove_grammar_point(language, point):
+    with _verrou:
+        if not _ecrire(database.remove_grammar_point_op, f"suppression du point grammatical '{point}'",
+                       language, point):
+            return False
+        _oublier_usage('point', point, language)
+        points = _points.get(language)
+        if points is not None:
+            while point in points:
+                points.remove(point)
+            if language in _index_points:
+                _index_points[language].retirer(point)
+            if language in _index_approche:
+                _index_approche[language].retirer(point)
+            if not points:
+                # database.py renverra la liste par défaut (même raison que dans add_grammar_point)
+                points.extend(database.POINTS_PAR_DEFAUT)
+                _index_points.pop(language, None)
+                _index_approche.pop(language, None)
+        return True
+
+
+def save_lesson(lecon):
+    """Enregistre une séance dans l'historique (par le thread d'écriture s'il est actif)."""
+    _ecrire(database.save_lesson_op, f"enregistrement de la séance '{lecon.get('titre', '')}'", lecon)
+
+
+def ecritures_en_attente():
+    """Vrai si des écritures différées ne sont pas encore en base (à sonder avant de relire l'historique)."""
+    return _ecrivain is not None and _ecrivain.occupe()
@@ -0,0 +1,245 @@
+"""
+catalog_model.py
+
+Ce module fournit un modèle observable unique pour les titres et les points grammaticaux affichés
+dans l'interface de l'application "Cahier de textes portable".
+
+Avant, chaque ajout ou suppression retriait toute la liste puis reconstruisait chaque Listbox et
+Combobox enregistrée, et gui.py comme utils.py tenaient chacun leur propre liste de widgets.
+Désormais :
+- ModeleCatalogue garde les éléments triés (ordre alphabétique sans tenir compte de la casse)
+  grâce à bisect, et envoie à ses abonnés des différences précises : insertion à l'index i,
+  suppression à l'index i, ou réinitialisation complète ;
+- AbonneWidget applique ces différences à une Listbox / ListeVirtuelle (une seule insertion ou
+  suppression de ligne) ou à une Combobox ;
+- les fonctions ajouter_titre, retirer_titre, ajouter_point et retirer_point écrivent via
+  catalog_cache puis mettent le modèle à jour : c'est le seul chemin utilisé par gui.py et utils.py ;
+- choisir_titre et choisir_point comptent un choix de l'utilisateur (catalog_cache.enregistrer_utilisation) ;
+  une Combobox abonnée avec ordonner=par_usage(...) présente alors les plus utilisés en tête.
+
+Les modèles ne doivent être modifiés que depuis le thread Tk, puisque les abonnés touchent aux widgets.
+C'est pourquoi surveiller sonde catalog_cache depuis la boucle Tk (root.after) : quand le cache a été
+vidé (écriture d'un autre processus, échec d'une écriture différée, bouton Rafraîchir), synchroniser
+recharge les modèles concernés et réinitialise leurs widgets.
+"""
+
+from bisect import bisect_left
+import tkinter as tk
+from tkinter import ttk
+
+import catalog_cache
+
+
+INTERVALLE_SYNCHRONISATION_MS = 2000
+
+
+def _cle(element):
+    return (element.casefold(), element)
+
+
+class ModeleCatalogue:
+    def __init__(self, source):
+        self._source = source
+        self._elements = None
+        self._cles = None
+        self._abonnes = []
+        self.generation = None
+
+    def _charger(self):
+        if self._elements is None:
+            self.generation = catalog_cache.generation
+            # Seul tri du catalogue : la base le renvoie sans ORDER BY
+            self._elements = sorted(set(self._source()), key=_cle)
+            self._cles = [_cle(element) for element in self._elements]
+
+    @property
+    def elements(self):
+        self._charger()
+        return self._elements
+
+    def __len__(self):
+        return len(self.elements)
+
+    def __iter__(self):
+        return iter(self.elements)
+
+    def __contains__(self, element):
+        return self.index(element) is not None
+
+    def index(self, element):
+        self._charger()
+        cle = _cle(element)
+        position = bisect_left(self._cles, cle)
+        if position < len(self._cles) and self._cles[position] == cle:
+            return position
+        return None
+
+    def abonner(self, abonne):
+        self._abonnes.append(abonne)
+        return abonne
+
+    def desabonner(self, abonne):
+        if abonne in self._abonnes:
+            self._abonnes.remove(abonne)
+
+    def ajouter(self, element):
+        self._charger()
+        cle = _cle(element)
+        position = bisect_left(self._cles, cle)
+        if position < len(self._cles) and self._cles[position] == cle:
+            return None
+        self._cles.insert(position, cle)
+        self._elements.insert(position, element)
+        for abonne in list(self._abonnes):
+            abonne.inserer(position, element)
+        return position
+
+    def retirer(self, element):
+        position = self.index(element)
+        if position is None:
+            return None
+        del self._cles[position]
+        del self._elements[position]
+        for abonne in list(self._abonnes):
+            abonne.supprimer(position, element)
+        return position
+
+    def recharger(self):
+        """Relit la source (après une modification externe de la base) et réinitialise les abonnés."""
+        self._elements = None
+        self._charger()
+        for abonne in list(self._abonnes):
+            abonne.reinitialiser(self._elements)
+
+
+class AbonneWidget:
+    """Répercute les différences d'un modèle sur une Listbox, une ListeVirtuelle ou une Combobox.
+
+    Si est_filtre() est vrai, le widget affiche un sous-ensemble : les positions du modèle ne
+    correspondent plus aux lignes, on relance alors refiltrer() au lieu d'appliquer la différence.
+    """
+
+    def __init__(self, modele, widget, est_filtre=None, refiltrer=None, ordonner=None):
+        self.modele = modele
+        self.widget = widget
+        self.est_filtre = est_filtre
+        self.refiltrer = refiltrer
+        self.ordonner = ordonner
+
+    def _valeurs(self, elements):
+        return elements if self.ordonner is None else self.ordonner(elements)
+
+    def _filtre(self):
+        if self.est_filtre is not None and self.est_filtre():
+            if self.refiltrer is not None:
+                self.refiltrer()
+            return True
+        return False
+
+    def inserer(self, index, element):
+        if self._filtre():
+            return
+        if isinstance(self.widget, ttk.Combobox):
+            # Une Combobox n'a pas d'insertion ligne à ligne : on lui passe la liste déjà triée
+            self.widget.configure(values=self._valeurs(self.modele.elements))
+        else:
+            self.widget.insert(index, element)
+
+    def supprimer(self, index, element):
+        if self._filtre():
+            return
+        if isinstance(self.widget, ttk.Combobox):
+            self.widget.configure(values=self._valeurs(self.modele.elements))
+        else:
+            self.widget.delete(index)
+
+    def reinitialiser(self, elements):
+        if self._filtre():
+            return
+        if isinstance(self.widget, ttk.Combobox):
+            self.widget.configure(values=self._valeurs(elements))
+        elif hasattr(self.widget, 'set_elements'):
+            self.widget.set_elements(elements)
+        else:
+            self.widget.delete(0, tk.END)
+            self.widget.insert(tk.END, *elements)
+
+
+titres = ModeleCatalogue(catalog_cache.load_titles)
+_modeles_points = {}
+
+
+def modele_points(language):
+    if language not in _modeles_points:
+        _modeles_points[language] = ModeleCatalogue(lambda: catalog_cache.get_grammar_points(language))
+    return _modeles_points[language]
+
+
+def ajouter_titre(titre):
+    # Un titre déjà présent dans le modèle est déjà en base (ou en file d'écriture)
+    if titre in titres:
+        return None
+    # Écriture refusée par la base : les widgets ne montrent pas un titre qui n'existe pas
+    if not catalog_cache.save_title(titre):
+        return None
+    return titres.ajouter(titre)
+
+
+def retirer_titre(titre):
+    if not catalog_cache.delete_title(titre):
+        return None
+    return titres.retirer(titre)
+
+
+def ajouter_point(language, point):
+    modele = modele_points(language)
+    if point in modele:
+        return None
+    if not catalog_cache.add_grammar_point(language, point):
+        return None
+    if len(modele) + 1 != len(catalog_cache.get_grammar_points(language)):
+        # La liste par défaut a été remplacée par le seul nouveau point
+        modele.recharger()
+        return modele.index(point)
+    return modele.ajouter(point)
+
+
+def retirer_point(language, point):
+    modele = modele_points(language)
+    if not catalog_cache.remove_grammar_point(language, point):
+        return None
+    position = modele.retirer(point)
+    if len(modele) != len(catalog_cache.get_grammar_points(language)):
+        # Dernier point retiré : la langue revient à la liste par défaut
+        modele.recharger()
+    return position
+
+
+def choisir_titre(titre):
+    catalog_cache.enregistrer_utilisation('titre', titre)
+
+
+def choisir_point(language, point):
+    catalog_cache.enregistrer_utilisation('point', point, language)
+
+
+def par_usage(kind, language=''):
+    """Fonction qui ordonne une liste d'éléments par usage décroissant (paramètre ordonner d'AbonneWidget)."""
+    return lambda elements: catalog_cache.ordonner_par_usage(kind, elements, language)
+
+
+def synchroniser():
+    """Recharge les modèles si un autre processus a modifié la base depuis leur chargement."""
+    for modele in [titres, *_modeles_points.values()]:
+        if modele.generation is not None and modele.generation != catalog_cache.generation:
+            modele.recharger()
+
+
+def surveiller(root):
+    """Appelle synchroniser toutes les INTERVALLE_SYNCHRONISATION_MS millisecondes (thread Tk)."""
+    def sonder():
+        root.after(INTERVALLE_SYNCHRONISATION_MS, sonder)
+        catalog_cache.verifier_modifications()
+        synchroniser()
+
+    root.after(INTERVALLE_SYNCHRONISATION_MS, sonder)
@@ -0,0 +1,105 @@
+"""
+classement.py
+
+Ce module classe les titres et les points grammaticaux de l'application "Cahier de textes portable"
+selon la fréquence à laquelle l'utilisateur les choisit, avec un oubli progressif.
+
+Les suggestions des listes déroulantes suivaient l'ordre alphabétique : les points les plus
+utilisés se perdaient parmi la centaine de points d'une langue. Chaque choix (valider_objectif,
+ajout d'un titre) compte désormais pour 1, et ce poids diminue de moitié tous les DEMI_VIE_JOURS.
+
+Score en espace logarithmique : au lieu de diminuer tous les scores à chaque instant, chaque
+choix à l'instant t ajoute exp(TAUX * t) et l'on conserve score = log(somme des exp(TAUX * t_i)).
+L'ordre des scores ne dépend donc pas du moment où on les compare : un choix ne modifie qu'une
+seule entrée, sans jamais recalculer les autres. Le poids actuel d'un élément est
+exp(score - TAUX * maintenant) (voir ClassementUsage.frequence).
+
+ClassementUsage garde les éléments déjà choisis dans une liste triée par score décroissant,
+mise à jour par bisect à chaque choix : top(k) est une simple tranche, et ordonner ne trie que
+les résultats d'une recherche (au plus quelques dizaines), jamais tout le catalogue.
+
+Classe principale :
+- ClassementUsage : enregistrer, retirer, top, ordonner, frequence.
+
+Fonctions :
+- score_choix : Score d'un choix unique fait à un instant donné.
+- somme_log : log(exp(a) + exp(b)) sans dépassement de capacité.
+"""
+
+import math
+import time
+from bisect import bisect_left, insort
+
+DEMI_VIE_JOURS = 30
+# Décroissance par seconde : le poids d'un choix est divisé par 2 tous les DEMI_VIE_JOURS
+TAUX = math.log(2) / (DEMI_VIE_JOURS * 86400)
+
+
+def score_choix(instant=None):
+    return TAUX * (time.time() if instant is None else instant)
+
+
+def somme_log(a, b):
+    """log(exp(a) + exp(b)) ; exp(a) seul dépasserait la capacité d'un flottant."""
+    if a < b:
+        a, b = b, a
+    return a + math.log1p(math.exp(b - a))
+
+
+class ClassementUsage:
+    def __init__(self, scores=()):
+        self._scores = {}   # élément -> score
+        self._ordre = []    # (-score, élément), trié : les plus utilisés d'abord
+        for element, score in scores:
+            self._scores[element] = score
+            self._ordre.append((-score, element))
+        self._ordre.sort()
+
+    def __len__(self):
+        return len(self._scores)
+
+    def __contains__(self, element):
+        return element in self._scores
+
+    def _retirer_de_l_ordre(self, element):
+        ancien = (-self._scores[element], element)
+        del self._ordre[bisect_left(self._ordre, ancien)]
+
+    def enregistrer(self, element, score=None):
+        """Ajoute un choix de element (score_choix() par défaut) ; renvoie son nouveau score."""
+        if score is None:
+            score = score_choix()
+        if element in self._scores:
+            self._retirer_de_l_ordre(element)
+            score = somme_log(self._scores[element], score)
+        self._scores[element] = score
+        insort(self._ordre, (-score, element))
+        return score
+
+    def retirer(self, element):
+        if element in self._scores:
+            self._retirer_de_l_ordre(element)
+            del self._scores[element]
+
+    def top(self, k):
+        return [element for _, element in self._ordre[:k]]
+
+    def frequence(self, element, instant=None):
+        """Nombre de choix de element, chacun pondéré par son ancienneté (0 s'il n'a jamais été choisi)."""
+        if element not in self._scores:
+            return 0.0
+        return math.exp(self._scores[element] - score_choix(instant))
+
+    def ordonner(self, elements):
+        """Les éléments déjà choisis d'abord (les plus utilisés en tête), puis les autres dans leur ordre."""
+        scores = self._scores
+        if not scores:
+            return list(elements)
+        if len(elements) <= len(scores):
+            # Résultats d'une recherche : seuls ces quelques éléments sont triés
+            choisis = sorted((e for e in elements if e in scores), key=lambda e: (-scores[e], e))
+        else:
+            # Catalogue entier : parcours de la liste déjà triée, sans nouveau tri
+            presents = set(elements)
+            choisis = [element for _, element in self._ordre if element in presents]
+        return choisis + [e for e in elements if e not in scores]
@@ -8,12 +8,16 @@ les points grammaticaux et les titres de documents.
 Fonctions principales :
 
 1. Initialisation et gestion de la base de données :
-   - init_database : Initialise la base de données, crée les tables nécessaires et insère les données par défaut.
+   - init_database : Applique les migrations manquantes (création des tables, données par défaut,
+     index), puis prépare la recherche FTS5.
+   - schema_version : Renvoie la version du schéma enregistrée dans la table 'schema_version'.
    - db_operation : Fonction utilitaire pour exécuter des opérations sur la base de données avec gestion des erreurs.
 
 2. Gestion des points grammaticaux :
    - add_grammar_point : Ajoute un point grammatical à la base de données pour une langue donnée.
    - get_grammar_points : Récupère tous les points grammaticaux pour une langue donnée.
+   - get_all_grammar_points : Récupère les points de toutes les langues en une seule requête groupée.
+   - language_id : Identifiant d'une langue (mis en cache : plus de jointure sur 'languages').
    - remove_grammar_point : Supprime un point grammatical de la base de données.
 
 3. Gestion des titres de documents :
@@ -21,190 +25,633 @@ Fonctions principales :
    - save_title : Enregistre un nouveau titre dans la base de données.
    - delete_title : Supprime un titre de la base de données.
 
+4. Historique des séances :
+   - save_lesson : Enregistre une séance générée (classe, date, langue, axe, titre, texte, points).
+   - get_lessons_page : Renvoie une page de séances (pagination par clé (date, id), filtres classe/langue).
+   - get_lesson : Renvoie une séance complète avec ses points grammaticaux.
+   - get_lesson_classes : Liste des classes présentes dans l'historique.
+   - delete_lesson : Supprime une séance.
+
+5. Modèles de sortie (voir templates.py) :
+   - get_template / list_templates : Lecture des modèles enregistrés par nom, langue et format.
+   - save_template / delete_template : Enregistre ou supprime un modèle.
+
+6. Fréquence d'utilisation (voir classement.py) :
+   - record_usage : Ajoute un choix de titre ou de point grammatical à son score d'usage
+     (supprimé avec le titre ou le point par delete_title et remove_grammar_point).
+   - get_usages : Scores d'usage d'un type d'élément (et d'une langue).
+
+7. Recherche classée (FTS5, optionnelle) :
+   - init_fts : Crée les tables virtuelles FTS5 et les triggers de synchronisation.
+   - search_titles : Renvoie les N meilleurs titres pour une saisie (classement bm25).
+   - search_grammar_points : Idem pour les points grammaticaux d'une langue.
+
+Les connexions sont fournies par le module db_pool : une connexion longue durée par thread,
+avec cache de requêtes préparées et PRAGMA configurables, au lieu d'une ouverture par appel.
+
 Ce module est conçu pour être importé et utilisé par d'autres composants de l'application,
 fournissant une interface entre l'application et la base de données SQLite.
 
-La base de données contient trois tables principales :
+La base de données contient les tables principales :
 - 'languages' : stocke les langues disponibles
 - 'grammar_points' : stocke les points grammaticaux associés à chaque langue
 - 'titles' : stocke les titres des documents
+- 'lessons' et 'lesson_grammar_points' : historique des séances générées (migration 3)
+- 'templates' : modèles de texte final et de trace écrite par langue et format d'établissement (migration 4)
+- 'usages' : score d'usage (avec oubli progressif) des titres et points choisis (migration 5)
+
+Le schéma est versionné : la table 'schema_version' contient le numéro de la dernière migration
+appliquée et MIGRATIONS liste les migrations dans l'ordre. Chaque migration s'exécute dans sa propre
+transaction. Lorsque la base est à jour, init_database ne fait aucune écriture. La migration 2
+supprime les points grammaticaux en double et ajoute un index UNIQUE sur (language_id, point).
+load_titles et get_grammar_points n'ont pas d'ORDER BY : l'ordre d'affichage (casefold, accents
+compris) est calculé par catalog_model, qu'aucune collation intégrée de SQLite ne reproduit
+(NOCASE ne replie que l'ASCII). Un tri en SQL serait refait ensuite, et un index dans cet ordre
+coûterait une mise à jour de plus à chaque écriture.
+Le script tools/verifier_plans.py vérifie le plan d'exécution de chaque requête de ce module.
+
+Si FTS5 est disponible et ACTIVER_FTS vaut True, les tables virtuelles 'titles_fts' et
+'grammar_points_fts' reflètent 'titles' et 'grammar_points' (tables à contenu externe,
+maintenues par des triggers). Attention : les triggers sont stockés dans le fichier de la
+base ; toute version de SQLite qui écrit ensuite dans ces tables doit donc connaître FTS5.
+Sans FTS5, les fonctions de recherche se replient sur un LIKE limité à N lignes.
 
 Note : La fonction get_grammar_points renvoie une liste par défaut de points grammaticaux
 si aucun n'est trouvé dans la base de données pour la langue spécifiée.
 """
 
 
+import re
 import sqlite3
+import db_pool
+from classement import somme_log
+from db_pool import get_connection
 
-def init_database():
-    conn = sqlite3.connect('language_app.db')
-    c = conn.cursor()
+# Recherche plein texte FTS5 (optionnelle) : sert seulement à classer les résultats de
+# l'index de trigrammes de catalog_cache quand ils dépassent la limite demandée
+ACTIVER_FTS = False
+fts_actif = False
 
-    try:
-        # Création des tables
-        c.execute('''CREATE TABLE IF NOT EXISTS languages
-                     (id INTEGER PRIMARY KEY, name TEXT UNIQUE NOT NULL)''')
-        c.execute('''CREATE TABLE IF NOT EXISTS grammar_points
-                     (id INTEGER PRIMARY KEY, language_id INTEGER,
-                     point TEXT NOT NULL,
-                     FOREIGN KEY (language_id) REFERENCES languages(id))''')
+# Liste renvoyée par get_grammar_points quand une langue n'a aucun point en base
+POINTS_PAR_DEFAUT = [
+    "Le présent de l'indicatif", "Le passé composé", "L'imparfait",
+    "Le futur simple", "Le conditionnel présent", "Le subjonctif présent",
+    "Les articles définis et indéfinis", "Les adjectifs qualificatifs",
+    "Les pronoms personnels", "La négation", "L'interrogation"
+]
+
+# Lectures de tout le catalogue, sans tri (voir catalog_model pour l'ordre d'affichage)
+SQL_TITRES = "SELECT title FROM titles"
+SQL_POINTS_LANGUE = "SELECT point FROM grammar_points WHERE language_id=?"
+SQL_POINTS_TOUTES_LANGUES = """SELECT languages.id, languages.name, grammar_points.point FROM languages
+                               LEFT JOIN grammar_points ON grammar_points.language_id = languages.id"""
+
+# Identifiants des langues par (chemin de la base, nom) : la table 'languages' ne change pas
+_ids_langues = {}
 
-       # Insertion des langues par défaut
-        languages = ['Espagnol', 'Italien', 'Anglais', 'Allemand']
-        for lang in languages:
-            c.execute("INSERT OR IGNORE INTO languages (name) VALUES (?)", (lang,))
+def language_id(language, c=None):
+    cle = (db_pool.DB_PATH, language)
+    if cle not in _ids_langues:
+        curseur = c if c is not None else get_connection().cursor()
+        curseur.execute("SELECT id FROM languages WHERE name=?", (language,))
+        row = curseur.fetchone()
+        if row is None:
+            return None
+        _ids_langues[cle] = row[0]
+    return _ids_langues[cle]
+
+def _migration_1_tables_initiales(c):
+    # Création des tables
+    c.execute('''CREATE TABLE IF NOT EXISTS languages
+                 (id INTEGER PRIMARY KEY, name TEXT UNIQUE NOT NULL)''')
+    c.execute('''CREATE TABLE IF NOT EXISTS grammar_points
+                 (id INTEGER PRIMARY KEY, language_id INTEGER,
+                 point TEXT NOT NULL,
+                 FOREIGN KEY (language_id) REFERENCES languages(id))''')
+
+    # Insertion des langues par défaut
+    languages = ['Espagnol', 'Italien', 'Anglais', 'Allemand']
+    for lang in languages:
+        c.execute("INSERT OR IGNORE INTO languages (name) VALUES (?)", (lang,))
 
        
-        # Nouvelle table pour les titres
-        c.execute('''CREATE TABLE IF NOT EXISTS titles
-                     (id INTEGER PRIMARY KEY, title TEXT UNIQUE NOT NULL)''')
-
-
-
-        # Initialisation des points grammaticaux pour l'espagnol
-        c.execute("SELECT id FROM languages WHERE name='Espagnol'")
-        espagnol_id = c.fetchone()[0]
-
-        points_grammaticaux = [
-            "La phrase affirmative", "La phrase exclamative", "La phrase interrogative", "La phrase négative", "Les chiffres",
-        "Le verbe être : ser ou estar", "Avoir : tener et haber", "Il y a : hay, está et hace", "L'apocope",
-        "L'alphabet et les règles d'orthographes", "L'accent et la ponctuation", "L'accentuation", "Le genre des noms",
-        "Le genre des adjectifs", "Le pluriel des noms", "Les noms composés", "L'article défini", "L'article indéfini",
-        "L'article neutre : lo", "L'enclise", "Les auxiliaires : haber, ser et estar", "Exprimer l'accord et le désaccord",
-        "Exprimer l'obligation (personnelle et impersonnelle)", "Exprimer l'habitude : soler", "Exprimer la quantité",
-        "Exprimer l'insistance", "Exprimer le souhait et le regret", "Exprimer les goûts (avec gustar)", "Exprimer l'hypothèse",
-        "Les tournures affectives", "L'impératif affirmatif", "L'impératif négatif", "La concordance des temps",
-        "Les conjonctions (de coordination et de subordination)", "La date et l'heure", "Les comparatifs (de supériorité, infériorité et égalité)",
-        "Les superlatifs", "Le style indirect", "Le sujet indéfini 'on'", "Les adjectifs indéfinis (Alguno, Ninguno, Cada, Mismo…)",
-        "Les adjectifs démonstratifs", "Les adjectifs possessifs", "Les adjectifs qualificatifs", "Les adverbes d'affirmation, de négation et de doute",
-        "Les adverbes de lieu", "Les adverbes de manière", "Les adverbes de quantité", "Les adverbes de temps",
-        "Diphtongues et modifications orthographiques sur les consonnes et voyelles", "Diphtongaison et modifications orthographiques",
-        "Les nombres cardinaux", "Les nombres ordinaux et les calculs", "Les prépositions", "Les pronoms démonstratifs",
-        "Les pronoms indéfinis", "Les pronoms interrogatifs", "Les pronoms personnels compléments", "Les pronoms personnels sujets",
-        "Les pronoms possessifs", "Les pronoms réfléchis", "Les pronoms relatifs", "Préfixes et suffixes en espagnol",
-        "Qué ou cuál?", "Por ou para ?", "Les diminutifs", "Bien, bueno ou buen ?", "Por qué, porque, por que et porqué : quelle différence ?",
-        "Tú ou Usted (tutoiement et vouvoiement)", "También ou Tampoco ?", "Pedir ou Preguntar ?", "Tomar, llevar ou Traer",
-        "La substantivation de l'infinitif (el+ infinitif)", "L'expression de la simultanéité (mientras, gérondif, al+ infinitif)",
-        "L'aspect de l'action", "Ser ou estar?", "L'obligation personnelle et l'obligation impersonnelle", "Le présent de l'indicatif (verbes réguliers)",
-        "Le présent de l'indicatif (verbes en -acer, -ecer, -ocer, -ucir)", "Le présent de l'indicatif (verbes en -go)",
-        "Le présent de l'indicatif : verbes à diphtongue", "Le présent de l'indicatif : verbes à affaiblissement",
-        "Le présent de l'indicatif : verbes irréguliers", "Les verbes pronominaux", "Le gérondif", "L'impératif affirmatif",
-        "L'impératif négatif", "Le participe passé", "La forme progressive", "La tournure affective : gustar", "Le futur simple",
-        "Le futur proche", "Le conditionnel", "Le passé composé", "Le plus que parfait", "L'imparfait de l'indicatif",
-        "Le passé simple", "Le passé simple : formation", "Alternance du passé simple et de l'imparfait", "Le subjonctif présent : formation",
-        "Le subjonctif après les verbes de volonté et de souhait", "Le subjonctif après : para que", "Le subjonctif après les verbes de pensée à la forme négative",
-        "Le subjonctif après les verbes d'émotion", "Le subjonctif après : ser + adjectif + que", "Le subjonctif après : ojalá que",
-        "Le subjonctif après : es una pena que et es una lástima que", "Le subjonctif après les verbes d'interdiction et de permission",
-        "Le subjonctif après les verbes de prière", "Le subjonctif après les verbes de conseil", "Le subjonctif après : Cuando + éventualité future",
-        "Le subjonctif après : puede que ou es posible que ou similaires", "Le subjonctif après le verbe Esperar", "Le subjonctif imparfait pour exprimer l'hypothèse",
-        "Le subjonctif imparfait après : como si", "L'expression de l'hypothèse", "La préposition A devant COD", "La préposition A après les verbes de mouvement",
-        "La préposition EN", "La préposition DE", "La traduction de « on »", "Les traductions de \"devenir\"", "Les prépositions",
-        "Les comparatifs et les superlatifs", "Les comparatifs.", "Le comparatif d'égalité.", "Le comparatif de supériorité.",
-        "Le comparatif d'infériorité.", "Les superlatifs..", "Le superlatif relatif.", "Le superlatif absolu.", "La voix passive.",
-        "La traduction de \"dont\""
-        ]
-
-        for point in points_grammaticaux:
-            c.execute("INSERT OR IGNORE INTO grammar_points (language_id, point) VALUES (?, ?)", (espagnol_id, point))
+    # Nouvelle table pour les titres
+    c.execute('''CREATE TABLE IF NOT EXISTS titles
+                 (id INTEGER PRIMARY KEY, title TEXT UNIQUE NOT NULL)''')
 
-        conn.commit()
+
+
+    # Initialisation des points grammaticaux pour l'espagnol
+    c.execute("SELECT id FROM languages WHERE name='Espagnol'")
+    espagnol_id = c.fetchone()[0]
+
+    points_grammaticaux = [
+        "La phrase affirmative", "La phrase exclamative", "La phrase interrogative", "La phrase négative", "Les chiffres",
+    "Le verbe être : ser ou estar", "Avoir : tener et haber", "Il y a : hay, está et hace", "L'apocope",
+    "L'alphabet et les règles d'orthographes", "L'accent et la ponctuation", "L'accentuation", "Le genre des noms",
+    "Le genre des adjectifs", "Le pluriel des noms", "Les noms composés", "L'article défini", "L'article indéfini",
+    "L'article neutre : lo", "L'enclise", "Les auxiliaires : haber, ser et estar", "Exprimer l'accord et le désaccord",
+    "Exprimer l'obligation (personnelle et impersonnelle)", "Exprimer l'habitude : soler", "Exprimer la quantité",
+    "Exprimer l'insistance", "Exprimer le souhait et le regret", "Exprimer les goûts (avec gustar)", "Exprimer l'hypothèse",
+    "Les tournures affectives", "L'impératif affirmatif", "L'impératif négatif", "La concordance des temps",
+    "Les conjonctions (de coordination et de subordination)", "La date et l'heure", "Les comparatifs (de supériorité, infériorité et égalité)",
+    "Les superlatifs", "Le style indirect", "Le sujet indéfini 'on'", "Les adjectifs indéfinis (Alguno, Ninguno, Cada, Mismo…)",
+    "Les adjectifs démonstratifs", "Les adjectifs possessifs", "Les adjectifs qualificatifs", "Les adverbes d'affirmation, de négation et de doute",
+    "Les adverbes de lieu", "Les adverbes de manière", "Les adverbes de quantité", "Les adverbes de temps",
+    "Diphtongues et modifications orthographiques sur les consonnes et voyelles", "Diphtongaison et modifications orthographiques",
+    "Les nombres cardinaux", "Les nombres ordinaux et les calculs", "Les prépositions", "Les pronoms démonstratifs",
+    "Les pronoms indéfinis", "Les pronoms interrogatifs", "Les pronoms personnels compléments", "Les pronoms personnels sujets",
+    "Les pronoms possessifs", "Les pronoms réfléchis", "Les pronoms relatifs", "Préfixes et suffixes en espagnol",
+    "Qué ou cuál?", "Por ou para ?", "Les diminutifs", "Bien, bueno ou buen ?", "Por qué, porque, por que et porqué : quelle différence ?",
+    "Tú ou Usted (tutoiement et vouvoiement)", "También ou Tampoco ?", "Pedir ou Preguntar ?", "Tomar, llevar ou Traer",
+    "La substantivation de l'infinitif (el+ infinitif)", "L'expression de la simultanéité (mientras, gérondif, al+ infinitif)",
+    "L'aspect de l'action", "Ser ou estar?", "L'obligation personnelle et l'obligation impersonnelle", "Le présent de l'indicatif (verbes réguliers)",
+    "Le présent de l'indicatif (verbes en -acer, -ecer, -ocer, -ucir)", "Le présent de l'indicatif (verbes en -go)",
+    "Le présent de l'indicatif : verbes à diphtongue", "Le présent de l'indicatif : verbes à affaiblissement",
+    "Le présent de l'indicatif : verbes irréguliers", "Les verbes pronominaux", "Le gérondif", "L'impératif affirmatif",
+    "L'impératif négatif", "Le participe passé", "La forme progressive", "La tournure affective : gustar", "Le futur simple",
+    "Le futur proche", "Le conditionnel", "Le passé composé", "Le plus que parfait", "L'imparfait de l'indicatif",
+    "Le passé simple", "Le passé simple : formation", "Alternance du passé simple et de l'imparfait", "Le subjonctif présent : formation",
+    "Le subjonctif après les verbes de volonté et de souhait", "Le subjonctif après : para que", "Le subjonctif après les verbes de pensée à la forme négative",
+    "Le subjonctif après les verbes d'émotion", "Le subjonctif après : ser + adjectif + que", "Le subjonctif après : ojalá que",
+    "Le subjonctif après : es una pena que et es una lástima que", "Le subjonctif après les verbes d'interdiction et de permission",
+    "Le subjonctif après les verbes de prière", "Le subjonctif après les verbes de conseil", "Le subjonctif après : Cuando + éventualité future",
+    "Le subjonctif après : puede que ou es posible que ou similaires", "Le subjonctif après le verbe Esperar", "Le subjonctif imparfait pour exprimer l'hypothèse",
+    "Le subjonctif imparfait après : como si", "L'expression de l'hypothèse", "La préposition A devant COD", "La préposition A après les verbes de mouvement",
+    "La préposition EN", "La préposition DE", "La traduction de « on »", "Les traductions de \"devenir\"", "Les prépositions",
+    "Les comparatifs et les superlatifs", "Les comparatifs.", "Le comparatif d'égalité.", "Le comparatif de supériorité.",
+    "Le comparatif d'infériorité.", "Les superlatifs..", "Le superlatif relatif.", "Le superlatif absolu.", "La voix passive.",
+    "La traduction de \"dont\""
+    ]
+
+    # Une base créée par une ancienne version contient déjà ces points : pas de doublon
+    for point in points_grammaticaux:
+        c.execute("""INSERT INTO grammar_points (language_id, point)
+                     SELECT ?, ? WHERE NOT EXISTS
+                     (SELECT 1 FROM grammar_points WHERE language_id=? AND point=?)""",
+                  (espagnol_id, point, espagnol_id, point))
+
+def _migration_2_points_uniques(c):
+    # Les anciennes versions réinséraient les points espagnols à chaque démarrage
+    c.execute("""DELETE FROM grammar_points WHERE id NOT IN
+                 (SELECT MIN(id) FROM grammar_points GROUP BY language_id, point)""")
+    c.execute("""CREATE UNIQUE INDEX IF NOT EXISTS idx_grammar_points_language_point
+                 ON grammar_points (language_id, point)""")
+
+def _migration_3_historique_lecons(c):
+    # Historique des séances générées ; les points sont copiés en texte pour survivre
+    # à la suppression d'un point de la bibliothèque.
+    c.execute('''CREATE TABLE IF NOT EXISTS lessons
+                 (id INTEGER PRIMARY KEY, classe TEXT NOT NULL DEFAULT '',
+                 date TEXT NOT NULL, language_id INTEGER, axe TEXT NOT NULL DEFAULT '',
+                 titre TEXT NOT NULL DEFAULT '', texte TEXT NOT NULL,
+                 FOREIGN KEY (language_id) REFERENCES languages(id))''')
+    c.execute('''CREATE TABLE IF NOT EXISTS lesson_grammar_points
+                 (lesson_id INTEGER NOT NULL, point TEXT NOT NULL,
+                 PRIMARY KEY (lesson_id, point),
+                 FOREIGN KEY (lesson_id) REFERENCES lessons(id) ON DELETE CASCADE) WITHOUT ROWID''')
+    # Index composites alignés sur la pagination par clé (date, id) décroissante
+    c.execute("CREATE INDEX IF NOT EXISTS idx_lessons_date ON lessons (date DESC, id DESC)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_lessons_classe_date ON lessons (classe, date DESC, id DESC)")
+    c.execute("""CREATE INDEX IF NOT EXISTS idx_lessons_language_date
+                 ON lessons (language_id, date DESC, id DESC)""")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_lesson_grammar_points_point ON lesson_grammar_points (point, lesson_id)")
+
+def _migration_4_modeles(c):
+    # Modèles de sortie ; language = '' s'applique à toutes les langues
+    c.execute('''CREATE TABLE IF NOT EXISTS templates
+                 (name TEXT NOT NULL, language TEXT NOT NULL DEFAULT '',
+                 format TEXT NOT NULL DEFAULT 'standard', content TEXT NOT NULL,
+                 PRIMARY KEY (name, language, format)) WITHOUT ROWID''')
+
+def _migration_5_usages(c):
+    # kind : 'titre' ou 'point' ; language = '' pour les titres. score : voir classement.py
+    c.execute('''CREATE TABLE IF NOT EXISTS usages
+                 (kind TEXT NOT NULL, language TEXT NOT NULL DEFAULT '', value TEXT NOT NULL,
+                 score REAL NOT NULL, PRIMARY KEY (kind, language, value)) WITHOUT ROWID''')
+
+# Migrations ordonnées : (version atteinte, fonction). Ne jamais modifier une migration
+# déjà publiée ; ajouter une nouvelle entrée à la fin de la liste.
+MIGRATIONS = [
+    (1, _migration_1_tables_initiales),
+    (2, _migration_2_points_uniques),
+    (3, _migration_3_historique_lecons),
+    (4, _migration_4_modeles),
+    (5, _migration_5_usages),
+]
+
+def schema_version(c):
+    try:
+        c.execute("SELECT version FROM schema_version")
+    except sqlite3.OperationalError:
+        return 0
+    row = c.fetchone()
+    return row[0] if row else 0
+
+def init_database():
+    conn = get_connection()
+    c = conn.cursor()
+
+    try:
+        version = schema_version(c)
+        # Cas courant : schéma à jour, aucune écriture au démarrage
+        for numero, migration in MIGRATIONS:
+            if numero <= version:
+                continue
+            # Verrou d'écriture pris d'emblée ; un autre processus a pu migrer entre-temps
+            c.execute("BEGIN IMMEDIATE")
+            version = schema_version(c)
+            if numero <= version:
+                conn.commit()
+                continue
+            c.execute("CREATE TABLE IF NOT EXISTS schema_version (version INTEGER NOT NULL)")
+            migration(c)
+            c.execute("DELETE FROM schema_version")
+            c.execute("INSERT INTO schema_version (version) VALUES (?)", (numero,))
+            conn.commit()
+            version = numero
     except sqlite3.Error as e:
         print(f"Une erreur est survenue : {e}")
         conn.rollback()
     finally:
-        conn.close()
+        c.close()
 
-def db_operation(operation):
-    conn = sqlite3.connect('language_app.db')
+    if ACTIVER_FTS:
+        init_fts()
+
+def fts5_disponible():
+    conn = get_connection()
+    if conn.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')").fetchone()[0]:
+        return True
+    try:
+        conn.execute("CREATE VIRTUAL TABLE temp.test_fts5 USING fts5(x)")
+        conn.execute("DROP TABLE temp.test_fts5")
+        return True
+    except sqlite3.Error:
+        return False
+
+def init_fts():
+    global fts_actif
+    if not fts5_disponible():
+        fts_actif = False
+        return False
+
+    conn = get_connection()
     c = conn.cursor()
     try:
-        result = operation(c)
+        c.execute("SELECT name FROM sqlite_master WHERE type='table' AND name IN ('titles_fts', 'grammar_points_fts')")
+        existantes = {row[0] for row in c.fetchall()}
+        if len(existantes) == 2:
+            fts_actif = True
+            return fts_actif
+
+        # Tables à contenu externe : le texte reste dans titles / grammar_points
+        c.execute("""CREATE VIRTUAL TABLE IF NOT EXISTS titles_fts USING fts5(
+                     title, content='titles', content_rowid='id',
+                     tokenize='unicode61 remove_diacritics 2')""")
+        c.execute("""CREATE VIRTUAL TABLE IF NOT EXISTS grammar_points_fts USING fts5(
+                     point, language_id UNINDEXED, content='grammar_points', content_rowid='id',
+                     tokenize='unicode61 remove_diacritics 2')""")
+
+        # Triggers de synchronisation
+        c.execute("""CREATE TRIGGER IF NOT EXISTS titles_fts_ai AFTER INSERT ON titles BEGIN
+                     INSERT INTO titles_fts(rowid, title) VALUES (new.id, new.title);
+                     END""")
+        c.execute("""CREATE TRIGGER IF NOT EXISTS titles_fts_ad AFTER DELETE ON titles BEGIN
+                     INSERT INTO titles_fts(titles_fts, rowid, title) VALUES ('delete', old.id, old.title);
+                     END""")
+        c.execute("""CREATE TRIGGER IF NOT EXISTS titles_fts_au AFTER UPDATE ON titles BEGIN
+                     INSERT INTO titles_fts(titles_fts, rowid, title) VALUES ('delete', old.id, old.title);
+                     INSERT INTO titles_fts(rowid, title) VALUES (new.id, new.title);
+                     END""")
+        c.execute("""CREATE TRIGGER IF NOT EXISTS grammar_points_fts_ai AFTER INSERT ON grammar_points BEGIN
+                     INSERT INTO grammar_points_fts(rowid, point, language_id) VALUES (new.id, new.point, new.language_id);
+                     END""")
+        c.execute("""CREATE TRIGGER IF NOT EXISTS grammar_points_fts_ad AFTER DELETE ON grammar_points BEGIN
+                     INSERT INTO grammar_points_fts(grammar_points_fts, rowid, point, language_id)
+                     VALUES ('delete', old.id, old.point, old.language_id);
+                     END""")
+        c.execute("""CREATE TRIGGER IF NOT EXISTS grammar_points_fts_au AFTER UPDATE ON grammar_points BEGIN
+                     INSERT INTO grammar_points_fts(grammar_points_fts, rowid, point, language_id)
+                     VALUES ('delete', old.id, old.point, old.language_id);
+                     INSERT INTO grammar_points_fts(rowid, point, language_id) VALUES (new.id, new.point, new.language_id);
+                     END""")
+
+        # Indexation des lignes déjà présentes lors de la création
+        if 'titles_fts' not in existantes:
+            c.execute("INSERT INTO titles_fts(titles_fts) VALUES ('rebuild')")
+        if 'grammar_points_fts' not in existantes:
+            c.execute("INSERT INTO grammar_points_fts(grammar_points_fts) VALUES ('rebuild')")
+
         conn.commit()
-        return result
+        fts_actif = True
     except sqlite3.Error as e:
         print(f"Une erreur est survenue : {e}")
         conn.rollback()
-        return None
+        fts_actif = False
     finally:
-        conn.close()
+        c.close()
+    return fts_actif
 
-def add_grammar_point(language, point):
-    conn = sqlite3.connect('language_app.db')
-    c = conn.cursor()
+def _requete_fts(texte):
+    # Chaque mot saisi devient un préfixe : "subj pres" -> "subj"* "pres"*
+    mots = re.findall(r"\w+", texte)
+    return " ".join(f'"{mot}"*' for mot in mots)
+
+def search_titles(query, limit=50):
+    c = get_connection().cursor()
     try:
-        c.execute("SELECT id FROM languages WHERE name=?", (language,))
-        lang_id = c.fetchone()[0]
-        c.execute("INSERT INTO grammar_points (language_id, point) VALUES (?, ?)", (lang_id, point))
-        conn.commit()
+        if fts_actif:
+            requete = _requete_fts(query)
+            if not requete:
+                return []
+            c.execute("""SELECT title FROM titles_fts WHERE titles_fts MATCH ?
+                         ORDER BY bm25(titles_fts) LIMIT ?""", (requete, limit))
+        else:
+            c.execute("SELECT title FROM titles WHERE title LIKE ? LIMIT ?", (f"%{query}%", limit))
+        return [row[0] for row in c.fetchall()]
     except sqlite3.Error as e:
         print(f"Une erreur est survenue : {e}")
-        conn.rollback()
+        return []
     finally:
-        conn.close()
+        c.close()
+
+def search_grammar_points(language, query, limit=50):
+    c = get_connection().cursor()
+    try:
+        if fts_actif:
+            requete = _requete_fts(query)
+            if not requete:
+                return []
+            c.execute("""SELECT point FROM grammar_points_fts
+                         WHERE grammar_points_fts MATCH ?
+                         AND language_id = (SELECT id FROM languages WHERE name=?)
+                         ORDER BY bm25(grammar_points_fts) LIMIT ?""", (requete, language, limit))
+        else:
+            c.execute("""SELECT point FROM grammar_points
+                         JOIN languages ON grammar_points.language_id = languages.id
+                         WHERE languages.name=? AND point LIKE ? LIMIT ?""", (language, f"%{query}%", limit))
+        return [row[0] for row in c.fetchall()]
+    except sqlite3.Error as e:
+        print(f"Une erreur est survenue : {e}")
+        return []
+    finally:
+        c.close()
+
+def db_operation(operation):
+    # Transaction courte, rejouée si un autre poste écrit au même moment (voir db_pool)
+    try:
+        return db_pool.executer_transaction(operation)
+    except sqlite3.Error as e:
+        print(f"Une erreur est survenue : {e}")
+        return None
+
+# Opérations élémentaires sur un curseur, sans commit : elles peuvent être regroupées
+# dans une même transaction (voir write_behind.py).
+
+def add_grammar_point_op(c, language, point):
+    lang_id = language_id(language, c)
+    if lang_id is None:
+        raise ValueError(f"Langue inconnue : {language}")
+    c.execute("INSERT OR IGNORE INTO grammar_points (language_id, point) VALUES (?, ?)", (lang_id, point))
+
+def remove_grammar_point_op(c, language, point):
+    c.execute("DELETE FROM grammar_points WHERE language_id=? AND point=?", (language_id(language, c), point))
+    # Le score d'usage disparaît avec le point (sinon la table 'usages' ne ferait que grandir)
+    c.execute("DELETE FROM usages WHERE kind='point' AND language=? AND value=?", (language, point))
+
+def save_title_op(c, title):
+    c.execute("INSERT OR IGNORE INTO titles (title) VALUES (?)", (title,))
+
+def delete_title_op(c, title):
+    c.execute("DELETE FROM titles WHERE title=?", (title,))
+    c.execute("DELETE FROM usages WHERE kind='titre' AND language='' AND value=?", (title,))
+
+def add_grammar_point(language, point):
+    db_operation(lambda c: add_grammar_point_op(c, language, point))
 
 
 def get_grammar_points(language):
-    conn = sqlite3.connect('language_app.db')
-    c = conn.cursor()
+    c = get_connection().cursor()
     try:
-        c.execute("""SELECT point FROM grammar_points
-                     JOIN languages ON grammar_points.language_id = languages.id
-                     WHERE languages.name=?""", (language,))
+        c.execute(SQL_POINTS_LANGUE, (language_id(language, c),))
         points = [row[0] for row in c.fetchall()]
         if not points:
             # Liste par défaut si aucun point n'est trouvé
-            points = [
-                "Le présent de l'indicatif", "Le passé composé", "L'imparfait",
-                "Le futur simple", "Le conditionnel présent", "Le subjonctif présent",
-                "Les articles définis et indéfinis", "Les adjectifs qualificatifs",
-                "Les pronoms personnels", "La négation", "L'interrogation"
-            ]
+            points = list(POINTS_PAR_DEFAUT)
         return points
     except sqlite3.Error as e:
         print(f"Une erreur est survenue : {e}")
         return []
     finally:
-        conn.close()
+        c.close()
 
-def remove_grammar_point(language, point):
-    conn = sqlite3.connect('language_app.db')
-    c = conn.cursor()
+def get_all_grammar_points():
+    """Points grammaticaux de toutes les langues en une seule requête : {langue: [points]}."""
+    c = get_connection().cursor()
     try:
-        c.execute("""DELETE FROM grammar_points 
-                     WHERE language_id = (SELECT id FROM languages WHERE name=?) 
-                     AND point=?""", (language, point))
-        conn.commit()
+        c.execute(SQL_POINTS_TOUTES_LANGUES)
+        resultat = {}
+        for lang_id, name, point in c.fetchall():
+            _ids_langues[(db_pool.DB_PATH, name)] = lang_id
+            points = resultat.setdefault(name, [])
+            if point is not None:
+                points.append(point)
+        for name, points in resultat.items():
+            if not points:
+                resultat[name] = list(POINTS_PAR_DEFAUT)
+        return resultat
     except sqlite3.Error as e:
         print(f"Une erreur est survenue : {e}")
-        conn.rollback()
+        return {}
     finally:
-        conn.close()
+        c.close()
+
+def remove_grammar_point(language, point):
+    db_operation(lambda c: remove_grammar_point_op(c, language, point))
 
 def load_titles():
-    conn = sqlite3.connect('language_app.db')
-    c = conn.cursor()
+    c = get_connection().cursor()
     try:
-        c.execute("SELECT title FROM titles")
+        c.execute(SQL_TITRES)
         titles = [row[0] for row in c.fetchall()]
         return titles
     except sqlite3.Error as e:
         print(f"Une erreur est survenue : {e}")
         return []
     finally:
-        conn.close()
+        c.close()
 
 def save_title(title):
-    db_operation(lambda c: c.execute("INSERT OR IGNORE INTO titles (title) VALUES (?)", (title,)))
+    db_operation(lambda c: save_title_op(c, title))
 
 def delete_title(title):
-    conn = sqlite3.connect('language_app.db')
-    c = conn.cursor()
+    db_operation(lambda c: delete_title_op(c, title))
+
+
+# Historique des séances (table 'lessons')
+
+TAILLE_PAGE_LECONS = 50
+
+def save_lesson_op(c, lecon):
+    """lecon : dictionnaire avec classe, date (AAAA-MM-JJ), language, axe, titre, texte, objectifs."""
+    # Générer deux fois la même séance le même jour ne crée pas de doublon
+    c.execute("""SELECT id FROM lessons WHERE classe=? AND date=? AND texte=?""",
+              (lecon['classe'], lecon['date'], lecon['texte']))
+    row = c.fetchone()
+    if row:
+        return row[0]
+    c.execute("""INSERT INTO lessons (classe, date, language_id, axe, titre, texte)
+                 VALUES (?, ?, (SELECT id FROM languages WHERE name=?), ?, ?, ?)""",
+              (lecon['classe'], lecon['date'], lecon.get('language'), lecon.get('axe', ''),
+               lecon.get('titre', ''), lecon['texte']))
+    lesson_id = c.lastrowid
+    c.executemany("INSERT OR IGNORE INTO lesson_grammar_points (lesson_id, point) VALUES (?, ?)",
+                  [(lesson_id, point) for point in lecon.get('objectifs', [])])
+    return lesson_id
+
+def save_lesson(lecon):
+    return db_operation(lambda c: save_lesson_op(c, lecon))
+
+def delete_lesson_op(c, lesson_id):
+    c.execute("DELETE FROM lesson_grammar_points WHERE lesson_id=?", (lesson_id,))
+    c.execute("DELETE FROM lessons WHERE id=?", (lesson_id,))
+
+def delete_lesson(lesson_id):
+    db_operation(lambda c: delete_lesson_op(c, lesson_id))
+
+def get_lessons_page(classe=None, language=None, apres=None, limit=TAILLE_PAGE_LECONS):
+    """Renvoie (lignes, curseur_suivant) : les séances les plus récentes d'abord.
+
+    La pagination se fait par clé : apres est le curseur (date, id) renvoyé par la page
+    précédente. Contrairement à OFFSET, le coût d'une page ne dépend pas de sa position
+    dans l'historique. Chaque ligne est un tuple (id, date, classe, titre, axe) ; le texte
+    complet s'obtient avec get_lesson.
+    """
+    c = get_connection().cursor()
     try:
-        c.execute("DELETE FROM titles WHERE title=?", (title,))
-        conn.commit()
+        c.execute(*requete_page_lecons(classe, language, apres, limit))
+        lignes = c.fetchall()
+        curseur = (lignes[-1][1], lignes[-1][0]) if len(lignes) == limit else None
+        return lignes, curseur
     except sqlite3.Error as e:
         print(f"Une erreur est survenue : {e}")
-        conn.rollback()
+        return [], None
+    finally:
+        c.close()
+
+def requete_page_lecons(classe=None, language=None, apres=None, limit=TAILLE_PAGE_LECONS):
+    """Renvoie (sql, paramètres) de get_lessons_page (aussi utilisé par tools/verifier_plans.py)."""
+    conditions = []
+    parametres = []
+    if classe:
+        conditions.append("classe = ?")
+        parametres.append(classe)
+    if language:
+        conditions.append("language_id = (SELECT id FROM languages WHERE name=?)")
+        parametres.append(language)
+    if apres is not None:
+        conditions.append("(date, id) < (?, ?)")
+        parametres.extend(apres)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    return (f"""SELECT id, date, classe, titre, axe FROM lessons {where}
+                ORDER BY date DESC, id DESC LIMIT ?""", (*parametres, limit))
+
+def get_lesson(lesson_id):
+    c = get_connection().cursor()
+    try:
+        c.execute("""SELECT lessons.id, date, classe, languages.name, axe, titre, texte FROM lessons
+                     LEFT JOIN languages ON lessons.language_id = languages.id
+                     WHERE lessons.id=?""", (lesson_id,))
+        row = c.fetchone()
+        if row is None:
+            return None
+        lecon = dict(zip(['id', 'date', 'classe', 'language', 'axe', 'titre', 'texte'], row))
+        c.execute("SELECT point FROM lesson_grammar_points WHERE lesson_id=?", (lesson_id,))
+        lecon['objectifs'] = [r[0] for r in c.fetchall()]
+        return lecon
+    except sqlite3.Error as e:
+        print(f"Une erreur est survenue : {e}")
+        return None
+    finally:
+        c.close()
+
+def get_lesson_classes():
+    c = get_connection().cursor()
+    try:
+        # Parcours de idx_lessons_classe_date, sans lire la table
+        c.execute("SELECT DISTINCT classe FROM lessons WHERE classe != '' ORDER BY classe")
+        return [row[0] for row in c.fetchall()]
+    except sqlite3.Error as e:
+        print(f"Une erreur est survenue : {e}")
+        return []
+    finally:
+        c.close()
+
+
+# Modèles de sortie (table 'templates', compilés et mis en cache par templates.py)
+
+def get_template(name, language='', format='standard'):
+    c = get_connection().cursor()
+    try:
+        c.execute("SELECT content FROM templates WHERE name=? AND language=? AND format=?",
+                  (name, language, format))
+        row = c.fetchone()
+        return row[0] if row else None
+    except sqlite3.Error as e:
+        print(f"Une erreur est survenue : {e}")
+        return None
     finally:
-        conn.close()
+        c.close()
 
+def list_templates(name=None):
+    c = get_connection().cursor()
+    try:
+        if name is None:
+            c.execute("SELECT name, language, format FROM templates ORDER BY name, language, format")
+        else:
+            c.execute("SELECT name, language, format FROM templates WHERE name=? ORDER BY language, format", (name,))
+        return c.fetchall()
+    except sqlite3.Error as e:
+        print(f"Une erreur est survenue : {e}")
+        return []
+    finally:
+        c.close()
+
+def save_template_op(c, name, language, format, content):
+    c.execute("INSERT OR REPLACE INTO templates (name, language, format, content) VALUES (?, ?, ?, ?)",
+              (name, language, format, content))
+
+def save_template(name, language, format, content):
+    db_operation(lambda c: save_template_op(c, name, language, format, content))
+
+def delete_template(name, language, format):
+    db_operation(lambda c: c.execute("DELETE FROM templates WHERE name=? AND language=? AND format=?",
+                                     (name, language, format)))
+
+
+# Fréquence d'utilisation (table 'usages', classée en mémoire par classement.py)
+
+def record_usage_op(c, kind, language, value, score):
+    # Cumul en espace logarithmique dans la transaction : les choix faits sur d'autres postes sont conservés
+    c.execute("SELECT score FROM usages WHERE kind=? AND language=? AND value=?", (kind, language, value))
+    row = c.fetchone()
+    if row:
+        score = somme_log(row[0], score)
+    c.execute("INSERT OR REPLACE INTO usages (kind, language, value, score) VALUES (?, ?, ?, ?)",
+              (kind, language, value, score))
+
+def record_usage(kind, language, value, score):
+    db_operation(lambda c: record_usage_op(c, kind, language, value, score))
+
+def get_usages(kind, language=''):
+    """Liste de (valeur, score) des éléments de ce type déjà choisis."""
+    c = get_connection().cursor()
+    try:
+        c.execute("SELECT value, score FROM usages WHERE kind=? AND language=?", (kind, language))
+        return c.fetchall()
+    except sqlite3.Error as e:
+        print(f"Une erreur est survenue : {e}")
+        return []
+    finally:
+        c.close()
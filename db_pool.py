@@ -0,0 +1,218 @@
+"""
+db_pool.py
+
+Ce module gère les connexions SQLite de l'application "Cahier de textes portable".
+
+Au lieu d'ouvrir et de fermer une connexion à chaque appel, l'application garde une
+connexion longue durée par thread. Chaque connexion conserve son cache de requêtes
+préparées (paramètre cached_statements de sqlite3), ce qui évite de recompiler les
+mêmes requêtes à chaque frappe clavier.
+
+Fonctions principales :
+- configurer : Change le chemin de la base, les PRAGMA ou la taille du cache de requêtes.
+- get_connection : Renvoie la connexion du thread courant (ouverte au premier appel).
+- transaction : Gestionnaire de contexte qui fournit un curseur et valide ou annule.
+- executer_transaction : Exécute operation(curseur) dans une transaction, rejouée si la base est occupée.
+- connexion_dediee : Connexion nommée, partagée entre threads (l'appelant sérialise son usage).
+- fermer_connexions : Ferme toutes les connexions ouvertes (appelée à la sortie).
+- ajouter_crochet_ouverture : Applique une fonction à chaque connexion, ouverte ou à venir
+  (utilisé par sql_trace pour brancher set_trace_callback).
+
+Les PRAGMA par défaut activent le journal WAL, un mode synchronous NORMAL et un cache
+de pages d'environ 8 Mo. Ils sont appliqués à chaque nouvelle connexion.
+
+Accès concurrents (plusieurs postes ou processus sur la même base) :
+- busy_timeout : SQLite attend jusqu'à DELAI_OCCUPE_MS qu'un autre processus libère le verrou
+  au lieu d'échouer aussitôt avec "database is locked" ;
+- les transactions implicites d'écriture commencent par BEGIN IMMEDIATE (NIVEAU_ISOLATION) :
+  le verrou d'écriture est pris dès la première écriture, et busy_timeout s'applique (une
+  transaction DEFERRED qui passe de la lecture à l'écriture échoue sans attendre) ;
+- executer_transaction rejoue toute la transaction jusqu'à TENTATIVES fois si SQLite renvoie
+  SQLITE_BUSY ou SQLITE_LOCKED, après une attente aléatoire (backoff exponentiel avec gigue,
+  pour que les processus en conflit ne réessaient pas tous au même instant).
+Les transactions d'écriture restent courtes : aucune attente de l'utilisateur ni lecture de
+fichier pendant qu'elles tiennent le verrou.
+
+Attention : le journal WAL suppose que tous les processus tournent sur la même machine (mémoire
+partagée). Si plusieurs ordinateurs ouvrent la base sur un partage réseau, utiliser
+configurer(pragmas={'journal_mode': 'DELETE'}) ; busy_timeout et les reprises s'appliquent de même.
+"""
+
+import atexit
+import random
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+DB_PATH = 'language_app.db'
+
+# Attente maximale d'un verrou détenu par un autre processus (en millisecondes)
+DELAI_OCCUPE_MS = 5000
+
+# PRAGMA appliqués à l'ouverture de chaque connexion (ordre conservé ; busy_timeout en premier :
+# le passage en WAL prend lui-même un verrou)
+PRAGMAS = {
+    'busy_timeout': DELAI_OCCUPE_MS,
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -8000,  # valeur négative = taille en Kio
+}
+
+# Nombre de requêtes préparées gardées en cache par connexion
+TAILLE_CACHE_REQUETES = 128
+
+# BEGIN utilisé par sqlite3 avant la première écriture d'une transaction implicite
+NIVEAU_ISOLATION = 'IMMEDIATE'
+
+# Reprises d'une transaction refusée (SQLITE_BUSY / SQLITE_LOCKED) malgré busy_timeout
+TENTATIVES = 8
+DELAI_REPRISE_INITIAL = 0.05  # secondes
+DELAI_REPRISE_MAX = 2.0
+_CODES_OCCUPE = (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED)
+# Nombre total de reprises (diagnostic, voir tools/stress_concurrence.py)
+reprises = 0
+
+_local = threading.local()
+_connexions = []
+_verrou = threading.Lock()
+_generation = 0
+# Connexions dédiées : nom -> (connexion, génération)
+_dediees = {}
+# Fonctions appelées avec chaque nouvelle connexion (par exemple sql_trace)
+_crochets_ouverture = []
+
+
+def configurer(chemin=None, pragmas=None, cached_statements=None):
+    """Modifie la configuration et ferme les connexions existantes."""
+    global DB_PATH, PRAGMAS, TAILLE_CACHE_REQUETES
+    fermer_connexions()
+    with _verrou:
+        if chemin is not None:
+            DB_PATH = chemin
+        if pragmas is not None:
+            PRAGMAS = dict(PRAGMAS, **pragmas)
+        if cached_statements is not None:
+            TAILLE_CACHE_REQUETES = cached_statements
+
+
+def _ouvrir(locale=True):
+    # check_same_thread=False permet à fermer_connexions de fermer la connexion
+    # depuis le thread principal ; chaque connexion reste utilisée par un seul thread
+    # à la fois (les connexions dédiées sont protégées par le verrou de l'appelant).
+    conn = sqlite3.connect(DB_PATH, cached_statements=TAILLE_CACHE_REQUETES, check_same_thread=False,
+                           isolation_level=NIVEAU_ISOLATION)
+    for nom, valeur in PRAGMAS.items():
+        if valeur is not None:
+            conn.execute(f"PRAGMA {nom}={valeur}")
+    with _verrou:
+        _connexions.append(conn)
+        crochets = list(_crochets_ouverture)
+    for crochet in crochets:
+        crochet(conn)
+    if locale:
+        _local.conn = conn
+        _local.generation = _generation
+    return conn
+
+
+def get_connection():
+    conn = getattr(_local, 'conn', None)
+    if conn is None or _local.generation != _generation:
+        conn = _ouvrir()
+    return conn
+
+
+def connexion_dediee(nom):
+    """Connexion propre à nom, hors des connexions par thread (rouverte après fermer_connexions)."""
+    with _verrou:
+        conn, generation = _dediees.get(nom, (None, None))
+        if conn is not None and generation == _generation:
+            return conn
+        generation = _generation
+    conn = _ouvrir(locale=False)
+    with _verrou:
+        _dediees[nom] = (conn, generation)
+    return conn
+
+
+def ajouter_crochet_ouverture(crochet):
+    """Appelle crochet(conn) pour les connexions déjà ouvertes et pour chaque nouvelle connexion."""
+    with _verrou:
+        _crochets_ouverture.append(crochet)
+        connexions = list(_connexions)
+    for conn in connexions:
+        crochet(conn)
+
+
+def retirer_crochet_ouverture(crochet):
+    with _verrou:
+        if crochet in _crochets_ouverture:
+            _crochets_ouverture.remove(crochet)
+
+
+@contextmanager
+def transaction(conn=None):
+    """Fournit un curseur ; valide à la sortie, annule en cas d'exception."""
+    if conn is None:
+        conn = get_connection()
+    c = conn.cursor()
+    try:
+        yield c
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        c.close()
+
+
+def base_occupee(erreur):
+    """Vrai si l'erreur sqlite3 vient d'un verrou détenu par une autre connexion."""
+    if not isinstance(erreur, sqlite3.OperationalError):
+        return False
+    code = getattr(erreur, 'sqlite_errorcode', None)
+    if code is not None:
+        # Codes étendus (SQLITE_BUSY_SNAPSHOT...) : l'octet de poids faible donne le code principal
+        return code & 0xff in _CODES_OCCUPE
+    message = str(erreur)
+    return 'locked' in message or 'busy' in message
+
+
+def executer_transaction(operation, tentatives=None, conn=None):
+    """Exécute operation(curseur) dans une transaction et renvoie son résultat.
+
+    conn : connexion à utiliser (par défaut celle du thread courant).
+
+    Si la base est occupée, la transaction est annulée puis rejouée entière après une attente
+    aléatoire : operation ne doit donc avoir aucun effet en dehors de la base.
+    """
+    global reprises
+    tentatives = TENTATIVES if tentatives is None else tentatives
+    for tentative in range(tentatives):
+        try:
+            with transaction(conn) as c:
+                return operation(c)
+        except sqlite3.OperationalError as e:
+            if not base_occupee(e) or tentative == tentatives - 1:
+                raise
+        reprises += 1
+        plafond = min(DELAI_REPRISE_MAX, DELAI_REPRISE_INITIAL * 2 ** tentative)
+        time.sleep(random.uniform(plafond / 2, plafond))
+
+
+def fermer_connexions():
+    global _generation
+    with _verrou:
+        connexions = list(_connexions)
+        _connexions.clear()
+        _dediees.clear()
+        _generation += 1
+    for conn in connexions:
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+
+atexit.register(fermer_connexions)
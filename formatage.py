@@ -0,0 +1,87 @@
+"""
+formatage.py
+
+Ce module met en forme le "texte final" d'une séance du Cahier de textes portable.
+
+Il ne dépend pas de tkinter : la même mise en forme sert à l'interface graphique
+(utils.generer_texte_final, qui lit les widgets) et à la génération par lots (batch.py,
+qui lit des fichiers CSV ou JSON Lines).
+
+Un enregistrement est un dictionnaire avec les clés :
+titre, nature, competences, axe, objectifs, champ_lexical, trace.
+competences et objectifs sont des listes (une chaîne séparée par des ';' est aussi acceptée,
+une valeur isolée, par exemple un nombre, devient une liste d'un élément).
+La disposition du texte vient du modèle 'texte_final' de templates.py, choisi selon la langue
+(clé 'langue' ou 'language' de l'enregistrement) et le format d'établissement.
+
+Fonctions principales :
+- normaliser_enregistrement : Ramène les différentes orthographes des colonnes aux clés ci-dessus
+  (ValueError si l'enregistrement n'est pas un dictionnaire).
+- formater_texte_final : Renvoie le texte final d'un enregistrement.
+"""
+
+import templates
+
+COMPETENCES = [
+    "Compréhension de l'écrit",
+    "Compréhension de l'oral",
+    "Expression écrite",
+    "Expression orale",
+]
+
+CHAMPS = ['titre', 'nature', 'competences', 'axe', 'objectifs', 'champ_lexical', 'trace']
+
+# Orthographes acceptées pour les en-têtes CSV et les clés JSON
+ALIAS = {
+    'compétences': 'competences',
+    'competence': 'competences',
+    'compétence': 'competences',
+    'objectifs grammaticaux': 'objectifs',
+    'objectifs_grammaticaux': 'objectifs',
+    'champ lexical': 'champ_lexical',
+    'champ-lexical': 'champ_lexical',
+    'trace écrite': 'trace',
+    'trace_ecrite': 'trace',
+}
+
+SEPARATEUR_LISTE = ';'
+
+
+def _liste(valeur):
+    if valeur is None:
+        return []
+    if isinstance(valeur, str):
+        return [element.strip() for element in valeur.split(SEPARATEUR_LISTE) if element.strip()]
+    if isinstance(valeur, (list, tuple)):
+        return [str(element) for element in valeur]
+    return [str(valeur)]
+
+
+def normaliser_enregistrement(enregistrement):
+    if not isinstance(enregistrement, dict):
+        raise ValueError(f"Objet attendu pour une séance, pas {type(enregistrement).__name__}")
+    resultat = {}
+    for cle, valeur in enregistrement.items():
+        if cle is None:
+            continue
+        cle = cle.strip().lower()
+        resultat[ALIAS.get(cle, cle)] = valeur
+    for champ in CHAMPS:
+        resultat.setdefault(champ, "")
+    resultat['competences'] = _liste(resultat['competences'])
+    resultat['objectifs'] = _liste(resultat['objectifs'])
+    return resultat
+
+
+def formater_texte_final(enregistrement, langue=None, format_institution=None):
+    e = normaliser_enregistrement(enregistrement)
+    e['competences'] = ', '.join(e['competences'])
+    e['objectifs'] = ', '.join(e['objectifs'])
+    if langue is None:
+        langue = e.get('langue') or e.get('language') or ''
+    for nom, valeur in (('langue', langue), ('format', format_institution)):
+        if valeur is not None and not isinstance(valeur, str):
+            raise ValueError(f"Champ '{nom}' : texte attendu, pas {type(valeur).__name__}")
+    e.setdefault('langue', langue)
+    # Modèle compilé une seule fois puis réutilisé (voir templates.py)
+    return templates.rendre('texte_final', e, langue, format_institution)
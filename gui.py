@@ -9,14 +9,29 @@ modules personnalisés pour la gestion de la base de données et d'autres foncti
 
 Fonctions principales :
 - update_objectifs_grammaticaux : Met à jour la liste des objectifs grammaticaux selon la langue.
+  Les titres et les points les plus choisis récemment sont proposés en tête des listes
+  déroulantes (catalog_cache.ordonner_par_usage) ; chaque choix validé est compté.
 - init_global_variables : Initialise les variables globales de l'application.
-- afficher_accueil : Crée et affiche la fenêtre d'accueil.
+- afficher_accueil : Crée et affiche la fenêtre d'accueil (drapeaux pré-rendus par assets.py, sans PIL).
 - create_styled_gui : Crée l'interface utilisateur principale.
 - create_scrollable_frame : Crée un cadre défilable pour les widgets.
+- ajouter_onglet_differe : Enregistre le constructeur d'un onglet, exécuté à sa première
+  sélection (<<NotebookTabChanged>>). Les onglets Travail à faire, Bibliothèque et Historique
+  sont différés.
+- create_historique_tab : Historique des séances générées, filtré par classe (et langue),
+  chargé page par page au défilement (database.get_lessons_page, pagination par clé).
+- signaler_premier_affichage : Mesure le temps jusqu'au formulaire principal interactif
+  (variable temps_premier_affichage, en millisecondes) et l'inscrit dans le profil de
+  démarrage ; seulement si profil_demarrage est actif (variable CAHIER_PROFIL_DEMARRAGE).
+- rechercher_en_arriere_plan : Confie une recherche déclenchée par la frappe au pipeline
+  partagé (async_search) : regroupement des frappes, thread de travail, le dernier gagne.
 - Diverses fonctions 'create_*' : Créent différentes sections de l'interface principale.
+  Les listes de la Bibliothèque sont des ListeVirtuelle (virtual_listbox) : seules les lignes
+  visibles sont confiées à Tk.
 - copier_travail_a_faire : Copie le texte du travail à faire dans le presse-papiers.
 - Fonctions de mise à jour (update_*, remove_from_*) : Gèrent les listes de titres et 
-  de points grammaticaux dans l'interface et la base de données.
+  de points grammaticaux dans l'interface et la base de données. Elles passent par les modèles
+  observables de catalog_model, qui envoient des insertions et suppressions ciblées aux widgets abonnés.
 
 Le script se termine par la fonction 'main', point d'entrée qui initialise l'interface 
 et gère les erreurs potentielles.
@@ -27,11 +42,18 @@ Ce module est conçu pour être importé et utilisé par le script principal de
 
 import tkinter as tk
 from tkinter import ttk
-from database import load_titles, get_grammar_points, add_grammar_point
+from tkinter import messagebox
+from catalog_cache import get_grammar_points, rechercher_titres, rechercher_titres_classes, rechercher_points_classes, ordonner_par_usage, activer_ecriture_differee, invalider as invalider_cache, ecritures_en_attente, prechauffer
+from database import get_lessons_page, get_lesson, get_lesson_classes
 from utils import ajouter_titre, supprimer_titre, ajouter_point_grammatical, supprimer_point_grammatical, generer_texte_final, copier_texte
-from PIL import Image, ImageTk
-import sys
-import os
+from async_search import PipelineRecherche
+from assets import charger_drapeau
+import catalog_model
+from catalog_model import AbonneWidget
+from virtual_listbox import ListeVirtuelle
+import profil_demarrage
+from profil_demarrage import journal
+import time
 
 # Déclaration des variables globales
 titles_listbox = None
@@ -39,43 +61,43 @@ titre_entry = None
 grammar_listbox = None
 objectifs_dropdown = None
 update_objectifs_grammaticaux_func = None
+pipeline_recherche = None
+temps_premier_affichage = None
+
+# Nombre maximal de suggestions affichées par les recherches classées
+LIMITE_SUGGESTIONS = 50
+# Attente entre deux essais de rechargement de l'historique tant que des écritures sont en file
+INTERVALLE_ATTENTE_ECRITURES_MS = 100
 
 # Autres variables globales
 all_titles = []
 all_grammar_points = []
-titre_widgets = []
-objectif_widgets = []
 
 
 
-def resource_path(relative_path):
-    """ Get absolute path to resource, works for dev and for PyInstaller """
-    try:
-        # PyInstaller creates a temp folder and stores path in _MEIPASS
-        base_path = sys._MEIPASS
-    except Exception:
-        base_path = os.path.abspath(".")
+def rechercher_en_arriere_plan(cle, calcul, appliquer):
+    # Sans pipeline (fenêtre principale pas encore créée), la recherche reste synchrone
+    if pipeline_recherche is None:
+        appliquer(calcul())
+    else:
+        pipeline_recherche.soumettre(cle, calcul, appliquer)
 
-    return os.path.join(base_path, relative_path)
+def signaler_echec_ecriture(description, erreur):
+    messagebox.showerror("Erreur d'enregistrement", f"L'enregistrement a échoué ({description}) : {erreur}")
 
 def update_objectifs_grammaticaux(language_var, objectifs_dropdown, all_objectifs):
     language = language_var.get()
     all_objectifs[:] = get_grammar_points(language)
-    objectifs_dropdown['values'] = all_objectifs
+    # Les points les plus choisis récemment en tête (voir classement.py)
+    objectifs_dropdown['values'] = ordonner_par_usage('point', all_objectifs, language)
 
 def init_global_variables():
-    global all_titles, all_grammar_points, titre_widgets, objectif_widgets
-    all_titles = load_titles()
-    all_grammar_points = get_grammar_points("Espagnol")  # Assurez-vous que la langue par défaut est correcte
-    titre_widgets.clear()
-    objectif_widgets.clear()
-
-from PIL import Image, ImageTk
+    global all_titles, all_grammar_points
+    all_titles = catalog_model.titres.elements
+    all_grammar_points = catalog_model.modele_points("Espagnol").elements  # Assurez-vous que la langue par défaut est correcte
 
 def filter_titles(entry, listbox=None):
-    typed = entry.get().lower()
-    all_titles = load_titles()
-    filtered = [title for title in all_titles if typed in title.lower()]
+    filtered = rechercher_titres(entry.get())
     
     if isinstance(entry, ttk.Combobox):
         entry['values'] = filtered
@@ -85,37 +107,24 @@ def filter_titles(entry, listbox=None):
         for title in filtered:
             listbox.insert(tk.END, title)
 
-def remove_blue_background(image):
-    image = image.convert("RGBA")
-    data = image.getdata()
-    new_data = []
-    for item in data:
-        # Change all blue (or close to blue) pixels to transparent
-        if item[2] > 200 and item[0] < 100 and item[1] < 100:
-            new_data.append((255, 255, 255, 0))
-        else:
-            new_data.append(item)
-    image.putdata(new_data)
-    return image
-
 def afficher_accueil(root):
-    print("Début de la fonction afficher_accueil")
+    journal("Début de la fonction afficher_accueil")
     try:
         root.withdraw()
-        print("Fenêtre principale masquée")
+        journal("Fenêtre principale masquée")
 
         accueil = tk.Toplevel(root)
         accueil.title("Cahier de textes portable - Accueil")
         accueil.geometry("600x500")
         accueil.configure(bg="#F5F5F5")
-        print("Fenêtre d'accueil créée")
+        journal("Fenêtre d'accueil créée")
 
         label_bienvenue = ttk.Label(accueil, text="CAHIER DE TEXTES", font=("Helvetica Neue", 36, "bold"), background="#F5F5F5")
         label_bienvenue.pack(pady=(50, 30))
-        print("Label de bienvenue ajouté")
+        journal("Label de bienvenue ajouté")
 
         ttk.Label(accueil, text="Sélectionnez votre langue :", font=("Helvetica Neue", 16), background="#F5F5F5").pack(pady=(20, 30))
-        print("Label de sélection de langue ajouté")
+        journal("Label de sélection de langue ajouté")
 
         language_var = tk.StringVar(value="Espagnol")
         languages = [('Espagnol', 'spain.png'), ('Italien', 'italy.png'), ('Anglais', 'uk.png'), ('Allemand', 'germany.png')]
@@ -131,9 +140,7 @@ def afficher_accueil(root):
 
         flag_canvases = []
         for lang, flag_file in languages:
-            img = Image.open(resource_path(f"images/{flag_file}"))
-            img = img.resize((60, 40), Image.LANCZOS)
-            flag_img = ImageTk.PhotoImage(img)
+            flag_img = charger_drapeau(flag_file)
             
             canvas = tk.Canvas(flags_frame, width=70, height=70, bg="#F5F5F5", highlightthickness=1, highlightbackground="#D3D3D3")
             canvas.pack(side=tk.LEFT, padx=10)
@@ -143,7 +150,7 @@ def afficher_accueil(root):
             canvas.bind("<Button-1>", lambda e, l=lang, c=canvas: on_flag_click(l, c))
             flag_canvases.append(canvas)
 
-        print("Drapeaux ajoutés")
+        journal("Drapeaux ajoutés")
 
         ttk.Label(accueil, text="Bienvenue!", font=("Helvetica Neue", 14), background="#F5F5F5").pack(pady=(30, 20))
 
@@ -151,17 +158,24 @@ def afficher_accueil(root):
         style.configure('Suivant.TButton', font=('Helvetica Neue', 12), foreground='white', background='#2E86C1')
         bouton_suivant = ttk.Button(accueil, text="Commencer", command=lambda: [accueil.destroy(), root.deiconify()], style='Suivant.TButton')
         bouton_suivant.pack(pady=(20, 0))
-        print("Bouton Commencer ajouté")
+        journal("Bouton Commencer ajouté")
 
         return language_var
     except Exception as e:
         print(f"Erreur dans afficher_accueil : {e}")
         return tk.StringVar(value="Espagnol")  # Valeur par défaut en cas d'erreur
 
-def create_styled_gui(root, language_var, axes_du_programme):
-    global titre_widgets, all_titles
-    titre_widgets = []
-    all_titles = load_titles()
+def create_styled_gui(root, language_var, axes_du_programme, debut=None):
+    global all_titles, pipeline_recherche
+    if debut is None:
+        debut = time.perf_counter()
+    # Titres et points des quatre langues en mémoire : changer de langue est instantané
+    prechauffer()
+    all_titles = catalog_model.titres.elements
+    pipeline_recherche = PipelineRecherche(root)
+    activer_ecriture_differee(root, on_erreur=signaler_echec_ecriture)
+    # Listes rechargées si le cache est vidé (autre poste, échec d'écriture différée)
+    catalog_model.surveiller(root)
 
     main_frame = ttk.Frame(root)
     main_frame.pack(fill=tk.BOTH, expand=True)
@@ -178,8 +192,18 @@ def create_styled_gui(root, language_var, axes_du_programme):
     close_button = ttk.Button(main_frame, text="Fermer l'application", command=root.quit)
     close_button.pack(pady=10)
 
+    # Le formulaire principal est utilisable dès que Tk a traité l'affichage en attente
+    if profil_demarrage.actif:
+        root.after_idle(lambda: signaler_premier_affichage(debut))
+
     return main_frame, widgets
 
+def signaler_premier_affichage(debut):
+    global temps_premier_affichage
+    temps_premier_affichage = (time.perf_counter() - debut) * 1000
+    profil_demarrage.marquer('premier_affichage', duree_ms=round(temps_premier_affichage, 2))
+    profil_demarrage.ecrire()
+
 def setup_styles():
     style = ttk.Style()
     style.configure("TLabel", font=("Helvetica", 12))
@@ -191,13 +215,24 @@ def setup_styles():
 def create_notebook(parent):
     notebook = ttk.Notebook(parent)
     notebook.pack(fill=tk.BOTH, expand=True)
+    notebook.onglets_differes = {}
+    notebook.bind('<<NotebookTabChanged>>', lambda event: construire_onglet_selectionne(notebook))
     return notebook
 
+def ajouter_onglet_differe(notebook, onglet, constructeur):
+    # Le contenu de l'onglet n'est construit qu'à sa première sélection
+    notebook.onglets_differes[str(onglet)] = constructeur
+
+def construire_onglet_selectionne(notebook):
+    constructeur = notebook.onglets_differes.pop(notebook.select(), None)
+    if constructeur is not None:
+        constructeur()
+
 def create_principal_tab(notebook, language_var, axes_du_programme):
     principal_tab = ttk.Frame(notebook)
     notebook.add(principal_tab, text="Principal")
 
-    for i in range(13):
+    for i in range(14):
         principal_tab.grid_rowconfigure(i, weight=1)
     principal_tab.grid_columnconfigure(1, weight=1)
 
@@ -220,12 +255,15 @@ def reset_form(widgets):
     widgets['texte_final_text'].delete('1.0', tk.END)
 
 def create_widgets(principal_tab, language_var, axes_du_programme):
-    widgets = {}
+    widgets = {'language_var': language_var}
     row = 0
 
     create_header(principal_tab, language_var, row)
     row += 2
 
+    widgets.update(create_classe(principal_tab, row))
+    row += 1
+
     widgets.update(create_document_info(principal_tab, row))
     row += 2
 
@@ -259,53 +297,32 @@ def create_header(parent, language_var, row):
     ttk.Label(parent, text="Langue sélectionnée :").grid(row=row+1, column=0, sticky="w", padx=5, pady=5)
     ttk.Label(parent, textvariable=language_var).grid(row=row+1, column=1, sticky="w", padx=5, pady=5)
 
-def create_document_info(parent, row):
-    global titre_widgets, all_titles
-    
-    parent.grid_columnconfigure(1, weight=1)
-
-    ttk.Label(parent, text="Titre du/des document(s) :", font=("Helvetica", 12)).grid(
-        column=0, row=row, sticky="w", pady=10, padx=(0, 10))
-    titre_entry = ttk.Combobox(parent, font=("Helvetica", 12), values=all_titles)
-    titre_entry.grid(column=1, row=row, sticky="ew", pady=10, padx=(0, 10))
-    
-    titre_widgets.append(titre_entry)
-
-    def on_titre_added(event):
-        nouveau_titre = titre_entry.get().strip()
-        if nouveau_titre and nouveau_titre not in all_titles:
-            save_title(nouveau_titre)
-            all_titles.append(nouveau_titre)
-            update_titre_listboxes(nouveau_titre)
-    
-    titre_entry.bind('<Return>', on_titre_added)
-    titre_entry.bind('<KeyRelease>', lambda event: filter_titles(titre_entry))
-
-    ttk.Label(parent, text="Nature du/des document(s) :", font=("Helvetica", 12)).grid(
-        column=0, row=row+1, sticky="w", pady=10, padx=(0, 10))
-    nature_dropdown = ttk.Combobox(parent, values=["Texte", "Document sonore", "Vidéo", "Document iconographique", "Double page"], font=("Helvetica", 12))
-    nature_dropdown.grid(column=1, row=row+1, sticky="ew", pady=10, padx=(0, 10))
-
-    return {'titre_entry': titre_entry, 'nature_dropdown': nature_dropdown}
-
+def create_classe(parent, row):
+    ttk.Label(parent, text="Classe :", font=("Helvetica", 12)).grid(row=row, column=0, sticky="w", padx=5, pady=5)
+    # Les classes déjà présentes dans l'historique sont proposées
+    classe_entry = ttk.Combobox(parent, font=("Helvetica", 12), values=get_lesson_classes())
+    classe_entry.grid(row=row, column=1, sticky="ew", pady=5, padx=(0, 10))
+    return {'classe_entry': classe_entry}
 
 
 def create_other_tabs(notebook, widgets):
     travail_a_faire_tab = ttk.Frame(notebook)
     notebook.add(travail_a_faire_tab, text="Travail à faire")
-    widgets.update(create_travail_a_faire_tab(travail_a_faire_tab))
+    ajouter_onglet_differe(notebook, travail_a_faire_tab,
+                           lambda: widgets.update(create_travail_a_faire_tab(travail_a_faire_tab)))
 
     bibliotheque_tab = ttk.Frame(notebook)
     notebook.add(bibliotheque_tab, text="Bibliothèque")
-    bibliotheque_widgets = create_bibliotheque_tab(bibliotheque_tab)
-    widgets.update(bibliotheque_widgets)
-    titre_widgets.append(bibliotheque_widgets['titles_listbox'])
 
+    def construire_bibliotheque():
+        widgets.update(create_bibliotheque_tab(bibliotheque_tab, widgets['language_var']))
 
-def filter_titles(entry):
-    typed = entry.get().lower()
-    filtered = [title for title in all_titles if typed in title.lower()]
-    entry['values'] = filtered
+    ajouter_onglet_differe(notebook, bibliotheque_tab, construire_bibliotheque)
+
+    historique_tab = ttk.Frame(notebook)
+    notebook.add(historique_tab, text="Historique")
+    ajouter_onglet_differe(notebook, historique_tab,
+                           lambda: widgets.update(create_historique_tab(historique_tab, widgets['language_var'])))
 
 
 
@@ -357,7 +374,6 @@ def create_objectifs_grammaticaux(parent, language_var, row):
     
     objectifs_dropdown = ttk.Combobox(objectifs_frame, font=("Helvetica", 12))
     objectifs_dropdown.grid(row=0, column=1, sticky="ew", padx=(5, 0))
-    objectif_widgets.append(objectifs_dropdown)
     
     listbox_objectifs = tk.Listbox(parent, selectmode=tk.MULTIPLE, height=5, font=("Helvetica", 12))
     listbox_objectifs.grid(column=1, row=row+1, sticky="nsew", pady=5, padx=(0, 10))
@@ -365,19 +381,32 @@ def create_objectifs_grammaticaux(parent, language_var, row):
 
     all_objectifs = []
     objectifs_var = tk.StringVar()
+    abonnement = {}
 
     def local_update_objectifs_grammaticaux(*args):
         update_objectifs_grammaticaux(language_var, objectifs_dropdown, all_objectifs)
+        # La liste déroulante suit le modèle de la langue sélectionnée
+        if 'abonne' in abonnement:
+            abonnement['abonne'].modele.desabonner(abonnement['abonne'])
+        modele = catalog_model.modele_points(language_var.get())
+        abonnement['abonne'] = modele.abonner(AbonneWidget(
+            modele, objectifs_dropdown, est_filtre=lambda: bool(objectifs_entry.get()),
+            ordonner=catalog_model.par_usage('point', language_var.get())))
 
     update_objectifs_grammaticaux_func = local_update_objectifs_grammaticaux
 
     def filter_objectifs(*args):
-        typed = objectifs_entry.get().lower()
+        typed = objectifs_entry.get()
         if typed:
-            filtered = [obj for obj in all_objectifs if typed in obj.lower()]
-            objectifs_dropdown['values'] = filtered
+            language = language_var.get()
+            rechercher_en_arriere_plan(
+                'objectifs',
+                lambda: ordonner_par_usage('point', rechercher_points_classes(language, typed, LIMITE_SUGGESTIONS), language),
+                lambda filtered: objectifs_dropdown.configure(values=filtered))
         else:
-            objectifs_dropdown['values'] = all_objectifs
+            language = language_var.get()
+            rechercher_en_arriere_plan('objectifs', lambda: ordonner_par_usage('point', list(all_objectifs), language),
+                                       lambda filtered: objectifs_dropdown.configure(values=filtered))
 
     objectifs_entry.bind('<KeyRelease>', filter_objectifs)
     objectifs_dropdown.bind('<<ComboboxSelected>>', lambda e: objectifs_entry.delete(0, tk.END) or objectifs_entry.insert(0, objectifs_dropdown.get()))
@@ -387,7 +416,8 @@ def create_objectifs_grammaticaux(parent, language_var, row):
         if objectif:
             if objectif not in listbox_objectifs.get(0, tk.END):
                 listbox_objectifs.insert(tk.END, objectif)
-                add_grammar_point(language_var.get(), objectif)
+                catalog_model.ajouter_point(language_var.get(), objectif)
+                catalog_model.choisir_point(language_var.get(), objectif)
             objectifs_entry.delete(0, tk.END)
             objectifs_dropdown.set('')
 
@@ -432,39 +462,37 @@ def create_trace_ecrite(parent, row):
 
 
 def create_document_info(parent, row):
-    global update_objectifs_grammaticaux_func, titre_widgets
+    global update_objectifs_grammaticaux_func
     
     parent.grid_columnconfigure(1, weight=1)
 
     ttk.Label(parent, text="Titre du/des document(s) :", font=("Helvetica", 12)).grid(
         column=0, row=row, sticky="w", pady=10, padx=(0, 10))
-    titre_entry = ttk.Combobox(parent, font=("Helvetica", 12), values=load_titles())
+    titre_entry = ttk.Combobox(parent, font=("Helvetica", 12),
+                               values=ordonner_par_usage('titre', catalog_model.titres.elements))
     titre_entry.grid(column=1, row=row, sticky="ew", pady=10, padx=(0, 10))
-    
-    titre_widgets.append(titre_entry)
 
     def on_titre_added(event):
         nouveau_titre = titre_entry.get().strip()
-        if nouveau_titre and nouveau_titre not in titre_entry['values']:
-            save_title(nouveau_titre)
-            values = list(titre_entry['values'])
-            values.append(nouveau_titre)
-            titre_entry['values'] = tuple(values)
-            for widget in titre_widgets:
-                if widget != titre_entry:
-                    widget['values'] = titre_entry['values']
+        if nouveau_titre and nouveau_titre not in catalog_model.titres:
+            catalog_model.ajouter_titre(nouveau_titre)
+        if nouveau_titre:
+            catalog_model.choisir_titre(nouveau_titre)
     
     titre_entry.bind('<Return>', on_titre_added)
 
     def filter_titles(*args):
-        typed = titre_entry.get().lower()
+        typed = titre_entry.get()
         if typed:
-            filtered = [title for title in load_titles() if typed in title.lower()]
-            titre_entry['values'] = filtered
+            calcul = lambda: ordonner_par_usage('titre', rechercher_titres(typed))
         else:
-            titre_entry['values'] = load_titles()
+            calcul = lambda: ordonner_par_usage('titre', list(catalog_model.titres.elements))
+        rechercher_en_arriere_plan('titre_entry', calcul, lambda filtered: titre_entry.configure(values=filtered))
 
     titre_entry.bind('<KeyRelease>', filter_titles)
+    catalog_model.titres.abonner(AbonneWidget(
+        catalog_model.titres, titre_entry, est_filtre=lambda: bool(titre_entry.get()), refiltrer=filter_titles,
+        ordonner=catalog_model.par_usage('titre')))
 
     ttk.Label(parent, text="Nature du/des document(s) :", font=("Helvetica", 12)).grid(
         column=0, row=row+1, sticky="w", pady=10, padx=(0, 10))
@@ -533,8 +561,8 @@ def copier_travail_a_faire(travail_a_faire_text):
     else:
         messagebox.showwarning("Attention", "Aucun travail à faire n'a été saisi.")
 
-def create_bibliotheque_tab(parent):
-    global all_titles, all_grammar_points, titre_widgets, objectif_widgets
+def create_bibliotheque_tab(parent, language_var):
+    global all_titles, all_grammar_points
     frame = ttk.Frame(parent, padding="10")
     frame.grid(row=0, column=0, sticky="nsew")
     parent.grid_rowconfigure(0, weight=1)
@@ -552,40 +580,42 @@ def create_bibliotheque_tab(parent):
     titles_entry = ttk.Entry(titles_frame, font=("Helvetica", 12))
     titles_entry.grid(row=0, column=0, sticky="ew")
     
-    ttk.Button(titles_frame, text="Ajouter", command=lambda: ajouter_titre(titles_entry, titles_listbox, all_titles)).grid(row=0, column=1, padx=5)
-    ttk.Button(titles_frame, text="Supprimer", command=lambda: supprimer_titre(titles_listbox, all_titles)).grid(row=0, column=2)
+    ttk.Button(titles_frame, text="Ajouter", command=lambda: ajouter_titre(titles_entry)).grid(row=0, column=1, padx=5)
+    ttk.Button(titles_frame, text="Supprimer", command=lambda: supprimer_titre(titles_listbox)).grid(row=0, column=2)
 
-    titles_listbox = tk.Listbox(frame, height=5, font=("Helvetica", 12))
+    titles_listbox = ListeVirtuelle(frame, height=5, font=("Helvetica", 12))
     titles_listbox.grid(row=2, column=0, sticky="nsew", pady=(0, 10))
     frame.grid_rowconfigure(2, weight=1)
     
-    all_titles = load_titles()
-    titles_listbox.insert(tk.END, *all_titles)
-
-    titre_widgets.append(titles_listbox)
+    all_titles = catalog_model.titres.elements
+    titles_listbox.set_elements(all_titles)
 
     def filter_titles(*args):
-        search_term = titles_entry.get().lower()
-        titles_listbox.delete(0, tk.END)
-        for title in all_titles:
-            if search_term in title.lower():
-                titles_listbox.insert(tk.END, title)
+        search_term = titles_entry.get()
+        if search_term:
+            calcul = lambda: rechercher_titres_classes(search_term, LIMITE_SUGGESTIONS)
+        else:
+            calcul = lambda: list(catalog_model.titres.elements)
+
+        def appliquer(filtered):
+            titles_listbox.set_elements(filtered)
+
+        rechercher_en_arriere_plan('bibliotheque_titres', calcul, appliquer)
 
     titles_entry.bind('<KeyRelease>', lambda event: filter_titles(titles_entry, titles_listbox))
+    catalog_model.titres.abonner(AbonneWidget(
+        catalog_model.titres, titles_listbox, est_filtre=lambda: bool(titles_entry.get()), refiltrer=filter_titles))
 
     # Ajout du bouton Rafraîchir pour les titres
     def refresh_titles():
-        all_titles = load_titles()
-        titles_listbox.delete(0, tk.END)
-        titles_listbox.insert(tk.END, *all_titles)
-        for widget in titre_widgets:
-            if isinstance(widget, ttk.Combobox):
-                widget['values'] = all_titles
+        invalider_cache()
+        catalog_model.titres.recharger()
 
     ttk.Button(frame, text="Rafraîchir les titres", command=refresh_titles).grid(row=3, column=0, sticky="w", pady=(0, 10))
 
-    # Points grammaticaux
-    ttk.Label(frame, text="Points grammaticaux", font=("Helvetica", 14, "bold")).grid(row=4, column=0, sticky="w", pady=(20, 5))
+    # Points grammaticaux (de la langue sélectionnée)
+    points_label = ttk.Label(frame, font=("Helvetica", 14, "bold"))
+    points_label.grid(row=4, column=0, sticky="w", pady=(20, 5))
     
     grammar_frame = ttk.Frame(frame)
     grammar_frame.grid(row=5, column=0, sticky="ew", pady=(0, 5))
@@ -594,35 +624,53 @@ def create_bibliotheque_tab(parent):
     grammar_entry = ttk.Entry(grammar_frame, font=("Helvetica", 12))
     grammar_entry.grid(row=0, column=0, sticky="ew")
     
-    ttk.Button(grammar_frame, text="Ajouter", command=lambda: ajouter_point_grammatical(grammar_entry, grammar_listbox, all_grammar_points)).grid(row=0, column=1, padx=5)
-    ttk.Button(grammar_frame, text="Supprimer", command=lambda: supprimer_point_grammatical(grammar_listbox, all_grammar_points)).grid(row=0, column=2)
+    ttk.Button(grammar_frame, text="Ajouter", command=lambda: ajouter_point_grammatical(grammar_entry, language_var.get())).grid(row=0, column=1, padx=5)
+    ttk.Button(grammar_frame, text="Supprimer", command=lambda: supprimer_point_grammatical(grammar_listbox, language_var.get())).grid(row=0, column=2)
 
-    grammar_listbox = tk.Listbox(frame, height=5, font=("Helvetica", 12))
+    grammar_listbox = ListeVirtuelle(frame, height=5, font=("Helvetica", 12))
     grammar_listbox.grid(row=6, column=0, sticky="nsew", pady=(0, 10))
     frame.grid_rowconfigure(6, weight=1)
     
-    all_grammar_points = get_grammar_points("Espagnol")  # Assurez-vous que la langue est correcte
-    grammar_listbox.insert(tk.END, *all_grammar_points)
-
-    objectif_widgets.append(grammar_listbox)
+    abonnement = {}
 
     def filter_grammar_points(*args):
-        search_term = grammar_entry.get().lower()
-        grammar_listbox.delete(0, tk.END)
-        for point in all_grammar_points:
-            if search_term in point.lower():
-                grammar_listbox.insert(tk.END, point)
+        search_term = grammar_entry.get()
+        language = language_var.get()
+        if search_term:
+            calcul = lambda: rechercher_points_classes(language, search_term, LIMITE_SUGGESTIONS)
+        else:
+            modele = catalog_model.modele_points(language)
+            calcul = lambda: list(modele.elements)
+
+        def appliquer(filtered):
+            grammar_listbox.set_elements(filtered)
+
+        rechercher_en_arriere_plan('bibliotheque_points', calcul, appliquer)
+
+    def suivre_langue(*args):
+        global all_grammar_points
+        # La liste suit la langue choisie : on change d'abonnement de modèle
+        if 'abonne' in abonnement:
+            abonnement['abonne'].modele.desabonner(abonnement['abonne'])
+        language = language_var.get()
+        modele = catalog_model.modele_points(language)
+        points_label.configure(text=f"Points grammaticaux ({language})")
+        all_grammar_points = modele.elements
+        if grammar_entry.get():
+            filter_grammar_points()
+        else:
+            grammar_listbox.set_elements(all_grammar_points)
+        abonnement['abonne'] = modele.abonner(AbonneWidget(
+            modele, grammar_listbox, est_filtre=lambda: bool(grammar_entry.get()), refiltrer=filter_grammar_points))
 
     grammar_entry.bind('<KeyRelease>', filter_grammar_points)
+    suivre_langue()
+    language_var.trace_add("write", suivre_langue)
 
     # Ajout du bouton Rafraîchir pour les points grammaticaux
     def refresh_grammar_points():
-        all_grammar_points = get_grammar_points("Espagnol")
-        grammar_listbox.delete(0, tk.END)
-        grammar_listbox.insert(tk.END, *all_grammar_points)
-        for widget in objectif_widgets:
-            if isinstance(widget, ttk.Combobox):
-                widget['values'] = all_grammar_points
+        invalider_cache()
+        catalog_model.modele_points(language_var.get()).recharger()
 
     ttk.Button(frame, text="Rafraîchir les points grammaticaux", command=refresh_grammar_points).grid(row=7, column=0, sticky="w", pady=(0, 10))
 
@@ -630,102 +678,101 @@ def create_bibliotheque_tab(parent):
             'grammar_entry': grammar_entry, 'grammar_listbox': grammar_listbox}
 
 
-def update_titre_listboxes(new_titre):
-    global all_titles, titre_widgets
-    
-    if new_titre and new_titre not in all_titles:
-        all_titles.append(new_titre)
-        all_titles.sort()  # Trier la liste des titres
-        
-        for widget in titre_widgets:
-            if isinstance(widget, tk.Listbox):
-                widget.delete(0, tk.END)
-                for titre in all_titles:
-                    widget.insert(tk.END, titre)
-            elif isinstance(widget, ttk.Combobox):
-                values = list(widget['values'])
-                if new_titre not in values:
-                    values.append(new_titre)
-                    values.sort()
-                    widget['values'] = tuple(values)
-
-    return all_titles  # Retourner la liste mise à jour
-
-def update_grammar_listboxes(new_point):
-    global all_grammar_points, grammar_listbox, objectifs_dropdown
-    
-    if new_point and new_point not in all_grammar_points:
-        all_grammar_points.append(new_point)
-    
-        if grammar_listbox:
-            grammar_listbox.insert(tk.END, new_point)
-    
-        if objectifs_dropdown:
-            values = list(objectifs_dropdown['values'])
-            values.append(new_point)
-            objectifs_dropdown['values'] = tuple(set(values))  # Utiliser un set pour éliminer les doublons
-    
-        # Trier la liste des points grammaticaux
-        all_grammar_points.sort()
-        
-        # Mettre à jour l'ordre dans la listbox si elle existe
-        if grammar_listbox:
-            grammar_listbox.delete(0, tk.END)
-            for point in all_grammar_points:
-                grammar_listbox.insert(tk.END, point)
+def create_historique_tab(parent, language_var):
+    frame = ttk.Frame(parent, padding="10")
+    frame.pack(fill=tk.BOTH, expand=True)
+    frame.grid_columnconfigure(0, weight=1)
+    frame.grid_rowconfigure(1, weight=1)
+    frame.grid_rowconfigure(2, weight=1)
 
-    return all_grammar_points  # Retourner la liste mise à jour
+    filtres = ttk.Frame(frame)
+    filtres.grid(row=0, column=0, columnspan=2, sticky="ew", pady=(0, 5))
+    ttk.Label(filtres, text="Classe :").pack(side=tk.LEFT)
+    classe_filtre = ttk.Combobox(filtres, font=("Helvetica", 12), values=[""] + get_lesson_classes())
+    classe_filtre.pack(side=tk.LEFT, padx=5)
+    langue_seule = tk.BooleanVar(value=False)
+    ttk.Checkbutton(filtres, text="Langue sélectionnée uniquement", variable=langue_seule).pack(side=tk.LEFT, padx=5)
+
+    colonnes = ('date', 'classe', 'titre', 'axe')
+    arbre = ttk.Treeview(frame, columns=colonnes, show='headings', height=10)
+    for colonne, titre, largeur in zip(colonnes, ("Date", "Classe", "Titre", "Axe"), (100, 80, 300, 250)):
+        arbre.heading(colonne, text=titre)
+        arbre.column(colonne, width=largeur, stretch=colonne in ('titre', 'axe'))
+    arbre.grid(row=1, column=0, sticky="nsew")
+    scrollbar = ttk.Scrollbar(frame, orient=tk.VERTICAL, command=arbre.yview)
+    scrollbar.grid(row=1, column=1, sticky="ns")
+
+    texte_lecon = tk.Text(frame, height=10, font=("Helvetica", 12), wrap=tk.WORD)
+    texte_lecon.grid(row=2, column=0, columnspan=2, sticky="nsew", pady=(10, 0))
+
+    # Pagination par clé : on ne charge la page suivante que lorsque la fin de la liste devient visible
+    etat = {'curseur': None, 'fin': True, 'attente': None}
+
+    def charger_page():
+        language = language_var.get() if langue_seule.get() else None
+        lignes, curseur = get_lessons_page(classe_filtre.get().strip() or None, language, etat['curseur'])
+        for lesson_id, date_lecon, classe, titre, axe in lignes:
+            arbre.insert('', tk.END, iid=str(lesson_id), values=(date_lecon, classe, titre, axe))
+        etat['curseur'] = curseur
+        etat['fin'] = curseur is None
+
+    def reprendre():
+        etat['attente'] = None
+        recharger()
+
+    def recharger(*args):
+        if ecritures_en_attente():
+            # Une séance encore en file n'apparaîtrait pas : nouvel essai plus tard, sans bloquer Tk
+            if etat['attente'] is None:
+                etat['attente'] = frame.after(INTERVALLE_ATTENTE_ECRITURES_MS, reprendre)
+            return
+        arbre.delete(*arbre.get_children())
+        texte_lecon.delete("1.0", tk.END)
+        etat['curseur'] = None
+        charger_page()
+        classe_filtre['values'] = [""] + get_lesson_classes()
+
+    def on_defilement(premier, dernier):
+        scrollbar.set(premier, dernier)
+        if not etat['fin'] and float(dernier) >= 0.95:
+            # after_idle : ne pas modifier l'arbre pendant qu'il calcule son affichage
+            etat['fin'] = True
+            arbre.after_idle(charger_page)
+
+    def on_selection(event):
+        selection = arbre.selection()
+        if selection:
+            lecon = get_lesson(int(selection[0]))
+            texte_lecon.delete("1.0", tk.END)
+            if lecon is not None:
+                texte_lecon.insert(tk.END, lecon['texte'])
+
+    arbre.configure(yscrollcommand=on_defilement)
+    arbre.bind('<<TreeviewSelect>>', on_selection)
+    classe_filtre.bind('<<ComboboxSelected>>', recharger)
+    classe_filtre.bind('<Return>', recharger)
+    langue_seule.trace_add('write', recharger)
+    ttk.Button(frame, text="Rafraîchir l'historique", command=recharger).grid(row=3, column=0, sticky="w", pady=(10, 0))
+
+    recharger()
+
+    return {'historique_tree': arbre, 'historique_classe': classe_filtre, 'historique_texte': texte_lecon}
 
-def remove_from_titre_listboxes(titre):
-    global all_titles, titles_listbox, titre_entry
-    
-    if titre in all_titles:
-        all_titles.remove(titre)
-    
-        if titles_listbox:
-            try:
-                index = titles_listbox.get(0, tk.END).index(titre)
-                titles_listbox.delete(index)
-            except ValueError:
-                print(f"Le titre '{titre}' n'a pas été trouvé dans la listbox.")
-    
-        if titre_entry:
-            values = list(titre_entry['values'])
-            if titre in values:
-                values.remove(titre)
-                titre_entry['values'] = tuple(values)  # Convertir en tuple pour la cohérence
-    
-        # Optionnel : mettre à jour l'ordre dans la listbox
-        if titles_listbox:
-            titles_listbox.delete(0, tk.END)
-            for t in all_titles:
-                titles_listbox.insert(tk.END, t)
+def update_titre_listboxes(new_titre):
+    # Le modèle envoie l'insertion à tous les widgets abonnés, à la bonne position
+    if new_titre:
+        catalog_model.ajouter_titre(new_titre)
+    return catalog_model.titres.elements  # Retourner la liste mise à jour
 
-    return all_titles  # Retourner la liste mise à jour
+def update_grammar_listboxes(new_point, language="Espagnol"):
+    if new_point:
+        catalog_model.ajouter_point(language, new_point)
+    return catalog_model.modele_points(language).elements  # Retourner la liste mise à jour
 
-def remove_from_grammar_listboxes(point):
-    global all_grammar_points, grammar_listbox, objectifs_dropdown
-    
-    if point in all_grammar_points:
-        all_grammar_points.remove(point)
-    
-        if grammar_listbox:
-            try:
-                index = grammar_listbox.get(0, tk.END).index(point)
-                grammar_listbox.delete(index)
-            except ValueError:
-                print(f"Le point grammatical '{point}' n'a pas été trouvé dans la listbox.")
-    
-        if objectifs_dropdown:
-            values = list(objectifs_dropdown['values'])
-            if point in values:
-                values.remove(point)
-                objectifs_dropdown['values'] = tuple(values)  # Convertir en tuple pour la cohérence
-    
-        # Optionnel : mettre à jour l'ordre dans la listbox
-        if grammar_listbox:
-            grammar_listbox.delete(0, tk.END)
-            for p in all_grammar_points:
-                grammar_listbox.insert(tk.END, p)
+def remove_from_titre_listboxes(titre):
+    catalog_model.retirer_titre(titre)
+    return catalog_model.titres.elements  # Retourner la liste mise à jour
 
-    return all_grammar_points  # Retourner la liste mise à jour
\ No newline at end of file
+def remove_from_grammar_listboxes(point, language="Espagnol"):
+    catalog_model.retirer_point(language, point)
+    return catalog_model.modele_points(language).elements  # Retourner la liste mise à jour
@@ -0,0 +1,241 @@
+"""
+import_export.py
+
+Ce module importe et exporte en masse les bibliothèques de titres et de points grammaticaux
+du Cahier de textes portable, sans interface graphique.
+
+Les équipes pédagogiques échangent des bibliothèques de plusieurs milliers d'entrées. Au lieu
+d'ajouter les entrées une à une (ajouter_titre, ajouter_point_grammatical), les fichiers CSV
+(une ligne d'en-tête) ou JSON Lines (un objet par ligne) sont lus au fil de l'eau par un
+générateur (batch.lire_enregistrements) : la mémoire utilisée ne dépend pas de la taille du fichier.
+
+Chaque entrée a les champs :
+- type : 'titre' ou 'point' (facultatif : 'point' si une langue est indiquée, sinon 'titre') ;
+- valeur : le titre ou le point grammatical (les colonnes 'titre' et 'point' sont aussi acceptées) ;
+- langue : la langue du point grammatical (ignorée pour les titres).
+
+Import : les entrées sont regroupées par blocs de TAILLE_BLOC et écrites avec executemany, un bloc
+par transaction. Les doublons (dans le fichier ou déjà en base) sont ignorés grâce aux index UNIQUE
+de 'titles' et 'grammar_points' (INSERT OR IGNORE). Les entrées vides ou d'une langue inconnue sont
+comptées comme rejetées, de même que les lignes JSON qui ne sont pas des objets ; les champs qui ne
+sont pas des chaînes (nombres...) sont convertis en texte. Le cache du catalogue (catalog_cache) est
+vidé à la fin.
+
+Export : les lignes sont lues depuis un curseur (sans tri : l'ordre n'a pas d'importance à
+l'import) et écrites une à une ; le fichier produit peut être réimporté tel quel.
+
+Fonctions principales :
+- importer : Importe un fichier dans la base ; renvoie les compteurs (lues, ajoutées, rejetées).
+- exporter : Écrit les titres et/ou les points grammaticaux dans un fichier.
+- main_import / main_export : Points d'entrée en ligne de commande
+  (python Cahier_de_textes_v12.py import|export ...).
+"""
+
+import argparse
+import csv
+import json
+import sqlite3
+import sys
+import time
+
+import catalog_cache
+import database
+import db_pool
+from batch import deduire_format, lire_enregistrements
+
+TAILLE_BLOC = 5000
+# Délai minimal entre deux messages de progression (en secondes)
+INTERVALLE_PROGRESSION = 0.5
+CHAMPS_EXPORT = ['type', 'langue', 'valeur']
+
+
+class Compteurs:
+    __slots__ = ('lues', 'ajoutees', 'rejetees')
+
+    def __init__(self):
+        self.lues = 0
+        self.ajoutees = 0
+        self.rejetees = 0
+
+    def __repr__(self):
+        return f"Compteurs(lues={self.lues}, ajoutees={self.ajoutees}, rejetees={self.rejetees})"
+
+
+def _texte(valeur):
+    # JSON Lines : un champ peut être un nombre, une liste...
+    return '' if valeur is None else str(valeur).strip()
+
+
+def _normaliser(enregistrement):
+    """Renvoie (type, langue, valeur) ou None si l'entrée est inutilisable."""
+    if not isinstance(enregistrement, dict):
+        # Ligne JSON valide mais qui n'est pas un objet (["x"], 42...)
+        return None
+    langue = _texte(enregistrement.get('langue') or enregistrement.get('language'))
+    type_entree = _texte(enregistrement.get('type')).lower()
+    if not type_entree:
+        type_entree = 'point' if langue or enregistrement.get('point') else 'titre'
+    valeur = _texte(enregistrement.get('valeur') or enregistrement.get(type_entree))
+    if not valeur or type_entree not in ('titre', 'point') or (type_entree == 'point' and not langue):
+        return None
+    return type_entree, langue, valeur
+
+
+def _ecrire_bloc(titres, points):
+    # rowcount d'executemany : lignes réellement insérées (sans les doublons ni les triggers FTS)
+    def ecrire(c):
+        ajoutees = 0
+        if titres:
+            c.executemany("INSERT OR IGNORE INTO titles (title) VALUES (?)", titres)
+            ajoutees += c.rowcount
+        if points:
+            c.executemany("INSERT OR IGNORE INTO grammar_points (language_id, point) VALUES (?, ?)", points)
+            ajoutees += c.rowcount
+        return ajoutees
+    # Bloc rejoué entier si un autre poste écrit au même moment (voir db_pool)
+    return db_pool.executer_transaction(ecrire)
+
+
+def importer(chemin, format_fichier=None, progression=None, taille_bloc=TAILLE_BLOC):
+    """Importe les titres et points grammaticaux de chemin ; progression(compteurs) après chaque bloc."""
+    compteurs = Compteurs()
+    titres = []
+    points = []
+    ids_langues = {}
+    c = db_pool.get_connection().cursor()
+    try:
+        # Les lignes qui ne sont pas des objets sont comptées comme rejetées (_normaliser)
+        for enregistrement in lire_enregistrements(chemin, format_fichier, objets_seulement=False):
+            compteurs.lues += 1
+            entree = _normaliser(enregistrement)
+            if entree is None:
+                compteurs.rejetees += 1
+                continue
+            type_entree, langue, valeur = entree
+            if type_entree == 'titre':
+                titres.append((valeur,))
+            else:
+                if langue not in ids_langues:
+                    ids_langues[langue] = database.language_id(langue, c)
+                if ids_langues[langue] is None:
+                    compteurs.rejetees += 1
+                    continue
+                points.append((ids_langues[langue], valeur))
+            if len(titres) + len(points) >= taille_bloc:
+                compteurs.ajoutees += _ecrire_bloc(titres, points)
+                titres.clear()
+                points.clear()
+                if progression is not None:
+                    progression(compteurs)
+        if titres or points:
+            compteurs.ajoutees += _ecrire_bloc(titres, points)
+    finally:
+        c.close()
+        # Même en cas d'erreur, les blocs déjà validés sont en base
+        catalog_cache.invalider()
+    if progression is not None:
+        progression(compteurs)
+    return compteurs
+
+
+def _lignes_export(types):
+    c = db_pool.get_connection().cursor()
+    try:
+        if 'titres' in types:
+            c.execute(database.SQL_TITRES)
+            for (titre,) in c:
+                yield {'type': 'titre', 'langue': '', 'valeur': titre}
+        if 'points' in types:
+            c.execute(database.SQL_POINTS_TOUTES_LANGUES)
+            for lang_id, langue, point in c:
+                if point is not None:
+                    yield {'type': 'point', 'langue': langue, 'valeur': point}
+    finally:
+        c.close()
+
+
+def exporter(chemin, format_fichier=None, types=('titres', 'points'), progression=None):
+    """Écrit les entrées demandées dans chemin ('-' pour la sortie standard) ; renvoie leur nombre."""
+    format_fichier = deduire_format(chemin, format_fichier)
+    destination = sys.stdout if chemin == '-' else open(chemin, 'w', encoding='utf-8', newline='')
+    nombre = 0
+    try:
+        if format_fichier == 'csv':
+            ecrivain = csv.DictWriter(destination, fieldnames=CHAMPS_EXPORT)
+            ecrivain.writeheader()
+            ecrire = ecrivain.writerow
+        else:
+            def ecrire(ligne):
+                destination.write(json.dumps(ligne, ensure_ascii=False) + "\n")
+        for ligne in _lignes_export(types):
+            ecrire(ligne)
+            nombre += 1
+            if progression is not None and nombre % TAILLE_BLOC == 0:
+                progression(nombre)
+    finally:
+        if destination is not sys.stdout:
+            destination.close()
+    return nombre
+
+
+def _afficheur_progression(message):
+    dernier = [0.0]
+
+    def afficher(valeur, force=False):
+        maintenant = time.perf_counter()
+        if force or maintenant - dernier[0] >= INTERVALLE_PROGRESSION:
+            dernier[0] = maintenant
+            print("\r" + message(valeur), end="", file=sys.stderr, flush=True)
+    return afficher
+
+
+def _preparer_base(chemin_base):
+    if chemin_base is not None:
+        db_pool.configurer(chemin=chemin_base)
+    database.init_database()
+
+
+def main_import(arguments=None):
+    parser = argparse.ArgumentParser(
+        prog="Cahier_de_textes_v12.py import",
+        description="Importe des titres et des points grammaticaux (CSV ou JSON Lines) dans la base.")
+    parser.add_argument("entree", help="fichier .csv ou .jsonl ('-' pour l'entrée standard)")
+    parser.add_argument("-f", "--format", choices=['csv', 'jsonl'], help="format d'entrée (déduit de l'extension par défaut)")
+    parser.add_argument("--base", default=None, help=f"base de données (par défaut {db_pool.DB_PATH})")
+    parser.add_argument("--taille-bloc", type=int, default=TAILLE_BLOC, help="entrées écrites par transaction")
+    args = parser.parse_args(arguments)
+    afficher = _afficheur_progression(
+        lambda n: f"{n.lues} lue(s), {n.ajoutees} ajoutée(s), {n.rejetees} rejetée(s)")
+    debut = time.perf_counter()
+    try:
+        _preparer_base(args.base)
+        compteurs = importer(args.entree, args.format, afficher, max(1, args.taille_bloc))
+    except (OSError, ValueError, sqlite3.Error) as e:
+        print(f"\nUne erreur est survenue : {e}", file=sys.stderr)
+        return 1
+    afficher(compteurs, force=True)
+    doublons = compteurs.lues - compteurs.ajoutees - compteurs.rejetees
+    print(f"\n{compteurs.ajoutees} entrée(s) ajoutée(s), {doublons} doublon(s) ignoré(s), "
+          f"{compteurs.rejetees} rejetée(s) en {time.perf_counter() - debut:.1f} s.", file=sys.stderr)
+    return 0
+
+
+def main_export(arguments=None):
+    parser = argparse.ArgumentParser(
+        prog="Cahier_de_textes_v12.py export",
+        description="Exporte les titres et les points grammaticaux de la base (CSV ou JSON Lines).")
+    parser.add_argument("sortie", help="fichier .csv ou .jsonl ('-' pour la sortie standard)")
+    parser.add_argument("-f", "--format", choices=['csv', 'jsonl'], help="format de sortie (déduit de l'extension par défaut)")
+    parser.add_argument("--base", default=None, help=f"base de données (par défaut {db_pool.DB_PATH})")
+    parser.add_argument("--type", choices=['titres', 'points', 'tout'], default='tout', help="entrées à exporter")
+    args = parser.parse_args(arguments)
+    types = ('titres', 'points') if args.type == 'tout' else (args.type,)
+    afficher = _afficheur_progression(lambda n: f"{n} entrée(s) exportée(s)")
+    try:
+        _preparer_base(args.base)
+        nombre = exporter(args.sortie, args.format, types, afficher)
+    except (OSError, sqlite3.Error) as e:
+        print(f"\nUne erreur est survenue : {e}", file=sys.stderr)
+        return 1
+    print(f"\r{nombre} entrée(s) exportée(s).", file=sys.stderr)
+    return 0
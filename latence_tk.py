@@ -0,0 +1,212 @@
+"""
+latence_tk.py
+
+Ce module mesure la latence des gestionnaires d'événements Tk de l'application "Cahier de textes portable".
+
+Les callbacks Python passés à Tk (command=, bind, trace_add...) sont enregistrés par
+tkinter.Misc._register. installer() remplace cette méthode : les callbacks définis dans les modules
+surveillés (gui et utils par défaut) sont enveloppés dans un chronomètre. Misc.after enregistre
+à la place sa propre fonction interne (callit, du module tkinter) : installer() remplace donc aussi
+Misc.after, et after_idle, qui passe par after, est couvert du même coup. valider_objectif,
+on_titre_added, les filtres à la frappe, generer_texte_final, etc. sont ainsi mesurés sans modifier
+les endroits où ils sont branchés. Les callbacks des autres modules (ListeVirtuelle, pipeline de
+recherche, ttkbootstrap) ne sont pas touchés.
+
+Pour chaque gestionnaire : nombre d'appels, temps total, p50 / p95 / p99, maximum, histogramme
+par tranches de durée, et nombre d'appels qui ont bloqué la boucle Tk plus de SEUIL_BLOCAGE_MS.
+Le rapport est écrit à la sortie du programme.
+
+Activation par la variable d'environnement CAHIER_LATENCE_TK :
+- CAHIER_LATENCE_TK=1 : rapport texte sur la sortie d'erreur ;
+- CAHIER_LATENCE_TK=chemin/latence.json : rapport JSON dans ce fichier.
+
+Fonctions principales :
+- installer : Enveloppe les callbacks des modules surveillés (à appeler avant de créer l'interface).
+- envelopper_callbacks : Mécanisme générique d'enveloppe des callbacks Tk (réutilisé par sql_trace).
+- statistiques : Renvoie les mesures par gestionnaire.
+- rapport : Renvoie le rapport texte.
+- ecrire_rapport : Écrit le rapport (appelé automatiquement à la sortie).
+"""
+
+import atexit
+import functools
+import json
+import os
+import random
+import sys
+import threading
+import time
+from bisect import bisect_left
+
+VARIABLE_ENVIRONNEMENT = 'CAHIER_LATENCE_TK'
+MODULES_SURVEILLES = ('gui', 'utils')
+SEUIL_BLOCAGE_MS = 50
+# Bornes supérieures des tranches de l'histogramme, en millisecondes
+TRANCHES_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, float('inf'))
+# Échantillons conservés par gestionnaire pour les percentiles (échantillonnage par réservoir)
+TAILLE_RESERVOIR = 10_000
+
+_mesures = {}
+_verrou = threading.Lock()
+_installe = False
+_destination = None
+
+
+class _Mesure:
+    __slots__ = ('appels', 'total_ms', 'max_ms', 'bloquants', 'tranches', 'echantillons', 'erreurs')
+
+    def __init__(self):
+        self.appels = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.bloquants = 0
+        self.erreurs = 0
+        self.tranches = [0] * len(TRANCHES_MS)
+        self.echantillons = []
+
+    def ajouter(self, duree_ms):
+        self.appels += 1
+        self.total_ms += duree_ms
+        self.max_ms = max(self.max_ms, duree_ms)
+        if duree_ms > SEUIL_BLOCAGE_MS:
+            self.bloquants += 1
+        self.tranches[bisect_left(TRANCHES_MS, duree_ms)] += 1
+        if len(self.echantillons) < TAILLE_RESERVOIR:
+            self.echantillons.append(duree_ms)
+        else:
+            position = random.randrange(self.appels)
+            if position < TAILLE_RESERVOIR:
+                self.echantillons[position] = duree_ms
+
+
+def _percentile(valeurs_triees, p):
+    if not valeurs_triees:
+        return 0.0
+    rang = min(len(valeurs_triees) - 1, max(0, round(p / 100 * len(valeurs_triees)) - 1))
+    return valeurs_triees[rang]
+
+
+def nom_callback(func):
+    cible = getattr(func, '__func__', func)
+    nom = getattr(cible, '__qualname__', repr(cible))
+    code = getattr(cible, '__code__', None)
+    ligne = f":{code.co_firstlineno}" if code is not None else ""
+    return f"{getattr(cible, '__module__', '?')}.{nom}{ligne}"
+
+
+def _a_mesurer(func, modules):
+    cible = getattr(func, '__func__', func)
+    return getattr(cible, '__module__', None) in modules
+
+
+def envelopper_callbacks(fabrique, modules=MODULES_SURVEILLES):
+    """Remplace chaque callback Tk des modules indiqués par fabrique(func, nom) au moment de son enregistrement
+    (ou de son passage à after / after_idle).
+
+    Les enveloppes s'empilent : latence_tk et sql_trace peuvent être actifs en même temps.
+    """
+    import tkinter as tk
+
+    register_precedent = tk.Misc._register
+    after_precedent = tk.Misc.after
+    modules = tuple(modules)
+
+    def _register(self, func, subst=None, needcleanup=1):
+        if _a_mesurer(func, modules):
+            func = fabrique(func, nom_callback(func))
+        return register_precedent(self, func, subst, needcleanup)
+
+    def after(self, ms, func=None, *args):
+        if func is not None and _a_mesurer(func, modules):
+            func = fabrique(func, nom_callback(func))
+        return after_precedent(self, ms, func, *args)
+
+    tk.Misc._register = _register
+    tk.Misc.after = after
+
+
+def _chronometrer(func, nom):
+    @functools.wraps(func)
+    def chronometre(*args):
+        debut = time.perf_counter()
+        erreur = False
+        try:
+            return func(*args)
+        except BaseException:
+            erreur = True
+            raise
+        finally:
+            duree_ms = (time.perf_counter() - debut) * 1000
+            with _verrou:
+                mesure = _mesures.get(nom)
+                if mesure is None:
+                    mesure = _mesures[nom] = _Mesure()
+                mesure.ajouter(duree_ms)
+                mesure.erreurs += erreur
+    return chronometre
+
+
+def installer(modules=MODULES_SURVEILLES, destination=None):
+    """Enveloppe les callbacks Tk des modules indiqués ; renvoie False si déjà installé."""
+    global _installe, _destination
+    if _installe:
+        return False
+    envelopper_callbacks(_chronometrer, modules)
+    _installe = True
+    _destination = destination or os.environ.get(VARIABLE_ENVIRONNEMENT) or '1'
+    atexit.register(ecrire_rapport)
+    return True
+
+
+def installer_si_demande():
+    destination = os.environ.get(VARIABLE_ENVIRONNEMENT, '').strip()
+    if destination not in ('', '0'):
+        installer(destination=destination)
+
+
+def statistiques():
+    with _verrou:
+        copie = {nom: (m.appels, m.total_ms, m.max_ms, m.bloquants, m.erreurs, list(m.tranches),
+                       sorted(m.echantillons))
+                 for nom, m in _mesures.items()}
+    resultat = {}
+    for nom, (appels, total, maximum, bloquants, erreurs, tranches, echantillons) in copie.items():
+        resultat[nom] = {
+            'appels': appels,
+            'total_ms': round(total, 3),
+            'p50_ms': round(_percentile(echantillons, 50), 3),
+            'p95_ms': round(_percentile(echantillons, 95), 3),
+            'p99_ms': round(_percentile(echantillons, 99), 3),
+            'max_ms': round(maximum, 3),
+            f'bloquants_{SEUIL_BLOCAGE_MS}ms': bloquants,
+            'erreurs': erreurs,
+            'histogramme': {(f"<={borne:g}ms" if borne != float('inf') else f">{TRANCHES_MS[-2]:g}ms"): nombre
+                            for borne, nombre in zip(TRANCHES_MS, tranches) if nombre},
+        }
+    return resultat
+
+
+def rapport():
+    stats = statistiques()
+    if not stats:
+        return "Aucun gestionnaire Tk mesuré."
+    lignes = [f"{'Gestionnaire':<70} {'appels':>7} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>9} "
+              f"{f'>{SEUIL_BLOCAGE_MS}ms':>7}"]
+    for nom, s in sorted(stats.items(), key=lambda item: item[1]['total_ms'], reverse=True):
+        lignes.append(f"{nom[-70:]:<70} {s['appels']:>7} {s['p50_ms']:>8.2f} {s['p95_ms']:>8.2f} "
+                      f"{s['p99_ms']:>8.2f} {s['max_ms']:>9.2f} {s[f'bloquants_{SEUIL_BLOCAGE_MS}ms']:>7}")
+    return "\n".join(lignes)
+
+
+def ecrire_rapport():
+    if not _mesures or _destination is None:
+        return
+    try:
+        if _destination == '1':
+            print("Latence des gestionnaires Tk (ms) :\n" + rapport(), file=sys.stderr)
+        else:
+            with open(_destination, 'w', encoding='utf-8') as f:
+                json.dump({'seuil_blocage_ms': SEUIL_BLOCAGE_MS, 'gestionnaires': statistiques()},
+                          f, ensure_ascii=False, indent=2)
+    except (OSError, AttributeError) as e:
+        print(f"Une erreur est survenue : {e}")
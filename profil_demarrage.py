@@ -0,0 +1,101 @@
+"""
+profil_demarrage.py
+
+Ce module mesure le temps de démarrage de l'application "Cahier de textes portable".
+
+Le profil est désactivé par défaut : phase, marquer et journal ne coûtent alors presque rien.
+Pour l'activer, définir la variable d'environnement CAHIER_PROFIL_DEMARRAGE :
+- CAHIER_PROFIL_DEMARRAGE=1 : le profil est écrit sur la sortie d'erreur ;
+- CAHIER_PROFIL_DEMARRAGE=chemin/profil.jsonl : le profil est ajouté à ce fichier.
+
+Chaque démarrage produit une ligne JSON : les phases (nom, début et durée en millisecondes
+depuis l'import de ce module) et les événements ponctuels (messages de progression,
+premier affichage). Le fichier peut ainsi être comparé d'une version à l'autre ou d'un
+poste à l'autre.
+
+Fonctions principales :
+- phase : Gestionnaire de contexte qui mesure une phase du démarrage.
+- marquer : Enregistre un événement ponctuel (avec des données facultatives).
+- journal : Remplace les print de progression ; enregistré seulement si le profil est actif.
+- ecrire : Écrit le profil (appelé au premier affichage, puis à la sortie si besoin).
+"""
+
+import atexit
+import json
+import os
+import sys
+import time
+from contextlib import nullcontext
+
+VARIABLE_ENVIRONNEMENT = 'CAHIER_PROFIL_DEMARRAGE'
+
+_origine = time.perf_counter()
+_destination = os.environ.get(VARIABLE_ENVIRONNEMENT, '').strip()
+actif = _destination not in ('', '0')
+
+_phases = []
+_evenements = []
+_ecrit = False
+
+
+def _maintenant_ms():
+    return round((time.perf_counter() - _origine) * 1000, 2)
+
+
+class _Phase:
+    def __init__(self, nom):
+        self.nom = nom
+
+    def __enter__(self):
+        self.debut = _maintenant_ms()
+        return self
+
+    def __exit__(self, type_erreur, erreur, trace):
+        entree = {'nom': self.nom, 'debut_ms': self.debut,
+                  'duree_ms': round(_maintenant_ms() - self.debut, 2)}
+        if type_erreur is not None:
+            entree['erreur'] = repr(erreur)
+        _phases.append(entree)
+        return False
+
+
+def phase(nom):
+    return _Phase(nom) if actif else nullcontext()
+
+
+def marquer(nom, **donnees):
+    if actif:
+        _evenements.append({'nom': nom, 't_ms': _maintenant_ms(), **donnees})
+
+
+def journal(message):
+    marquer('journal', message=message)
+
+
+def ecrire():
+    global _ecrit
+    if not actif or _ecrit:
+        return
+    _ecrit = True
+    profil = {
+        'horodatage': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': sys.version.split()[0],
+        'executable': bool(getattr(sys, 'frozen', False)),
+        'total_ms': _maintenant_ms(),
+        'phases': _phases,
+        'evenements': _evenements,
+    }
+    ligne = json.dumps(profil, ensure_ascii=False)
+    try:
+        if _destination == '1':
+            print(ligne, file=sys.stderr)
+        else:
+            with open(_destination, 'a', encoding='utf-8') as f:
+                f.write(ligne + "\n")
+    except (OSError, AttributeError) as e:
+        # Exécutable fenêtré : sys.stderr peut être None
+        print(f"Une erreur est survenue : {e}")
+
+
+if actif:
+    atexit.register(ecrire)
@@ -0,0 +1,105 @@
+"""
+search_index.py
+
+Ce module fournit un index inversé de trigrammes pour la recherche de sous-chaînes
+dans les titres de documents et les points grammaticaux.
+
+Chaque élément reçoit un identifiant croissant (l'ordre d'insertion est conservé) et sa clé
+en minuscules (casefold) est calculée une seule fois. Une recherche 'typed in titre' :
+1. découpe le texte saisi en trigrammes ;
+2. intersecte les listes d'identifiants (posting lists), en partant de la plus courte ;
+3. vérifie la sous-chaîne sur les seuls candidats restants.
+
+Les saisies de moins de trois caractères sont traitées par un simple parcours des clés
+précalculées. L'index accepte les ajouts et suppressions incrémentaux.
+
+Classe principale :
+- IndexTrigrammes : ajouter, retirer, rechercher.
+"""
+
+import heapq
+
+
+def _trigrammes(cle):
+    return {cle[i:i + 3] for i in range(len(cle) - 2)}
+
+
+class IndexTrigrammes:
+    def __init__(self, elements=()):
+        self._elements = {}   # identifiant -> élément
+        self._cles = {}       # identifiant -> clé casefold
+        self._ids = {}        # élément -> identifiant
+        self._postings = {}   # trigramme -> ensemble d'identifiants
+        self._prochain_id = 0
+        for element in elements:
+            self.ajouter(element)
+
+    def __len__(self):
+        return len(self._elements)
+
+    def __contains__(self, element):
+        return element in self._ids
+
+    def ajouter(self, element):
+        if element in self._ids:
+            return
+        identifiant = self._prochain_id
+        self._prochain_id += 1
+        cle = element.casefold()
+        self._elements[identifiant] = element
+        self._cles[identifiant] = cle
+        self._ids[element] = identifiant
+        for trigramme in _trigrammes(cle):
+            self._postings.setdefault(trigramme, set()).add(identifiant)
+
+    def retirer(self, element):
+        identifiant = self._ids.pop(element, None)
+        if identifiant is None:
+            return
+        cle = self._cles.pop(identifiant)
+        del self._elements[identifiant]
+        for trigramme in _trigrammes(cle):
+            posting = self._postings.get(trigramme)
+            if posting is not None:
+                posting.discard(identifiant)
+                if not posting:
+                    del self._postings[trigramme]
+
+    def _candidats(self, requete):
+        postings = []
+        for trigramme in _trigrammes(requete):
+            posting = self._postings.get(trigramme)
+            if not posting:
+                return set()
+            postings.append(posting)
+        postings.sort(key=len)
+        candidats = set(postings[0])
+        for posting in postings[1:]:
+            candidats.intersection_update(posting)
+            if not candidats:
+                break
+        return candidats
+
+    def rechercher(self, texte, limite=None):
+        """Renvoie les éléments contenant texte (sans tenir compte de la casse), dans l'ordre d'insertion."""
+        requete = texte.casefold()
+        if not requete:
+            elements = list(self._elements.values())
+            return elements if limite is None else elements[:limite]
+
+        if len(requete) < 3:
+            resultats = []
+            for identifiant, cle in self._cles.items():
+                if requete in cle:
+                    resultats.append(self._elements[identifiant])
+                    if limite is not None and len(resultats) >= limite:
+                        break
+            return resultats
+
+        cles = self._cles
+        trouves = [i for i in self._candidats(requete) if requete in cles[i]]
+        if limite is not None and limite < len(trouves):
+            trouves = heapq.nsmallest(limite, trouves)
+        else:
+            trouves.sort()
+        return [self._elements[i] for i in trouves]
@@ -0,0 +1,362 @@
+"""
+server.py
+
+Ce module expose le catalogue du Cahier de textes portable par une petite API HTTP/JSON (mode "serve").
+
+Un seul serveur par établissement garde en mémoire les titres, les points grammaticaux et leurs
+index de recherche (catalog_cache) ; les clients légers interrogent le serveur au lieu de lire
+chacun le fichier SQLite. Le serveur n'utilise que la bibliothèque standard (asyncio) et
+n'écoute par défaut que sur 127.0.0.1.
+
+La boucle asyncio lit les requêtes (HTTP/1.1, connexions persistantes) ; les appels au catalogue,
+bloquants, s'exécutent dans un petit pool de threads (une connexion SQLite par thread, voir db_pool).
+Les caches sont remplis au démarrage puis vérifiés toutes les INTERVALLE_PRECHAUFFAGE secondes :
+si un autre processus a modifié la base, ils sont rechargés en tâche de fond et non pendant une requête.
+Les résultats des recherches sont aussi gardés (TAILLE_CACHE_RECHERCHES) : tous les enseignants
+tapent les mêmes débuts de mots, et un préfixe courant trouve des milliers de titres (classés
+en plus par bm25 quand FTS5 est activé, voir catalog_cache) : plusieurs millisecondes. Ils sont indexés par la génération du catalogue et un compteur d'écritures par
+liste (titres, points de chaque langue) : un ajout ou une suppression ne rend caduques que les
+recherches de la liste modifiée, une modification par un autre processus toutes les recherches.
+
+Points d'accès (réponses JSON, erreurs sous la forme {"erreur": "..."}) :
+- GET    /sante                                  : état du serveur et taille du catalogue
+- GET    /titres?q=...&limite=50                 : titres classés (tous les titres si q est vide)
+- POST   /titres            {"titre": ...}       : ajoute un titre
+- DELETE /titres            {"titre": ...}       : supprime un titre
+- GET    /points?langue=...&q=...&limite=50      : points grammaticaux d'une langue
+- POST   /points            {"langue", "point"}  : ajoute un point grammatical
+- DELETE /points            {"langue", "point"}  : supprime un point grammatical
+- POST   /texte_final       {séance, "langue", "format"} : texte final mis en forme (formatage.py)
+
+Fonctions principales :
+- ServeurCatalogue : Serveur asyncio (demarrer, arreter, servir_indefiniment).
+- main_serve : Point d'entrée en ligne de commande (python Cahier_de_textes_v12.py serve ...).
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from urllib.parse import parse_qs, urlsplit
+
+import catalog_cache
+import database
+import db_pool
+import templates
+from formatage import formater_texte_final
+
+HOTE_PAR_DEFAUT = '127.0.0.1'
+PORT_PAR_DEFAUT = 8765
+THREADS_CATALOGUE = 4
+LIMITE_PAR_DEFAUT = 50
+LIMITE_MAX = 1000
+TAILLE_MAX_CORPS = 1 << 20
+TAILLE_MAX_EN_TETES = 100
+# Connexion persistante fermée après ce délai sans requête (en secondes)
+DELAI_INACTIVITE = 30
+INTERVALLE_PRECHAUFFAGE = 5.0
+TAILLE_CACHE_RECHERCHES = 4096
+
+# Écritures par ce serveur, par liste ('titres' ou nom de langue) : invalident les recherches gardées
+_ecritures = Counter()
+_verrou_ecritures = threading.Lock()
+
+RAISONS = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found",
+           405: "Method Not Allowed", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class ErreurRequete(Exception):
+    def __init__(self, statut, message):
+        super().__init__(message)
+        self.statut = statut
+
+
+def _parametre(params, nom, defaut=''):
+    valeurs = params.get(nom)
+    return valeurs[0] if valeurs else defaut
+
+
+def _limite(params):
+    try:
+        limite = int(_parametre(params, 'limite', LIMITE_PAR_DEFAUT))
+    except ValueError:
+        raise ErreurRequete(400, "Paramètre 'limite' invalide")
+    return max(1, min(limite, LIMITE_MAX))
+
+
+def _champ(donnees, nom):
+    valeur = donnees.get(nom) if isinstance(donnees, dict) else None
+    if not isinstance(valeur, str) or not valeur.strip():
+        raise ErreurRequete(400, f"Champ '{nom}' manquant")
+    return valeur.strip()
+
+
+def _langue(nom):
+    if database.language_id(nom) is None:
+        raise ErreurRequete(400, f"Langue inconnue : {nom}")
+    return nom
+
+
+def _verifier_ecriture(reussie):
+    # catalog_cache n'a rien modifié : l'erreur SQLite a déjà été affichée côté serveur
+    if not reussie:
+        raise ErreurRequete(500, "Écriture refusée par la base de données")
+
+
+def _ecriture(liste):
+    with _verrou_ecritures:
+        _ecritures[liste] += 1
+
+
+def _version(liste):
+    # La génération change quand _garder_au_chaud détecte une modification par un autre processus
+    return catalog_cache.generation, _ecritures[liste]
+
+
+@lru_cache(maxsize=TAILLE_CACHE_RECHERCHES)
+def _titres_classes(texte, limite, version):
+    return catalog_cache.rechercher_titres_classes(texte, limite)
+
+
+@lru_cache(maxsize=TAILLE_CACHE_RECHERCHES)
+def _points_classes(langue, texte, limite, version):
+    return catalog_cache.rechercher_points_classes(langue, texte, limite)
+
+
+# --- Points d'accès (exécutés dans le pool de threads) ------------------------
+
+def _sante(params, donnees):
+    langues = catalog_cache.prechauffer()
+    return 200, {'statut': 'ok', 'titres': len(catalog_cache.load_titles()), 'langues': langues,
+                 'fts': database.fts_actif, 'generation': catalog_cache.generation}
+
+
+def _chercher_titres(params, donnees):
+    texte = _parametre(params, 'q')
+    limite = _limite(params)
+    if texte.strip():
+        resultats = _titres_classes(texte, limite, _version('titres'))
+    else:
+        resultats = catalog_cache.load_titles()[:limite]
+    return 200, {'resultats': resultats}
+
+
+def _ajouter_titre(params, donnees):
+    titre = _champ(donnees, 'titre')
+    _verifier_ecriture(catalog_cache.save_title(titre))
+    _ecriture('titres')
+    return 201, {'titre': titre}
+
+
+def _supprimer_titre(params, donnees):
+    titre = _champ(donnees, 'titre')
+    _verifier_ecriture(catalog_cache.delete_title(titre))
+    _ecriture('titres')
+    return 200, {'titre': titre}
+
+
+def _chercher_points(params, donnees):
+    langue = _langue(_champ({'langue': _parametre(params, 'langue')}, 'langue'))
+    texte = _parametre(params, 'q')
+    limite = _limite(params)
+    if texte.strip():
+        resultats = _points_classes(langue, texte, limite, _version(langue))
+    else:
+        resultats = catalog_cache.get_grammar_points(langue)[:limite]
+    return 200, {'langue': langue, 'resultats': resultats}
+
+
+def _ajouter_point(params, donnees):
+    langue = _langue(_champ(donnees, 'langue'))
+    point = _champ(donnees, 'point')
+    _verifier_ecriture(catalog_cache.add_grammar_point(langue, point))
+    _ecriture(langue)
+    return 201, {'langue': langue, 'point': point}
+
+
+def _supprimer_point(params, donnees):
+    langue = _langue(_champ(donnees, 'langue'))
+    point = _champ(donnees, 'point')
+    _verifier_ecriture(catalog_cache.remove_grammar_point(langue, point))
+    _ecriture(langue)
+    return 200, {'langue': langue, 'point': point}
+
+
+def _texte_final(params, donnees):
+    if not isinstance(donnees, dict):
+        raise ErreurRequete(400, "Objet JSON attendu")
+    texte = formater_texte_final(donnees, donnees.get('langue') or None, donnees.get('format') or None)
+    return 200, {'texte_final': texte}
+
+
+ROUTES = {
+    '/sante': {'GET': _sante},
+    '/titres': {'GET': _chercher_titres, 'POST': _ajouter_titre, 'DELETE': _supprimer_titre},
+    '/points': {'GET': _chercher_points, 'POST': _ajouter_point, 'DELETE': _supprimer_point},
+    '/texte_final': {'POST': _texte_final},
+}
+
+
+# --- Serveur ------------------------------------------------------------------
+
+class ServeurCatalogue:
+    def __init__(self, hote=HOTE_PAR_DEFAUT, port=PORT_PAR_DEFAUT, threads=THREADS_CATALOGUE):
+        self.hote = hote
+        self.port = port
+        self._executeur = ThreadPoolExecutor(threads, thread_name_prefix="catalogue")
+        self._serveur = None
+        self._prechauffage = None
+        self.requetes = 0
+
+    async def _executer(self, fonction, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executeur, fonction, *args)
+
+    async def demarrer(self):
+        await self._executer(catalog_cache.prechauffer)
+        await self._executer(catalog_cache.rechercher_titres, "", 1)  # construit l'index des titres
+        self._serveur = await asyncio.start_server(self._connexion, self.hote, self.port,
+                                                   limit=TAILLE_MAX_CORPS)
+        self.port = self._serveur.sockets[0].getsockname()[1]
+        self._prechauffage = asyncio.create_task(self._garder_au_chaud())
+        return self
+
+    async def arreter(self):
+        if self._prechauffage is not None:
+            self._prechauffage.cancel()
+        if self._serveur is not None:
+            self._serveur.close()
+            await self._serveur.wait_closed()
+        self._executeur.shutdown(wait=True)
+
+    async def servir_indefiniment(self):
+        async with self._serveur:
+            await self._serveur.serve_forever()
+
+    async def _garder_au_chaud(self):
+        # Rechargement après une modification par un autre processus : ici plutôt que dans une requête
+        while True:
+            await asyncio.sleep(INTERVALLE_PRECHAUFFAGE)
+            try:
+                await self._executer(catalog_cache.prechauffer)
+                await self._executer(catalog_cache.rechercher_titres, "", 1)
+            except Exception as e:
+                print(f"Une erreur est survenue : {e}", file=sys.stderr)
+
+    async def _lire_requete(self, reader):
+        ligne = await asyncio.wait_for(reader.readline(), DELAI_INACTIVITE)
+        if not ligne:
+            return None
+        try:
+            methode, cible, version = ligne.decode('latin-1').split()
+        except ValueError:
+            raise ErreurRequete(400, "Ligne de requête invalide")
+        en_tetes = {}
+        while True:
+            ligne = await reader.readline()
+            if ligne in (b'\r\n', b'\n', b''):
+                break
+            if len(en_tetes) >= TAILLE_MAX_EN_TETES:
+                raise ErreurRequete(400, "Trop d'en-têtes")
+            nom, _, valeur = ligne.decode('latin-1').partition(':')
+            en_tetes[nom.strip().lower()] = valeur.strip()
+        try:
+            longueur = int(en_tetes.get('content-length', 0))
+        except ValueError:
+            raise ErreurRequete(400, "Content-Length invalide")
+        if longueur > TAILLE_MAX_CORPS:
+            raise ErreurRequete(413, "Corps de requête trop volumineux")
+        corps = await reader.readexactly(longueur) if longueur else b''
+        connexion = en_tetes.get('connection', '').lower()
+        persistante = connexion != 'close' and (version != 'HTTP/1.0' or connexion == 'keep-alive')
+        return methode.upper(), cible, corps, persistante
+
+    async def _traiter(self, methode, cible, corps):
+        url = urlsplit(cible)
+        methodes = ROUTES.get(url.path.rstrip('/') or '/')
+        if methodes is None:
+            raise ErreurRequete(404, f"Chemin inconnu : {url.path}")
+        fonction = methodes.get(methode)
+        if fonction is None:
+            raise ErreurRequete(405, f"Méthode {methode} non prise en charge sur {url.path}")
+        try:
+            donnees = json.loads(corps) if corps else {}
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            raise ErreurRequete(400, f"JSON invalide ({e})")
+        params = parse_qs(url.query)
+        try:
+            return await self._executer(fonction, params, donnees)
+        except ValueError as e:
+            raise ErreurRequete(400, str(e))
+
+    async def _connexion(self, reader, writer):
+        try:
+            while True:
+                persistante = False
+                try:
+                    requete = await self._lire_requete(reader)
+                    if requete is None:
+                        break
+                    methode, cible, corps, persistante = requete
+                    statut, reponse = await self._traiter(methode, cible, corps)
+                except ErreurRequete as e:
+                    statut, reponse = e.statut, {'erreur': str(e)}
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except Exception as e:
+                    print(f"Une erreur est survenue : {e}", file=sys.stderr)
+                    statut, reponse = 500, {'erreur': str(e)}
+                self.requetes += 1
+                contenu = json.dumps(reponse, ensure_ascii=False).encode('utf-8')
+                writer.write(
+                    f"HTTP/1.1 {statut} {RAISONS.get(statut, '')}\r\n"
+                    f"Content-Type: application/json; charset=utf-8\r\n"
+                    f"Content-Length: {len(contenu)}\r\n"
+                    f"Connection: {'keep-alive' if persistante else 'close'}\r\n\r\n".encode('latin-1') + contenu)
+                await writer.drain()
+                if not persistante:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+async def servir(hote=HOTE_PAR_DEFAUT, port=PORT_PAR_DEFAUT, threads=THREADS_CATALOGUE):
+    serveur = await ServeurCatalogue(hote, port, threads).demarrer()
+    print(f"Serveur du catalogue à l'écoute sur http://{hote}:{serveur.port} (Ctrl+C pour arrêter)",
+          file=sys.stderr)
+    try:
+        await serveur.servir_indefiniment()
+    finally:
+        await serveur.arreter()
+
+
+def main_serve(arguments=None):
+    parser = argparse.ArgumentParser(
+        prog="Cahier_de_textes_v12.py serve",
+        description="Sert le catalogue (titres, points grammaticaux, texte final) par une API HTTP/JSON locale.")
+    parser.add_argument("--hote", default=HOTE_PAR_DEFAUT,
+                        help="adresse d'écoute (127.0.0.1 par défaut : accessible depuis ce poste uniquement)")
+    parser.add_argument("--port", type=int, default=PORT_PAR_DEFAUT)
+    parser.add_argument("--base", default=None, help=f"base de données (par défaut {db_pool.DB_PATH})")
+    parser.add_argument("--threads", type=int, default=THREADS_CATALOGUE, help="threads d'accès au catalogue")
+    args = parser.parse_args(arguments)
+    if args.base is not None:
+        db_pool.configurer(chemin=args.base)
+    debut = time.perf_counter()
+    database.init_database()
+    templates.utiliser_base(True)
+    print(f"Base initialisée en {time.perf_counter() - debut:.2f} s", file=sys.stderr)
+    try:
+        asyncio.run(servir(args.hote, args.port, max(1, args.threads)))
+    except KeyboardInterrupt:
+        print("Serveur arrêté.", file=sys.stderr)
+    except OSError as e:
+        print(f"Une erreur est survenue : {e}", file=sys.stderr)
+        return 1
+    return 0
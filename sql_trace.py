@@ -0,0 +1,299 @@
+"""
+sql_trace.py
+
+Ce module trace les requêtes SQL de l'application "Cahier de textes portable" et les regroupe
+par action de l'interface.
+
+Chaque connexion du pool (db_pool) reçoit un sqlite3.Connection.set_trace_callback : toute
+instruction exécutée, y compris celles des triggers FTS, est enregistrée avec l'action en cours
+dans le thread. L'action courante est :
+- le gestionnaire Tk en cours d'exécution (command=, bind, after, after_idle... de gui.py et
+  utils.py, enveloppés grâce à latence_tk.envelopper_callbacks) ;
+- ou le nom passé à action("...") dans un bloc with ;
+- pour le travail confié à un autre thread (écriture différée, pipeline de recherche), l'action
+  qui l'a soumis : action_courante() est lue au moment de la soumission et poursuivre(nom)
+  la rétablit dans le thread de travail (sans compter une exécution de plus) ;
+- sinon "(hors action : thread <nom>)".
+
+Pour chaque action : nombre d'exécutions, nombre de requêtes, temps total de l'action et temps SQL
+estimé. Le temps d'une instruction est estimé par l'écart jusqu'à l'instruction suivante du même
+thread ou jusqu'à la fin de l'action (set_trace_callback ne fournit pas de durée).
+Les commits sont comptés à part (plusieurs commits pour un seul clic : transactions à regrouper),
+ainsi que les instructions internes de SQLite (tables FTS5). sqlite3 rapporte chaque programme de
+trigger avec le texte de l'instruction parente : pour les seules tables qui ont des triggers
+(lues dans sqlite_master à l'ouverture de chaque connexion, puis suivies via CREATE TRIGGER), une
+écriture identique répétée immédiatement (seules des instructions internes entre les deux) n'est
+comptée qu'une fois. Sur ces tables, une vraie répétition immédiate passe donc inaperçue ; sur les
+autres, chaque écriture est comptée.
+Le rapport signale :
+- les requêtes identiques (même texte et mêmes paramètres) exécutées plusieurs fois dans une même
+  exécution d'une action : allers-retours inutiles ;
+- les requêtes de même forme (paramètres remplacés par ?) répétées au moins SEUIL_N_PLUS_1 fois
+  dans une même exécution : motif « N+1 », à remplacer par une requête groupée.
+
+Activation par la variable d'environnement CAHIER_TRACE_SQL :
+- CAHIER_TRACE_SQL=1 : rapport texte sur la sortie d'erreur à la fermeture ;
+- CAHIER_TRACE_SQL=chemin/trace.json : rapport JSON dans ce fichier.
+
+Fonctions principales :
+- activer / activer_si_demande : Branche la trace sur les connexions et sur les callbacks Tk.
+- action : Gestionnaire de contexte qui nomme l'action courante.
+- action_courante / poursuivre : Nom de l'action en cours ; la rétablir dans un autre thread.
+- statistiques / rapport / ecrire_rapport : Résultats agrégés.
+"""
+
+import atexit
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+
+import db_pool
+
+VARIABLE_ENVIRONNEMENT = 'CAHIER_TRACE_SQL'
+SEUIL_N_PLUS_1 = 5
+# Écart maximal attribué à une instruction (hors action, l'écart inclut l'attente du thread)
+PLAFOND_ESTIMATION = 0.1
+
+_local = threading.local()
+_verrou = threading.Lock()
+_actions = {}
+_actif = False
+_destination = None
+_hors_actions = []
+# Tables dont les écritures déclenchent des triggers (noms en minuscules)
+_tables_a_triggers = set()
+
+_ECRITURE = re.compile(r"\s*(INSERT|UPDATE|DELETE|REPLACE)\b", re.IGNORECASE)
+_TRANSACTION = re.compile(r"\s*(BEGIN|COMMIT|ROLLBACK|END|SAVEPOINT|RELEASE)\b", re.IGNORECASE)
+_LITTERAUX = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_TABLE_ECRITE = re.compile(r"\s*(?:(?:INSERT|REPLACE)(?:\s+OR\s+\w+)?\s+INTO|UPDATE(?:\s+OR\s+\w+)?|DELETE\s+FROM)"
+                           r"\s+([\w\"'`\[\].]+)", re.IGNORECASE)
+_CREATION_TRIGGER = re.compile(r"\s*CREATE\s+(?:TEMP\w*\s+)?TRIGGER\b.*?\bON\s+([\w\"'`\[\].]+)",
+                               re.IGNORECASE | re.DOTALL)
+
+
+def _nom_table(nom):
+    return nom.rsplit('.', 1)[-1].strip('"\'`[]').lower()
+
+
+def forme_requete(sql):
+    """Remplace les valeurs littérales par ? pour regrouper les requêtes de même forme."""
+    return " ".join(_LITTERAUX.sub("?", sql).split())
+
+
+class _Statistiques:
+    __slots__ = ('executions', 'requetes', 'internes', 'transactions', 'duree_ms', 'sql_ms',
+                 'identiques', 'n_plus_1')
+
+    def __init__(self):
+        self.executions = 0
+        self.requetes = 0
+        self.internes = 0
+        self.transactions = 0
+        self.duree_ms = 0.0
+        self.sql_ms = 0.0
+        self.identiques = Counter()
+        self.n_plus_1 = Counter()
+
+
+class _Execution:
+    def __init__(self, nom, poursuite=False):
+        self.nom = nom
+        # Poursuite dans un autre thread : ses requêtes comptent, pas l'exécution ni sa durée
+        self.poursuite = poursuite
+        self.debut = time.perf_counter()
+        self.requetes = []  # (instant, sql)
+
+    def terminer(self):
+        fin = time.perf_counter()
+        instants = [instant for instant, sql in self.requetes] + [fin]
+        with _verrou:
+            stats = _actions.get(self.nom)
+            if stats is None:
+                stats = _actions[self.nom] = _Statistiques()
+            if not self.poursuite:
+                stats.executions += 1
+                stats.duree_ms += (fin - self.debut) * 1000
+            principales = [sql for instant, sql in self.requetes if sql is not None]
+            stats.requetes += len(principales)
+            stats.internes += len(self.requetes) - len(principales)
+            stats.sql_ms += sum(min(instants[i + 1] - instants[i], PLAFOND_ESTIMATION) * 1000
+                                for i in range(len(self.requetes)))
+            transactions = [sql for sql in principales if _TRANSACTION.match(sql)]
+            stats.transactions += sum(1 for sql in transactions if sql.lstrip().upper().startswith(("COMMIT", "END")))
+            textes = Counter(sql for sql in principales if not _TRANSACTION.match(sql))
+            formes = Counter(forme_requete(sql) for sql in textes.elements())
+            for sql, nombre in textes.items():
+                if nombre > 1:
+                    stats.identiques[sql] = max(stats.identiques[sql], nombre)
+            for forme, nombre in formes.items():
+                if nombre >= SEUIL_N_PLUS_1:
+                    stats.n_plus_1[forme] = max(stats.n_plus_1[forme], nombre)
+
+
+def _execution_courante():
+    pile = getattr(_local, 'pile', None)
+    if pile:
+        return pile[-1]
+    # Requêtes hors de toute action : une exécution par thread, terminée au rapport
+    execution = getattr(_local, 'hors_action', None)
+    if execution is None:
+        execution = _Execution(f"(hors action : thread {threading.current_thread().name})")
+        _local.hors_action = execution
+        with _verrou:
+            _hors_actions.append(execution)
+    return execution
+
+
+def _tracer(sql):
+    requetes = _execution_courante().requetes
+    if sql.startswith("--"):
+        # Instructions internes (tables FTS5...) : comptées à part, jamais signalées
+        requetes.append((time.perf_counter(), None))
+        return
+    creation = _CREATION_TRIGGER.match(sql)
+    if creation:
+        _tables_a_triggers.add(_nom_table(creation.group(1)))
+    table = _TABLE_ECRITE.match(sql)
+    if table and _nom_table(table.group(1)) in _tables_a_triggers:
+        # sqlite3 rapporte chaque programme de trigger avec le texte de l'instruction parente
+        for instant, precedente in reversed(requetes):
+            if precedente is not None:
+                if precedente == sql:
+                    return
+                break
+    requetes.append((time.perf_counter(), sql))
+
+
+def _brancher(conn):
+    try:
+        lignes = conn.execute("SELECT DISTINCT tbl_name FROM sqlite_master WHERE type='trigger'").fetchall()
+        _tables_a_triggers.update(_nom_table(table) for (table,) in lignes)
+    except sqlite3.Error:
+        pass
+    conn.set_trace_callback(_tracer)
+
+
+@contextmanager
+def action(nom, poursuite=False):
+    if not _actif:
+        yield
+        return
+    pile = getattr(_local, 'pile', None)
+    if pile is None:
+        pile = _local.pile = []
+    execution = _Execution(nom, poursuite)
+    pile.append(execution)
+    try:
+        yield execution
+    finally:
+        pile.pop()
+        execution.terminer()
+
+
+def action_courante():
+    """Nom de l'action en cours dans ce thread (None hors action ou si la trace est inactive)."""
+    pile = getattr(_local, 'pile', None) if _actif else None
+    return pile[-1].nom if pile else None
+
+
+def poursuivre(nom):
+    """Contexte qui attribue les requêtes d'un thread de travail à l'action nom (lue par action_courante)."""
+    return action(nom, poursuite=True) if nom is not None else nullcontext()
+
+
+def _envelopper(func, nom):
+    def avec_action(*args):
+        with action(nom):
+            return func(*args)
+    return avec_action
+
+
+def activer(destination='1', callbacks_tk=True):
+    global _actif, _destination
+    if _actif:
+        return False
+    _actif = True
+    _destination = destination
+    db_pool.ajouter_crochet_ouverture(_brancher)
+    if callbacks_tk:
+        import latence_tk
+        latence_tk.envelopper_callbacks(_envelopper)
+    atexit.register(ecrire_rapport)
+    return True
+
+
+def activer_si_demande():
+    destination = os.environ.get(VARIABLE_ENVIRONNEMENT, '').strip()
+    if destination not in ('', '0'):
+        activer(destination)
+
+
+def _terminer_hors_actions():
+    with _verrou:
+        executions = list(_hors_actions)
+    for execution in executions:
+        # Les requêtes suivantes de ce thread repartent dans une nouvelle exécution
+        terminee = _Execution(execution.nom)
+        terminee.debut = execution.debut
+        terminee.requetes, execution.requetes = execution.requetes, []
+        execution.debut = time.perf_counter()
+        terminee.terminer()
+
+
+def statistiques():
+    _terminer_hors_actions()
+    resultat = {}
+    with _verrou:
+        for nom, s in _actions.items():
+            if not s.requetes:
+                continue
+            resultat[nom] = {
+                'executions': s.executions,
+                'requetes': s.requetes,
+                'requetes_par_execution': round(s.requetes / max(s.executions, 1), 2),
+                'commits': s.transactions,
+                'instructions_internes': s.internes,
+                'duree_totale_ms': round(s.duree_ms, 3),
+                'sql_estime_ms': round(s.sql_ms, 3),
+                'requetes_identiques': dict(s.identiques.most_common(10)),
+                'n_plus_1': dict(s.n_plus_1.most_common(10)),
+            }
+    return resultat
+
+
+def rapport():
+    stats = statistiques()
+    if not stats:
+        return "Aucune requête SQL tracée."
+    lignes = []
+    for nom, s in sorted(stats.items(), key=lambda item: item[1]['requetes'], reverse=True):
+        lignes.append(f"{nom} : {s['executions']} exécution(s), {s['requetes']} requête(s) "
+                      f"({s['requetes_par_execution']} par exécution, {s['commits']} commit(s)), "
+                      f"{s['duree_totale_ms']:.1f} ms au total, "
+                      f"~{s['sql_estime_ms']:.1f} ms de SQL")
+        for sql, nombre in s['requetes_identiques'].items():
+            lignes.append(f"    IDENTIQUE x{nombre} : {sql[:150]}")
+        for forme, nombre in s['n_plus_1'].items():
+            lignes.append(f"    N+1 x{nombre} : {forme[:150]}")
+    return "\n".join(lignes)
+
+
+def ecrire_rapport():
+    if not _actif:
+        return
+    try:
+        if _destination == '1':
+            print("Requêtes SQL par action :\n" + rapport(), file=sys.stderr)
+        else:
+            with open(_destination, 'w', encoding='utf-8') as f:
+                json.dump({'seuil_n_plus_1': SEUIL_N_PLUS_1, 'actions': statistiques()},
+                          f, ensure_ascii=False, indent=2)
+    except (OSError, AttributeError) as e:
+        print(f"Une erreur est survenue : {e}")
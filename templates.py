@@ -0,0 +1,178 @@
+"""
+templates.py
+
+Ce module gère les modèles de sortie du Cahier de textes portable (texte final, trace écrite).
+
+Un modèle est un texte avec des champs entre accolades, par exemple :
+    "Titre du/des document(s) : {titre}\nAxe du programme : {axe}"
+Les modèles sont enregistrés dans la table 'templates' (database.py), par langue et par format
+d'établissement ; à défaut, les modèles de MODELES_PAR_DEFAUT sont utilisés.
+
+Chaque modèle est analysé une seule fois et compilé en un ModeleCompile : une chaîne de format
+à champs positionnels et la liste des champs à fournir. Le rendu se résume alors à un appel
+de str.format, sans nouvelle analyse. Les modèles compilés sont gardés en cache par
+(nom, langue, format) et réutilisés d'un appel à l'autre, y compris pendant une génération
+par lots (batch.py). Enregistrer ou supprimer un modèle n'invalide que les entrées du cache
+qui pouvaient s'y résoudre.
+
+Ordre de résolution pour (nom, langue, format) :
+(nom, langue, format), (nom, '', format), (nom, langue, 'standard'), (nom, '', 'standard'),
+puis MODELES_PAR_DEFAUT[nom].
+
+Fonctions principales :
+- compiler : Analyse un modèle et renvoie un ModeleCompile (ValueError si le modèle est invalide).
+- obtenir : Renvoie le modèle compilé à utiliser pour (nom, langue, format).
+- rendre : Met en forme un dictionnaire de valeurs avec le modèle correspondant.
+- enregistrer / supprimer : Modifient un modèle en base et invalident le cache concerné.
+- utiliser_base : Active ou désactive la lecture des modèles en base (génération sans base).
+
+Le format d'établissement par défaut vient de la variable d'environnement CAHIER_FORMAT_ETABLISSEMENT
+(sinon 'standard').
+"""
+
+import os
+import string
+import threading
+from functools import lru_cache
+
+import database
+
+FORMAT_STANDARD = 'standard'
+# Format d'établissement utilisé quand l'appelant n'en précise pas
+format_par_defaut = os.environ.get('CAHIER_FORMAT_ETABLISSEMENT', FORMAT_STANDARD)
+
+MODELES_PAR_DEFAUT = {
+    'texte_final': (
+        "Titre du/des document(s) : {titre}\n"
+        "Nature du/des document(s) : {nature}\n"
+        "Compétence travaillée : {competences}\n"
+        "Axe du programme : {axe}\n"
+        "Objectifs grammaticaux : {objectifs}\n"
+        "Champ lexical travaillé : {champ_lexical}\n"
+        "Trace écrite : {trace}"
+    ),
+    'trace_ecrite': "Travail à faire : {travail}\n\nTrace écrite générée ici.",
+}
+
+# Champs autorisés par modèle (les listes sont déjà jointes par des virgules)
+CHAMPS = {
+    'texte_final': ('titre', 'nature', 'competences', 'axe', 'objectifs', 'champ_lexical', 'trace',
+                    'classe', 'date', 'langue'),
+    'trace_ecrite': ('travail', 'titre', 'axe', 'objectifs', 'classe', 'date', 'langue'),
+}
+
+_cache = {}
+_verrou = threading.Lock()
+_base_active = True
+
+
+class ModeleCompile:
+    __slots__ = ('source', 'champs', '_format')
+
+    def __init__(self, source, format_positionnel, champs):
+        self.source = source
+        self.champs = champs
+        self._format = format_positionnel
+
+    def rendre(self, valeurs):
+        return self._format.format(*[valeurs.get(champ, '') for champ in self.champs])
+
+
+@lru_cache(maxsize=64)
+def compiler(source):
+    morceaux = []
+    champs = []
+    try:
+        elements = list(string.Formatter().parse(source))
+    except ValueError as e:
+        raise ValueError(f"Modèle invalide : {e}") from e
+    for texte, champ, specification, conversion in elements:
+        morceaux.append(texte.replace('{', '{{').replace('}', '}}'))
+        if champ is None:
+            continue
+        if not champ.isidentifier():
+            raise ValueError(f"Modèle invalide : champ '{champ}' non reconnu")
+        if champ not in champs:
+            champs.append(champ)
+        champ_positionnel = str(champs.index(champ))
+        if conversion:
+            champ_positionnel += f"!{conversion}"
+        if specification:
+            champ_positionnel += f":{specification}"
+        morceaux.append("{" + champ_positionnel + "}")
+    return ModeleCompile(source, "".join(morceaux), tuple(champs))
+
+
+def utiliser_base(actif=True):
+    global _base_active
+    with _verrou:
+        _base_active = actif
+        _cache.clear()
+
+
+def _candidats(langue, format_institution):
+    cles = [(langue, format_institution), ('', format_institution),
+            (langue, FORMAT_STANDARD), ('', FORMAT_STANDARD)]
+    return list(dict.fromkeys(cles))
+
+
+def _resoudre(nom, langue, format_institution):
+    if _base_active:
+        for langue_modele, format_modele in _candidats(langue, format_institution):
+            source = database.get_template(nom, langue_modele, format_modele)
+            if source is not None:
+                return compiler(source)
+    if nom not in MODELES_PAR_DEFAUT:
+        raise KeyError(f"Aucun modèle nommé '{nom}'")
+    return compiler(MODELES_PAR_DEFAUT[nom])
+
+
+def obtenir(nom, langue='', format_institution=None):
+    cle = (nom, langue or '', format_institution or format_par_defaut)
+    modele = _cache.get(cle)
+    if modele is None:
+        with _verrou:
+            modele = _cache.get(cle)
+            if modele is None:
+                modele = _resoudre(*cle)
+                _cache[cle] = modele
+    return modele
+
+
+def rendre(nom, valeurs, langue='', format_institution=None):
+    return obtenir(nom, langue, format_institution).rendre(valeurs)
+
+
+def invalider(nom=None, langue=None, format_institution=None):
+    """Retire du cache les entrées qui pouvaient se résoudre vers le modèle (nom, langue, format).
+
+    Sans argument, vide tout le cache (par exemple après une modification par un autre processus).
+    """
+    with _verrou:
+        if nom is None:
+            _cache.clear()
+            return
+        for cle in list(_cache):
+            nom_cle, langue_cle, format_cle = cle
+            if nom_cle != nom:
+                continue
+            if langue not in (None, '') and langue_cle != langue:
+                continue
+            if format_institution not in (None, FORMAT_STANDARD) and format_cle != format_institution:
+                continue
+            del _cache[cle]
+
+
+def enregistrer(nom, contenu, langue='', format_institution=FORMAT_STANDARD):
+    modele = compiler(contenu)
+    inconnus = [champ for champ in modele.champs if champ not in CHAMPS.get(nom, modele.champs)]
+    if inconnus:
+        raise ValueError(f"Champs inconnus pour le modèle '{nom}' : {', '.join(inconnus)}")
+    database.save_template(nom, langue, format_institution, contenu)
+    invalider(nom, langue, format_institution)
+    return modele
+
+
+def supprimer(nom, langue='', format_institution=FORMAT_STANDARD):
+    database.delete_template(nom, langue, format_institution)
+    invalider(nom, langue, format_institution)
@@ -0,0 +1,187 @@
+"""
+charge_serveur.py
+
+Test de charge de l'API HTTP/JSON du catalogue (server.py, mode "serve").
+
+Ouvre N connexions persistantes (50 par défaut) qui envoient en boucle, pendant la durée
+demandée, un mélange de requêtes proche d'un usage réel : recherches de titres et de points
+grammaticaux à la frappe, des textes finaux et une part --ecritures (2 % par défaut) d'ajouts
+et de suppressions de titres. Affiche le
+débit, les percentiles de latence (p50 / p95 / p99) par point d'accès et le nombre d'erreurs.
+
+Avec --demarrer, le script lance lui-même le serveur sur une base temporaire remplie de
+--titres titres et points grammaticaux, puis l'arrête à la fin. Sinon, il interroge le
+serveur déjà lancé à l'adresse --url.
+
+Utilisation : python tools/charge_serveur.py --demarrer [--connexions 50] [--duree 10] [--titres 100000]
+              python tools/charge_serveur.py --url http://127.0.0.1:8765
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import quote, urlsplit
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RACINE)
+
+LANGUE = 'Espagnol'
+SAISIES = ["le", "la ph", "subj", "impér", "pron", "ser", "compar", "prép", "Madrid", "Frida",
+           "Kahlo", "mercado", "fiesta", "fút", "plan", "memo", "escu", "lect"]
+SEANCE = {'titre': "La fiesta de los muertos", 'nature': "Compréhension de l'écrit",
+          'competences': ["Lire", "Écrire"], 'axe': "Territoire et mémoire",
+          'objectifs': ["Le subjonctif présent"], 'champ_lexical': "la fiesta, el recuerdo",
+          'trace': "Trace écrite", 'langue': LANGUE}
+
+
+def _percentile(valeurs_triees, p):
+    if not valeurs_triees:
+        return 0.0
+    return valeurs_triees[min(len(valeurs_triees) - 1, max(0, round(p / 100 * len(valeurs_triees)) - 1))]
+
+
+def _requete_aleatoire(aleatoire, client, numero, ecritures):
+    tirage = aleatoire.random()
+    if tirage < ecritures:
+        titre = {'titre': f"charge client {client} titre {numero}"}
+        if tirage < ecritures / 2:
+            return 'ajout titre', 'POST', "/titres", titre
+        return 'suppression titre', 'DELETE', "/titres", titre
+    tirage = aleatoire.random()
+    saisie = quote(aleatoire.choice(SAISIES))
+    if tirage < 0.5:
+        return 'recherche titres', 'GET', f"/titres?q={saisie}&limite=20", None
+    if tirage < 0.9:
+        return 'recherche points', 'GET', f"/points?langue={LANGUE}&q={saisie}&limite=20", None
+    return 'texte final', 'POST', "/texte_final", SEANCE
+
+
+async def _envoyer(reader, writer, hote, methode, chemin, donnees):
+    corps = json.dumps(donnees, ensure_ascii=False).encode('utf-8') if donnees is not None else b''
+    writer.write(f"{methode} {chemin} HTTP/1.1\r\nHost: {hote}\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(corps)}\r\n\r\n".encode('latin-1') + corps)
+    await writer.drain()
+    statut = int((await reader.readline()).split()[1])
+    longueur = 0
+    while True:
+        ligne = await reader.readline()
+        if ligne in (b'\r\n', b''):
+            break
+        nom, _, valeur = ligne.decode('latin-1').partition(':')
+        if nom.lower() == 'content-length':
+            longueur = int(valeur)
+    json.loads(await reader.readexactly(longueur))
+    return statut
+
+
+async def _client(numero, hote, port, fin, ecritures, mesures, erreurs):
+    aleatoire = random.Random(numero)
+    reader, writer = await asyncio.open_connection(hote, port)
+    compteur = 0
+    try:
+        while time.perf_counter() < fin:
+            nom, methode, chemin, donnees = _requete_aleatoire(aleatoire, numero, compteur, ecritures)
+            compteur += 1
+            debut = time.perf_counter()
+            try:
+                statut = await _envoyer(reader, writer, hote, methode, chemin, donnees)
+            except (ConnectionError, asyncio.IncompleteReadError, ValueError, IndexError):
+                erreurs[nom] = erreurs.get(nom, 0) + 1
+                writer.close()
+                reader, writer = await asyncio.open_connection(hote, port)
+                continue
+            mesures.setdefault(nom, []).append((time.perf_counter() - debut) * 1000)
+            if statut >= 400:
+                erreurs[nom] = erreurs.get(nom, 0) + 1
+    finally:
+        writer.close()
+
+
+async def charger(hote, port, connexions, duree, ecritures):
+    mesures = {}
+    erreurs = {}
+    debut = time.perf_counter()
+    fin = debut + duree
+    await asyncio.gather(*(_client(numero, hote, port, fin, ecritures, mesures, erreurs) for numero in range(connexions)))
+    return mesures, erreurs, time.perf_counter() - debut
+
+
+def _port_libre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _demarrer_serveur(dossier, titres):
+    import database
+    import db_pool
+    from benchmarks.bench_suite import generer_points, generer_titres
+
+    chemin = os.path.join(dossier, "charge.db")
+    db_pool.configurer(chemin=chemin)
+    database.init_database()
+    langue_id = database.language_id(LANGUE)
+    with db_pool.transaction() as c:
+        c.executemany("INSERT OR IGNORE INTO titles (title) VALUES (?)", ((t,) for t in generer_titres(titres)))
+        c.executemany("INSERT OR IGNORE INTO grammar_points (language_id, point) VALUES (?, ?)",
+                      ((langue_id, p) for p in generer_points(titres)))
+    db_pool.fermer_connexions()
+
+    port = _port_libre()
+    processus = subprocess.Popen([sys.executable, os.path.join(RACINE, "Cahier_de_textes_v12.py"), "serve",
+                                  "--port", str(port), "--base", chemin], stderr=subprocess.PIPE, text=True)
+    # Attendre le message "à l'écoute" (caches déjà préchauffés)
+    for ligne in processus.stderr:
+        sys.stderr.write(ligne)
+        if "l'écoute" in ligne:
+            return processus, port
+    raise RuntimeError("Le serveur ne s'est pas lancé.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Test de charge de l'API du catalogue.")
+    parser.add_argument("--url", default="http://127.0.0.1:8765", help="serveur à interroger")
+    parser.add_argument("--demarrer", action="store_true", help="lancer un serveur sur une base temporaire")
+    parser.add_argument("--titres", type=int, default=100_000, help="taille du corpus avec --demarrer")
+    parser.add_argument("-c", "--connexions", type=int, default=50)
+    parser.add_argument("-d", "--duree", type=float, default=10.0, help="durée en secondes")
+    parser.add_argument("--ecritures", type=float, default=0.02,
+                        help="proportion d'ajouts et de suppressions de titres parmi les requêtes")
+    args = parser.parse_args()
+
+    url = urlsplit(args.url)
+    hote, port = url.hostname, url.port
+    processus = dossier = None
+    if args.demarrer:
+        dossier = tempfile.mkdtemp(prefix="charge_cahier_")
+        processus, port = _demarrer_serveur(dossier, args.titres)
+        hote = '127.0.0.1'
+    try:
+        mesures, erreurs, duree = asyncio.run(charger(hote, port, args.connexions, args.duree, args.ecritures))
+    finally:
+        if processus is not None:
+            processus.terminate()
+            processus.wait()
+            shutil.rmtree(dossier, ignore_errors=True)
+
+    total = sum(len(durees) for durees in mesures.values())
+    print(f"{args.connexions} connexions, {duree:.1f} s : {total} requêtes ({total / duree:.0f} requêtes/s), "
+          f"{sum(erreurs.values())} erreur(s)")
+    print(f"{'Point d accès':<20} {'requêtes':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for nom, durees in sorted(mesures.items()):
+        durees.sort()
+        print(f"{nom:<20} {len(durees):>9} {_percentile(durees, 50):>8.2f} {_percentile(durees, 95):>8.2f} "
+              f"{_percentile(durees, 99):>8.2f} {durees[-1]:>8.2f}")
+    return 1 if erreurs else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+"""
+stress_concurrence.py
+
+Test de charge des accès concurrents à une même base (plusieurs postes sur un dossier partagé).
+
+Lance N processus clients (30 par défaut) sur une base commune. Chaque client ajoute des titres
+et des points grammaticaux qui lui sont propres (database.save_title / add_grammar_point), en
+supprime une partie (delete_title / remove_grammar_point), et de temps en temps regroupe
+plusieurs écritures dans une transaction (db_pool.executer_transaction). Les clients démarrent
+ensemble (barrière) pour maximiser les conflits de verrou.
+
+À la fin, le contenu de la base est comparé à l'état attendu de chaque client : un titre
+manquant ou en trop est une écriture perdue. Le script affiche aussi le nombre de reprises
+après SQLITE_BUSY et les erreurs remontées, puis renvoie 1 si une vérification échoue.
+
+Utilisation : python tools/stress_concurrence.py [-n 30] [--operations 200] [--journal WAL|DELETE]
+"""
+
+import argparse
+import contextlib
+import io
+import multiprocessing
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RACINE)
+
+import database
+import db_pool
+
+LANGUE = 'Allemand'
+
+
+def _titre(client, numero):
+    return f"stress client {client:03d} titre {numero:05d}"
+
+
+def _point(client, numero):
+    return f"stress client {client:03d} point {numero:05d}"
+
+
+def _gardes(operations):
+    # Un élément sur trois est supprimé après avoir été ajouté
+    return {numero for numero in range(operations) if numero % 3 != 0}
+
+
+def client(numero, chemin, journal, operations, barriere, resultats):
+    db_pool.configurer(chemin=chemin, pragmas={'journal_mode': journal})
+    aleatoire = random.Random(numero)
+    sortie = io.StringIO()
+    barriere.wait()
+    debut = time.perf_counter()
+    # db_operation signale les échecs par print : les compter au lieu de les afficher
+    with contextlib.redirect_stdout(sortie):
+        for i in range(operations):
+            if aleatoire.random() < 0.1:
+                # Plusieurs écritures dans une même transaction courte
+                db_pool.executer_transaction(lambda c, i=i: (database.save_title_op(c, _titre(numero, i)),
+                                                              database.add_grammar_point_op(c, LANGUE, _point(numero, i))))
+            else:
+                database.save_title(_titre(numero, i))
+                database.add_grammar_point(LANGUE, _point(numero, i))
+            if i % 3 == 0:
+                database.delete_title(_titre(numero, i))
+                database.remove_grammar_point(LANGUE, _point(numero, i))
+            # Lecture intercalée, comme le rafraîchissement de l'interface
+            if i % 20 == 0:
+                database.load_titles()
+    db_pool.fermer_connexions()
+    erreurs = sortie.getvalue().count("Une erreur est survenue")
+    resultats.put((numero, erreurs, db_pool.reprises, time.perf_counter() - debut))
+
+
+def verifier(nombre_clients, operations):
+    titres = set(database.load_titles())
+    points = set(database.get_grammar_points(LANGUE))
+    pertes = 0
+    for numero in range(nombre_clients):
+        gardes = _gardes(operations)
+        for i in range(operations):
+            present_titre = _titre(numero, i) in titres
+            present_point = _point(numero, i) in points
+            attendu = i in gardes
+            if present_titre != attendu or present_point != attendu:
+                pertes += 1
+                if pertes <= 10:
+                    print(f"  client {numero}, opération {i} : titre {'présent' if present_titre else 'absent'}, "
+                          f"point {'présent' if present_point else 'absent'}, attendu {'présent' if attendu else 'absent'}")
+    return pertes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Test de charge des écritures concurrentes.")
+    parser.add_argument("-n", "--clients", type=int, default=30)
+    parser.add_argument("--operations", type=int, default=200, help="ajouts par client")
+    parser.add_argument("--journal", default='WAL', choices=['WAL', 'DELETE'],
+                        help="mode de journal (DELETE pour simuler un partage réseau entre postes)")
+    parser.add_argument("--base", default=None, help="base à utiliser (par défaut une base temporaire)")
+    args = parser.parse_args()
+
+    dossier = None
+    chemin = args.base
+    if chemin is None:
+        dossier = tempfile.mkdtemp(prefix="stress_cahier_")
+        chemin = os.path.join(dossier, "partagee.db")
+    db_pool.configurer(chemin=chemin, pragmas={'journal_mode': args.journal})
+    database.init_database()
+    db_pool.fermer_connexions()
+
+    contexte = multiprocessing.get_context('spawn')
+    barriere = contexte.Barrier(args.clients)
+    resultats = contexte.Queue()
+    processus = [contexte.Process(target=client, args=(numero, chemin, args.journal, args.operations,
+                                                      barriere, resultats))
+                 for numero in range(args.clients)]
+    debut = time.perf_counter()
+    for p in processus:
+        p.start()
+    bilans = [resultats.get() for _ in processus]
+    for p in processus:
+        p.join()
+    duree = time.perf_counter() - debut
+
+    erreurs = sum(bilan[1] for bilan in bilans)
+    reprises = sum(bilan[2] for bilan in bilans)
+    plus_long = max(bilan[3] for bilan in bilans)
+    ecritures = args.clients * args.operations * 2 * (1 + 1 / 3)
+    print(f"{args.clients} clients, {args.operations} ajouts chacun, journal {args.journal} : "
+          f"{duree:.1f} s ({ecritures / duree:.0f} écritures/s), client le plus lent {plus_long:.1f} s")
+    print(f"Reprises après SQLITE_BUSY : {reprises}, erreurs signalées : {erreurs}")
+
+    db_pool.configurer(chemin=chemin)
+    pertes = verifier(args.clients, args.operations)
+    db_pool.fermer_connexions()
+    print(f"Écritures perdues ou en trop : {pertes}")
+    if dossier is not None:
+        shutil.rmtree(dossier, ignore_errors=True)
+    return 1 if pertes or erreurs or any(p.exitcode for p in processus) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+"""
+verifier_plans.py
+
+Vérifie le plan d'exécution (EXPLAIN QUERY PLAN) de chaque requête SQL de database.py.
+
+Les requêtes sont extraites du code source de database.py (chaînes qui commencent par SELECT,
+INSERT, UPDATE, DELETE, REPLACE ou WITH), complétées par les variantes de la requête de
+pagination construite dynamiquement (database.requete_page_lecons). Elles sont préparées sur
+une base temporaire initialisée par init_database, donc avec tous les index des migrations.
+
+Une requête échoue si son plan contient :
+- "SCAN <table>" sans index (parcours complet de la table) ;
+- "USE TEMP B-TREE" (tri ou regroupement temporaire).
+
+Exceptions autorisées (voir EXCEPTIONS) : migrations et FTS (exécutées une seule fois),
+petites tables de référence, repli LIKE quand FTS5 est absent, tri bm25 des résultats FTS5,
+lecture de tous les titres (LECTURES_COMPLETES : le parcours complet est le but de la requête).
+
+Utilisation : python tools/verifier_plans.py [-v]
+Code de sortie 1 si une requête critique régresse : à lancer avant chaque publication.
+"""
+
+import ast
+import itertools
+import os
+import re
+import sys
+import tempfile
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RACINE)
+
+import database
+import db_pool
+
+MOTS_SQL = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'REPLACE', 'WITH')
+
+# Tables de quelques lignes : un parcours complet est normal
+PETITES_TABLES = {'languages', 'schema_version'}
+
+# Fonctions dont les requêtes ne sont pas sur un chemin critique
+EXCEPTIONS = {
+    'init_fts': "exécutée une fois, à la création des tables FTS",
+    'fts5_disponible': "test de disponibilité de FTS5",
+    'schema_version': "table d'une seule ligne",
+    'list_templates': "table de quelques modèles, parcourue dans l'ordre de sa clé primaire",
+}
+PREFIXE_EXCEPTION = ('_migration_',)
+# Requêtes qui lisent toute une table (chargement du cache du catalogue au démarrage)
+LECTURES_COMPLETES = {database.SQL_TITRES}
+
+SCAN_SANS_INDEX = re.compile(r"^SCAN (\w+)\b(?! USING (?:COVERING )?INDEX)(?! VIRTUAL TABLE)")
+
+
+def extraire_requetes(chemin):
+    with open(chemin, encoding='utf-8') as f:
+        arbre = ast.parse(f.read(), chemin)
+    requetes = []
+
+    def visiter(noeud, fonction):
+        for enfant in ast.iter_child_nodes(noeud):
+            if isinstance(enfant, ast.FunctionDef):
+                visiter(enfant, enfant.name)
+            elif isinstance(enfant, ast.JoinedStr):
+                continue  # f-strings : variantes ajoutées explicitement
+            elif isinstance(enfant, ast.Constant) and isinstance(enfant.value, str):
+                texte = enfant.value.strip()
+                if texte.upper().startswith(MOTS_SQL) and not texte.startswith(('"', "'")):
+                    requetes.append((fonction or '<module>', enfant.lineno, texte))
+            else:
+                visiter(enfant, fonction)
+
+    visiter(arbre, None)
+    return requetes
+
+
+def variantes_dynamiques():
+    for classe, language, apres in itertools.product((None, '1ère B'), (None, 'Espagnol'), (None, ('2024-01-01', 1))):
+        sql, parametres = database.requete_page_lecons(classe, language, apres)
+        yield 'get_lessons_page', 0, sql, parametres
+
+
+def plan(conn, sql, parametres=None):
+    if parametres is None:
+        parametres = (1,) * sql.count('?')
+    lignes = conn.execute("EXPLAIN QUERY PLAN " + sql, parametres).fetchall()
+    return [ligne[3] for ligne in lignes]
+
+
+def problemes(details, sql):
+    trouves = []
+    for detail in details:
+        scan = SCAN_SANS_INDEX.match(detail)
+        if scan and scan.group(1) not in PETITES_TABLES:
+            trouves.append(detail)
+        # Le classement bm25 des tables FTS5 impose un tri des seules lignes trouvées
+        if "USE TEMP B-TREE" in detail and 'bm25(' not in sql:
+            trouves.append(detail)
+    return trouves
+
+
+def exception(fonction, sql):
+    if fonction in EXCEPTIONS or fonction.startswith(PREFIXE_EXCEPTION) or sql in LECTURES_COMPLETES:
+        return True
+    # Repli sans FTS5 : LIKE '%...%' ne peut pas utiliser d'index
+    return fonction in ('search_titles', 'search_grammar_points') and ' LIKE ' in sql
+
+
+def main():
+    bavard = '-v' in sys.argv[1:]
+    dossier = tempfile.mkdtemp(prefix="plans_cahier_")
+    db_pool.configurer(chemin=os.path.join(dossier, "plans.db"))
+    # FTS5 est désactivé par défaut, mais ses requêtes doivent rester vérifiées
+    database.ACTIVER_FTS = True
+    database.init_database()
+    conn = db_pool.get_connection()
+
+    requetes = [(f, l, sql, None) for f, l, sql in extraire_requetes(os.path.join(RACINE, 'database.py'))]
+    requetes += list(variantes_dynamiques())
+
+    echecs = 0
+    for fonction, ligne, sql, parametres in requetes:
+        resume = " ".join(sql.split())
+        try:
+            details = plan(conn, sql, parametres)
+        except Exception as e:
+            print(f"ERREUR   {fonction}:{ligne} {resume[:90]}\n         {e}")
+            echecs += 1
+            continue
+        trouves = problemes(details, sql)
+        if trouves and not exception(fonction, sql):
+            echecs += 1
+            print(f"ÉCHEC    {fonction}:{ligne} {resume[:90]}")
+            for detail in trouves:
+                print(f"         {detail}")
+        elif bavard:
+            etat = "TOLÉRÉ  " if trouves else "OK      "
+            print(f"{etat} {fonction}:{ligne} {resume[:90]}")
+            for detail in details:
+                print(f"         {detail}")
+
+    db_pool.fermer_connexions()
+    print(f"{len(requetes)} requête(s) vérifiée(s), {echecs} échec(s).")
+    return 1 if echecs else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -10,58 +10,68 @@ Fonctions principales :
    - update_title_suggestions : Met à jour les suggestions de titres dans une liste déroulante.
    - ajouter_titre : Ajoute un nouveau titre à la liste et à la base de données.
    - supprimer_titre : Supprime un titre sélectionné de la liste et de la base de données.
-   - update_titre_listboxes : Met à jour les listes de titres dans l'interface graphique.
 
 2. Gestion des objectifs grammaticaux :
-   - recherche_objectifs : Filtre les objectifs grammaticaux selon l'entrée utilisateur.
-   - valider_objectif : Ajoute un nouvel objectif à la liste et à la base de données.
+   - recherche_objectifs : Filtre les objectifs grammaticaux selon l'entrée utilisateur
+     (points proches proposés en cas de faute de frappe, voir fuzzy.py) ; les points les plus
+     choisis récemment sont proposés en tête (voir classement.py).
+   - valider_objectif : Ajoute un nouvel objectif à la liste et à la base de données, et compte ce choix.
    - update_objectifs_dropdown : Met à jour la liste déroulante des objectifs selon la langue.
    - ajouter_point_grammatical : Ajoute un nouveau point grammatical à la liste et à la base de données.
    - supprimer_point_grammatical : Supprime un point grammatical sélectionné.
 
 3. Manipulation de texte :
-   - generer_texte_final : Génère un texte final à partir des entrées utilisateur.
+   - generer_texte_final : Génère un texte final à partir des entrées utilisateur
+     (mise en forme partagée avec la génération par lots, voir formatage.py)
+     et l'enregistre dans l'historique des séances.
    - copier_texte : Copie le texte d'un widget dans le presse-papiers.
-   - generer_trace_ecrite : Génère une trace écrite à partir du travail à faire.
+   - generer_trace_ecrite : Génère une trace écrite à partir du travail à faire (modèle 'trace_ecrite').
    - copier_travail_a_faire : Copie le texte du travail à faire dans le presse-papiers.
 
 4. Autres utilitaires :
    - nettoyer_liste : Efface tous les éléments d'une liste.
    - on_window_resize : Gère le redimensionnement de la fenêtre (actuellement vide).
 
+Les ajouts et suppressions passent par catalog_model, qui écrit via catalog_cache et met à jour
+tous les widgets abonnés (une seule liste d'abonnés pour gui.py et utils.py).
+Les lectures passent par catalog_cache, qui garde titres et points grammaticaux
+en mémoire : les recherches à la frappe ne déclenchent aucune requête SQL.
+
 Ce module est conçu pour être importé et utilisé par les autres composants de l'application,
 notamment pour la gestion de l'interface utilisateur et l'interaction avec la base de données.
 """
 
 import tkinter as tk
-from tkinter import simpledialog
 from tkinter import messagebox
-from database import remove_grammar_point, delete_title, save_title, load_titles, add_grammar_point, get_grammar_points
-
-titre_widgets = []
-objectif_widgets = []
+from datetime import date
+from catalog_cache import get_grammar_points, rechercher_titres, rechercher_points_classes, ordonner_par_usage, save_lesson
+import catalog_model
+from formatage import COMPETENCES, formater_texte_final
+import templates
 
 def update_title_suggestions(titre_entry, titles):
+    # titles n'est plus lu : l'index de catalog_cache suit les ajouts et suppressions de titres
     def inner_update(*args):
-        typed = titre_entry.get().lower()
+        typed = titre_entry.get()
         if typed:
-            suggestions = [title for title in titles if typed in title.lower()]
+            suggestions = rechercher_titres(typed)
             titre_entry['values'] = suggestions
     return inner_update
 
 def recherche_objectifs(event, dropdown, entry, language_var):
-    typed = entry.get().lower()
-    all_points = get_grammar_points(language_var.get())
+    typed = entry.get()
     
     if typed:
-        matching_points = [point for point in all_points if typed in point.lower()]
-        dropdown['values'] = matching_points
+        valeurs = rechercher_points_classes(language_var.get(), typed)
     else:
-        dropdown['values'] = all_points
+        valeurs = get_grammar_points(language_var.get())
+    valeurs = ordonner_par_usage('point', valeurs, language_var.get())
     
-    # Si aucun point ne correspond, laissez la possibilité d'ajouter un nouveau point
-    if not dropdown['values'] and typed:
-        dropdown['values'] = [f"Ajouter : {typed}"]
+    # Si aucun point ne correspond exactement (aucun résultat, ou seulement des points proches
+    # proposés malgré une faute de frappe), laissez la possibilité d'ajouter un nouveau point
+    if typed and not any(typed.casefold() in valeur.casefold() for valeur in valeurs):
+        valeurs = list(valeurs) + [f"Ajouter : {typed}"]
+    dropdown['values'] = valeurs
 
 def valider_objectif(entry, listbox, dropdown, language_var):
     objectif = entry.get()
@@ -70,8 +80,9 @@ def valider_objectif(entry, listbox, dropdown, language_var):
     
     if objectif and objectif not in listbox.get(0, tk.END):
         listbox.insert(tk.END, objectif)
-        if objectif not in get_grammar_points(language_var.get()):
-            add_grammar_point(language_var.get(), objectif)
+        if objectif not in catalog_model.modele_points(language_var.get()):
+            catalog_model.ajouter_point(language_var.get(), objectif)
+        catalog_model.choisir_point(language_var.get(), objectif)
     
     entry.delete(0, tk.END)
     dropdown.set('')  # Réinitialiser le dropdown
@@ -83,31 +94,32 @@ def nettoyer_liste(listbox):
 def generer_texte_final(texte_final_text, widgets):
     nouveau_titre = widgets['titre_entry'].get()
     if nouveau_titre:
-        save_title(nouveau_titre)
-        if nouveau_titre:
-            update_titre_listboxes(nouveau_titre)
-
-    competences = []
-    if widgets['comprehension_ecrit'].get():
-        competences.append("Compréhension de l'écrit")
-    if widgets['comprehension_oral'].get():
-        competences.append("Compréhension de l'oral")
-    if widgets['expression_ecrite'].get():
-        competences.append("Expression écrite")
-    if widgets['expression_orale'].get():
-        competences.append("Expression orale")
-
-    objectifs_valides = list(widgets['listbox_objectifs'].get(0, tk.END))
-
-    texte_final = (
-        f"Titre du/des document(s) : {widgets['titre_entry'].get()}\n"
-        f"Nature du/des document(s) : {widgets['nature_dropdown'].get()}\n"
-        f"Compétence travaillée : {', '.join(competences)}\n"
-        f"Axe du programme : {widgets['axe_dropdown'].get()}\n"
-        f"Objectifs grammaticaux : {', '.join(objectifs_valides)}\n"
-        f"Champ lexical travaillé : {widgets['champ_lexical_entry'].get()}\n"
-        f"Trace écrite : {widgets['trace_entry'].get()}"
-    )
+        catalog_model.ajouter_titre(nouveau_titre)
+
+    cases = ['comprehension_ecrit', 'comprehension_oral', 'expression_ecrite', 'expression_orale']
+    competences = [nom for case, nom in zip(cases, COMPETENCES) if widgets[case].get()]
+
+    enregistrement = {
+        'titre': widgets['titre_entry'].get(),
+        'nature': widgets['nature_dropdown'].get(),
+        'competences': competences,
+        'axe': widgets['axe_dropdown'].get(),
+        'objectifs': list(widgets['listbox_objectifs'].get(0, tk.END)),
+        'champ_lexical': widgets['champ_lexical_entry'].get(),
+        'trace': widgets['trace_entry'].get(),
+    }
+    texte_final = formater_texte_final(enregistrement, langue=widgets['language_var'].get())
+
+    # Chaque séance générée est conservée dans l'historique (onglet Historique)
+    save_lesson({
+        'classe': widgets['classe_entry'].get().strip(),
+        'date': date.today().isoformat(),
+        'language': widgets['language_var'].get(),
+        'axe': enregistrement['axe'],
+        'titre': enregistrement['titre'],
+        'objectifs': enregistrement['objectifs'],
+        'texte': texte_final,
+    })
     texte_final_text.delete("1.0", tk.END)
     texte_final_text.insert(tk.END, texte_final)
 
@@ -130,112 +142,50 @@ def update_objectifs_dropdown(language_var, objectifs_dropdown, listbox_objectif
 
 def generer_trace_ecrite(travail_a_faire_entry, trace_ecrite_text):
     travail = travail_a_faire_entry.get()
-    trace = f"Travail à faire : {travail}\n\nTrace écrite générée ici."
+    trace = templates.rendre('trace_ecrite', {'travail': travail})
     trace_ecrite_text.delete("1.0", tk.END)
     trace_ecrite_text.insert(tk.END, trace)
 
-def ajouter_titre(entry, listbox, all_titles):
-    global titre_widgets
+def ajouter_titre(entry):
     nouveau_titre = entry.get().strip()
-    if nouveau_titre and nouveau_titre not in all_titles:
-        save_title(nouveau_titre)
-        all_titles.append(nouveau_titre)
-        listbox.insert(tk.END, nouveau_titre)
+    if nouveau_titre and nouveau_titre not in catalog_model.titres:
+        # Le modèle insère le titre à sa place dans toutes les Combobox et Listbox abonnées
+        catalog_model.ajouter_titre(nouveau_titre)
         entry.delete(0, tk.END)
-        
-        # Mettre à jour toutes les Combobox et Listbox de titres
-        for widget in titre_widgets:
-            if isinstance(widget, ttk.Combobox):
-                values = list(widget['values'])
-                if nouveau_titre not in values:
-                    values.append(nouveau_titre)
-                    widget['values'] = tuple(values)
-            elif isinstance(widget, tk.Listbox):
-                if nouveau_titre not in widget.get(0, tk.END):
-                    widget.insert(tk.END, nouveau_titre)
-    elif nouveau_titre in all_titles:
+    elif nouveau_titre:
         messagebox.showwarning("Attention", "Ce titre existe déjà.")
     else:
         messagebox.showwarning("Attention", "Veuillez entrer un titre.")
 
 
-def supprimer_titre(listbox, all_titles):
-    global titre_widgets
+def supprimer_titre(listbox):
     selection = listbox.curselection()
     if selection:
         titre = listbox.get(selection[0])
         confirm = messagebox.askyesno("Confirmer la suppression", f"Êtes-vous sûr de vouloir supprimer le titre '{titre}' ?")
         if confirm:
-            listbox.delete(selection[0])
-            delete_title(titre)
-            all_titles.remove(titre)
-            
-            # Mettre à jour toutes les Combobox et Listbox de titres
-            for widget in titre_widgets:
-                if isinstance(widget, ttk.Combobox):
-                    values = list(widget['values'])
-                    if titre in values:
-                        values.remove(titre)
-                        widget['values'] = tuple(values)
-                elif isinstance(widget, tk.Listbox):
-                    items = list(widget.get(0, tk.END))
-                    if titre in items:
-                        index = items.index(titre)
-                        widget.delete(index)
-            
+            catalog_model.retirer_titre(titre)
             messagebox.showinfo("Suppression réussie", f"Le titre '{titre}' a été supprimé.")
     else:
         messagebox.showwarning("Attention", "Veuillez sélectionner un titre à supprimer.")
 
-def update_titre_listboxes(new_titre):
-    global titre_widgets
-    all_titles = load_titles()
-    
-    if new_titre and new_titre not in all_titles:
-        all_titles.append(new_titre)
-        all_titles.sort()
-        
-        for widget in titre_widgets:
-            if isinstance(widget, tk.Listbox):
-                widget.delete(0, tk.END)
-                for titre in all_titles:
-                    widget.insert(tk.END, titre)
-            elif isinstance(widget, ttk.Combobox):
-                values = list(widget['values'])
-                if new_titre not in values:
-                    values.append(new_titre)
-                    values.sort()
-                    widget['values'] = tuple(values)
-
-    save_title(new_titre)  # Assurez-vous que cette fonction existe dans votre module de base de données
-    return all_titles
-
-def ajouter_point_grammatical(entry, listbox, all_grammar_points):
+def ajouter_point_grammatical(entry, language="Espagnol"):
     nouveau_point = entry.get().strip()
-    if nouveau_point and nouveau_point not in all_grammar_points:
-        add_grammar_point("Espagnol", nouveau_point)
-        all_grammar_points.append(nouveau_point)
-        listbox.insert(tk.END, nouveau_point)
+    if nouveau_point and nouveau_point not in catalog_model.modele_points(language):
+        catalog_model.ajouter_point(language, nouveau_point)
         entry.delete(0, tk.END)
-        
-        # Mettre à jour toutes les Combobox d'objectifs grammaticaux
-        for widget in objectif_widgets:
-            values = list(widget['values'])
-            values.append(nouveau_point)
-            widget['values'] = values
-    elif nouveau_point in all_grammar_points:
+    elif nouveau_point:
         messagebox.showwarning("Attention", "Ce point grammatical existe déjà.")
     else:
         messagebox.showwarning("Attention", "Veuillez entrer un point grammatical.")
 
-def supprimer_point_grammatical(listbox, all_grammar_points):
+def supprimer_point_grammatical(listbox, language="Espagnol"):
     selection = listbox.curselection()
     if selection:
         point = listbox.get(selection[0])
         confirm = messagebox.askyesno("Confirmer la suppression", f"Êtes-vous sûr de vouloir supprimer le point grammatical '{point}' ?")
         if confirm:
-            listbox.delete(selection[0])
-            remove_grammar_point("Espagnol", point)  # Assurez-vous que la langue est correcte
+            catalog_model.retirer_point(language, point)
             messagebox.showinfo("Suppression réussie", f"Le point grammatical '{point}' a été supprimé.")
     else:
         messagebox.showwarning("Attention", "Veuillez sélectionner un point grammatical à supprimer.")
@@ -0,0 +1,193 @@
+"""
+virtual_listbox.py
+
+Ce module fournit ListeVirtuelle, une liste déroulante virtualisée pour les très grandes
+bibliothèques de titres et de points grammaticaux.
+
+Un tk.Listbox classique stocke chaque ligne côté Tcl : insérer ou filtrer des dizaines de milliers
+de titres prend alors plusieurs secondes et beaucoup de mémoire. ListeVirtuelle garde les éléments
+dans une séquence Python et n'affiche, dans un petit tk.Listbox interne, que les lignes visibles.
+Le défilement, la sélection et le filtrage travaillent sur la séquence Python ; seule la fenêtre
+visible est redessinée.
+
+L'interface reprend celle de tk.Listbox utilisée dans gui.py et utils.py : insert, delete, get, size,
+curselection, selection_set, selection_clear, see, bind. set_elements remplace toute la séquence
+en une seule opération (utile pour les filtres).
+"""
+
+import tkinter as tk
+from tkinter import ttk
+import tkinter.font as tkfont
+
+
+class ListeVirtuelle(ttk.Frame):
+    def __init__(self, parent, height=10, selectmode=tk.BROWSE, font=None, **kwargs):
+        super().__init__(parent)
+        self._elements = []
+        self._selection = set()
+        self._premier = 0
+        self._visibles = height
+        self.selectmode = selectmode
+
+        options = {'height': height, 'selectmode': selectmode, 'exportselection': False}
+        if font is not None:
+            options['font'] = font
+        options.update(kwargs)
+        self._listbox = tk.Listbox(self, **options)
+        self._scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.yview)
+        self._listbox.grid(row=0, column=0, sticky="nsew")
+        self._scrollbar.grid(row=0, column=1, sticky="ns")
+        self.grid_rowconfigure(0, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+
+        self._hauteur_ligne = tkfont.Font(font=self._listbox.cget('font')).metrics('linespace') + 1
+        self._listbox.bind('<Configure>', self._on_configure)
+        self._listbox.bind('<<ListboxSelect>>', self._on_select)
+        for sequence in ('<MouseWheel>', '<Button-4>', '<Button-5>'):
+            self._listbox.bind(sequence, self._on_molette)
+        self._listbox.bind('<Up>', lambda e: self._deplacer_actif(-1))
+        self._listbox.bind('<Down>', lambda e: self._deplacer_actif(1))
+
+    # --- Conversion des index -------------------------------------------------
+
+    def _index(self, index, pour_insertion=False):
+        if index in (tk.END, 'end'):
+            return len(self._elements) if pour_insertion else len(self._elements) - 1
+        if index in ('active', 'anchor'):
+            return self._premier + self._listbox.index(index)
+        if isinstance(index, str) and index.startswith('@'):
+            y = int(index.split(',')[1])
+            return self._premier + self._listbox.nearest(y)
+        return int(index)
+
+    # --- Interface compatible tk.Listbox --------------------------------------
+
+    def size(self):
+        return len(self._elements)
+
+    def insert(self, index, *elements):
+        position = self._index(index, pour_insertion=True)
+        self._elements[position:position] = elements
+        if self._selection and position < len(self._elements) - len(elements):
+            decalage = len(elements)
+            self._selection = {i + decalage if i >= position else i for i in self._selection}
+        self._redessiner()
+
+    def delete(self, first, last=None):
+        debut = self._index(first)
+        fin = debut if last is None else self._index(last)
+        if fin < debut:
+            return
+        del self._elements[debut:fin + 1]
+        if self._selection:
+            nombre = fin - debut + 1
+            self._selection = {i - nombre if i > fin else i for i in self._selection if not debut <= i <= fin}
+        self._redessiner()
+
+    def get(self, first, last=None):
+        debut = self._index(first)
+        if last is None:
+            return self._elements[debut]
+        return tuple(self._elements[debut:self._index(last) + 1])
+
+    def set_elements(self, elements):
+        self._elements = list(elements)
+        self._selection.clear()
+        self._premier = 0
+        self._redessiner()
+
+    def curselection(self):
+        return tuple(sorted(self._selection))
+
+    def selection_set(self, first, last=None):
+        debut = self._index(first)
+        fin = debut if last is None else self._index(last)
+        self._selection.update(range(debut, fin + 1))
+        self._redessiner()
+
+    def selection_clear(self, first, last=None):
+        debut = self._index(first)
+        fin = debut if last is None else self._index(last)
+        self._selection.difference_update(range(debut, fin + 1))
+        self._redessiner()
+
+    def selection_includes(self, index):
+        return self._index(index) in self._selection
+
+    def see(self, index):
+        position = self._index(index)
+        if position < self._premier:
+            self._premier = position
+        elif position >= self._premier + self._visibles:
+            self._premier = position - self._visibles + 1
+        self._redessiner()
+
+    def bind(self, sequence=None, func=None, add=None):
+        # Les événements arrivent sur la liste interne ; add='+' conserve nos propres liaisons
+        if func is None:
+            return self._listbox.bind(sequence)
+        return self._listbox.bind(sequence, func, '+')
+
+    def yview(self, *args):
+        if not args:
+            return self._fractions()
+        total = len(self._elements)
+        if args[0] == 'moveto':
+            self._premier = int(float(args[1]) * total)
+        elif args[0] == 'scroll':
+            pas = int(args[1])
+            self._premier += pas * (self._visibles if args[2] == 'pages' else 1)
+        self._redessiner()
+
+    # --- Rendu de la fenêtre visible ------------------------------------------
+
+    def _fractions(self):
+        total = len(self._elements)
+        if not total:
+            return 0.0, 1.0
+        return self._premier / total, min(1.0, (self._premier + self._visibles) / total)
+
+    def _redessiner(self):
+        total = len(self._elements)
+        self._premier = max(0, min(self._premier, total - self._visibles))
+        fenetre = self._elements[self._premier:self._premier + self._visibles]
+        self._listbox.delete(0, tk.END)
+        if fenetre:
+            self._listbox.insert(tk.END, *fenetre)
+        for index in self._selection:
+            if self._premier <= index < self._premier + len(fenetre):
+                self._listbox.selection_set(index - self._premier)
+        self._scrollbar.set(*self._fractions())
+
+    def _on_configure(self, event):
+        visibles = max(1, event.height // self._hauteur_ligne)
+        if visibles != self._visibles:
+            self._visibles = visibles
+            self._redessiner()
+
+    def _on_select(self, event):
+        visibles = range(self._premier, self._premier + self._listbox.size())
+        choisis = {self._premier + i for i in self._listbox.curselection()}
+        if self.selectmode in (tk.BROWSE, tk.SINGLE) and choisis:
+            self._selection = choisis
+        else:
+            self._selection = {i for i in self._selection if i not in visibles} | choisis
+
+    def _on_molette(self, event):
+        if event.num == 4 or getattr(event, 'delta', 0) > 0:
+            self.yview('scroll', -3, 'units')
+        else:
+            self.yview('scroll', 3, 'units')
+        return "break"
+
+    def _deplacer_actif(self, pas):
+        actif = self._index('active') + pas
+        if 0 <= actif < len(self._elements):
+            self.see(actif)
+            self._listbox.activate(actif - self._premier)
+            if self.selectmode in (tk.BROWSE, tk.SINGLE):
+                self._selection = {actif}
+                self._redessiner()
+                self._listbox.activate(actif - self._premier)
+                self._listbox.event_generate('<<ListboxSelect>>')
+        return "break"
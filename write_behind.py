@@ -0,0 +1,134 @@
+"""
+write_behind.py
+
+Ce module déplace les écritures en base hors du thread de l'interface graphique.
+
+Les modifications (ajout ou suppression de titres et de points grammaticaux) sont placées
+dans une file. Un thread d'écriture les retire par lots et exécute chaque lot dans une seule
+transaction : un commit pour plusieurs modifications, au lieu d'un commit par clic. Sur un
+dossier réseau lent, la fenêtre ne se fige donc plus pendant les commits.
+
+Un lot refusé parce qu'un autre processus écrit dans la base (SQLITE_BUSY) est rejoué entier
+après une attente (db_pool.executer_transaction, ou la fonction 'executer' fournie à la place,
+par exemple pour écrire sur une connexion dédiée). Si un lot échoue, ses opérations sont rejouées une par une afin d'isoler celle qui pose
+problème ; les échecs sont remontés au thread Tk (file sondée avec root.after) et transmis
+à la fonction on_erreur(description, erreur).
+
+Classe principale :
+- EcrivainDiffere : soumettre, vider (attend que la file soit écrite), occupe (des opérations
+  sont en file ou en cours d'écriture), arreter (vide puis arrête le thread ; à appeler après
+  root.mainloop / root.quit).
+
+Avec sql_trace, chaque opération reste attribuée à l'action Tk qui l'a soumise ; un lot dont
+toutes les opérations viennent de la même action lui est attribué entier (commit compris).
+"""
+
+import queue
+import threading
+
+import sql_trace
+from db_pool import executer_transaction
+
+TAILLE_LOT = 200
+INTERVALLE_SONDAGE_MS = 100
+
+_ARRET = object()
+
+
+class EcrivainDiffere:
+    def __init__(self, root=None, on_erreur=None, taille_lot=TAILLE_LOT, executer=executer_transaction):
+        self.root = root
+        self.on_erreur = on_erreur
+        self.executer = executer
+        self.taille_lot = taille_lot
+        self._file = queue.Queue()
+        self._resultats = queue.Queue()
+        self._en_attente = 0
+        self._sondage = None
+        self._thread = threading.Thread(target=self._travailler, name="ecriture", daemon=True)
+        self._thread.start()
+
+    def soumettre(self, operation, description=""):
+        """operation(c) est exécutée plus tard sur un curseur du thread d'écriture."""
+        if not self._thread.is_alive():
+            raise RuntimeError("Le thread d'écriture est arrêté.")
+        self._en_attente += 1
+        self._file.put((operation, description, sql_trace.action_courante()))
+        if self.root is not None and self._sondage is None:
+            self._sondage = self.root.after(INTERVALLE_SONDAGE_MS, self._sonder)
+
+    def vider(self):
+        self._file.join()
+
+    def occupe(self):
+        # unfinished_tasks ne baisse qu'après le commit du lot (task_done dans _travailler)
+        return self._file.unfinished_tasks > 0
+
+    def arreter(self):
+        if self._thread.is_alive():
+            self._file.put(_ARRET)
+            self._thread.join()
+        # La fenêtre n'existe plus forcément : les derniers échecs sont affichés en console
+        for description, erreur in self._recuperer_erreurs():
+            print(f"Échec de l'écriture différée ({description}) : {erreur}")
+
+    def _travailler(self):
+        while True:
+            lot = [self._file.get()]
+            while len(lot) < self.taille_lot:
+                try:
+                    lot.append(self._file.get_nowait())
+                except queue.Empty:
+                    break
+            operations = [element for element in lot if element is not _ARRET]
+            erreurs = self._executer(operations) if operations else []
+            self._resultats.put((len(operations), erreurs))
+            for _ in lot:
+                self._file.task_done()
+            if len(operations) != len(lot):
+                return
+
+    def _executer(self, operations):
+        actions = {action for operation, description, action in operations}
+        action_du_lot = actions.pop() if len(actions) == 1 else None
+
+        def executer_lot(c):
+            for operation, description, action in operations:
+                with sql_trace.poursuivre(action if action_du_lot is None else None):
+                    operation(c)
+
+        try:
+            # Lot rejoué entier si un autre processus tient le verrou d'écriture (voir db_pool)
+            with sql_trace.poursuivre(action_du_lot):
+                self.executer(executer_lot)
+        except Exception:
+            # Rejouer une par une pour ne perdre que les opérations fautives
+            erreurs = []
+            for operation, description, action in operations:
+                try:
+                    with sql_trace.poursuivre(action):
+                        self.executer(operation)
+                except Exception as e:
+                    erreurs.append((description, e))
+            return erreurs
+        return []
+
+    def _recuperer_erreurs(self):
+        erreurs = []
+        while True:
+            try:
+                nombre, erreurs_lot = self._resultats.get_nowait()
+            except queue.Empty:
+                return erreurs
+            self._en_attente -= nombre
+            erreurs.extend(erreurs_lot)
+
+    def _sonder(self):
+        self._sondage = None
+        for description, erreur in self._recuperer_erreurs():
+            if self.on_erreur is not None:
+                self.on_erreur(description, erreur)
+            else:
+                print(f"Échec de l'écriture différée ({description}) : {erreur}")
+        if self._en_attente > 0:
+            self._sondage = self.root.after(INTERVALLE_SONDAGE_MS, self._sonder)